@@ -1,30 +1,71 @@
-from flask import Flask, request, jsonify, render_template
-from src.pipeline.predict_pipeline import PredictPipeline, CustomData
+import time
+STARTED = time.perf_counter()
+
+from flask import Flask, request, jsonify, render_template, Response, stream_with_context, g
+from src.pipeline.predict_pipeline import PredictPipeline, iter_json_lines, startup_report
+from src.pipeline.request_schema import RequestValidationError, parse_json
 from src.exception import CustomException
+from src.logger import REQUEST_LOGGER, logging_stats
+import json
 import logging
 import os
+import threading
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Logging goes through src.logger's background writer; per-request lines are sampled under load
 logger = logging.getLogger(__name__)
+request_logger = logging.getLogger(REQUEST_LOGGER)
 
 app = Flask(__name__)
 
-# Initialize the prediction pipeline
-predict_pipeline = PredictPipeline()
-
-def get_credit_rating(credit_score):
-    """Convert credit score to credit rating"""
-    if credit_score >= 800:
-        return "Excellent"
-    elif credit_score >= 740:
-        return "Very Good"
-    elif credit_score >= 670:
-        return "Good"
-    elif credit_score >= 580:
-        return "Fair"
-    else:
-        return "Poor"
+# Initialize the prediction pipeline, load the model once at startup and warm it up (WARM_UP=0 skips that)
+predict_pipeline = PredictPipeline.from_environment()
+startup_timings = {}
+try:
+    startup_timings = predict_pipeline.start(warm_up=os.environ.get('WARM_UP', '1') == '1')
+except CustomException as e:
+    logger.error(f"Could not load model artifacts: {e}")
+startup = startup_report(STARTED, startup_timings)
+logger.info(f"Service ready: {startup}")
+if os.environ.get('ARTIFACT_WATCHER', '1') == '1':
+    predict_pipeline.registry.start_watcher()
+
+class WorkerStats:
+    """Request counters for this serving process"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.seconds_total = 0.0
+
+    def record(self, seconds, failed):
+        with self._lock:
+            self.requests += 1
+            self.errors += failed
+            self.seconds_total += seconds
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'pid': os.getpid(),
+                'requests': self.requests,
+                'errors': self.errors,
+                'mean_latency_ms': round(1000 * self.seconds_total / self.requests, 3) if self.requests else 0.0
+            }
+
+worker_stats = WorkerStats()
+
+@app.before_request
+def start_timer():
+    g.start_time = time.perf_counter()
+
+@app.after_request
+def count_request(response):
+    failed = response.status_code >= 500
+    worker_stats.record(time.perf_counter() - g.start_time, failed)
+    if predict_pipeline.metrics is not None:
+        # Label by route rather than path so unknown URLs cannot grow the label set
+        predict_pipeline.metrics.record_request(request.url_rule.rule if request.url_rule else 'unmatched', failed)
+    return response
 
 @app.route('/')
 def home():
@@ -36,66 +77,94 @@ def predict():
     """API endpoint for making credit score predictions"""
     try:
         # Get JSON data from request
-        data = request.get_json()
+        with predict_pipeline.stage("json_parse"):
+            data = parse_json(request.get_data())
         
         if not data:
             return jsonify({'error': 'No data provided'}), 400
         
-        # Create CustomData object
-        custom_data = CustomData(
-            user_id=data['user_id'],
-            age=int(data['age']),
-            gender=data['gender'],
-            education_level=data['education_level'],
-            employment_status=data['employment_status'],
-            job_title=data['job_title'],
-            monthly_income_usd=float(data['monthly_income_usd']),
-            monthly_expenses_usd=float(data['monthly_expenses_usd']),
-            savings_usd=float(data['savings_usd']),
-            has_loan=data['has_loan'],
-            loan_type=data['loan_type'],
-            loan_amount_usd=float(data['loan_amount_usd']),
-            loan_term_months=int(data['loan_term_months']),
-            monthly_emi_usd=float(data['monthly_emi_usd']),
-            loan_interest_rate_pct=float(data['loan_interest_rate_pct']),
-            debt_to_income_ratio=float(data['debt_to_income_ratio']),
-            savings_to_income_ratio=float(data['savings_to_income_ratio']),
-            region=data['region'],
-            record_date=data['record_date']
-        )
-        
-        # Convert to DataFrame
-        features_df = custom_data.get_data_as_data_frame()
-        
-        # Make prediction
-        prediction = predict_pipeline.predict(features_df)
-        
-        # Get credit score (assuming the model predicts credit score directly)
-        credit_score = float(prediction[0]) if len(prediction) > 0 else 0.0
-        
-        # Ensure credit score is within reasonable bounds (300-850)
-        credit_score = max(300, min(850, credit_score))
+        # Validate against the schema and score the record straight from the payload
+        result = predict_pipeline.predict_record(data)
+        credit_score = result['credit_score']
         
-        result = {
-            'credit_score': int(credit_score),
-            'credit_rating': get_credit_rating(credit_score),
-            'user_id': data['user_id']
-        }
-        
-        logger.info(f"Credit score prediction made for user {data['user_id']}: {credit_score}")
-        return jsonify(result)
+        request_logger.info("Credit score prediction made for user %s: %s", data['user_id'], credit_score)
+        with predict_pipeline.stage("serialize"):
+            return jsonify(result)
         
+    except RequestValidationError as e:
+        # Malformed traffic is the client's error: every problem found, no traceback
+        return jsonify({'error': str(e), 'details': e.errors}), 400
+
     except Exception as e:
         logger.error(f"Error: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+def iter_batch_records(records):
+    """Yield records from a parsed JSON array body or a newline-delimited JSON body"""
+    if records is None:
+        yield from iter_json_lines(request.stream)
+    else:
+        yield from records
+
+@app.route('/predict/batch', methods=['POST'])
+def predict_batch():
+    """API endpoint for scoring many records in one vectorized call"""
+    records = None
+    if request.mimetype not in ('application/x-ndjson', 'application/jsonl'):
+        try:
+            records = parse_json(request.get_data())
+        except RequestValidationError:
+            pass
+        if not isinstance(records, list):
+            return jsonify({'error': 'Expected a JSON array or newline-delimited JSON of records'}), 400
+
+    def generate():
+        scored = 0
+        try:
+            for result in predict_pipeline.predict_batch(iter_batch_records(records)):
+                scored += 1
+                yield json.dumps(result) + '\n'
+        except Exception as e:
+            # The 200 status line has been sent; end the stream with the error instead of truncating it
+            logger.error(f"Batch stopped at record {scored}: {str(e)}")
+            yield json.dumps({'error': str(e)}) + '\n'
+            return
+        request_logger.info("Batch prediction scored %s records", scored)
+
+    try:
+        # Load the model before streaming so a missing model is a proper error response
+        predict_pipeline.registry.get()
+    except CustomException as e:
+        logger.error(f"Error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
-    return jsonify({
-        'status': 'healthy',
-        'service': 'Credit Score Prediction Service'
-    })
+    model_info = predict_pipeline.registry.info()
+    health = {
+        'status': 'healthy' if model_info['loaded'] else 'unhealthy',
+        'service': 'Credit Score Prediction Service',
+        'model': model_info
+    }
+    health['worker'] = worker_stats.snapshot()
+    health['logging'] = logging_stats()
+    health['startup'] = startup
+    if predict_pipeline.prediction_cache is not None:
+        health['prediction_cache'] = predict_pipeline.prediction_cache.stats()
+    if predict_pipeline.micro_batcher is not None:
+        health['micro_batcher'] = predict_pipeline.micro_batcher.stats()
+    return jsonify(health), 200 if model_info['loaded'] else 503
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus metrics: per-stage prediction timings, request counters and the model version"""
+    if predict_pipeline.metrics is None:
+        return jsonify({'error': 'Metrics are disabled (SERVING_METRICS=0)'}), 404
+    body = predict_pipeline.metrics.render(predict_pipeline.registry.info())
+    return Response(body, content_type='text/plain; version=0.0.4; charset=utf-8')
 
 if __name__ == '__main__':
     # Check if model files exist
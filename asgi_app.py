@@ -0,0 +1,279 @@
+"""
+Asyncio variant of the prediction service.
+
+Connections are held by the event loop, so slow or idle keep-alive clients
+cost no threads. JSON parsing and model execution run on a bounded
+executor; when it is full the service answers 503 straight away instead of
+queueing, and a request that exceeds its deadline gets a 504.
+
+Run with: python asgi_app.py  (or uvicorn asgi_app:app)
+"""
+import time
+STARTED = time.perf_counter()
+
+import os
+import json
+import asyncio
+import contextlib
+import logging
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from src.pipeline.predict_pipeline import PredictPipeline, iter_json_lines, startup_report
+from src.pipeline.request_schema import RequestValidationError, parse_json
+from src.exception import CustomException
+from src.logger import REQUEST_LOGGER, logging_stats
+
+logger = logging.getLogger(__name__)
+request_logger = logging.getLogger(REQUEST_LOGGER)
+
+MAX_WORKERS = int(os.environ.get("ASGI_MAX_WORKERS", os.cpu_count() or 1))
+MAX_PENDING = int(os.environ.get("ASGI_MAX_PENDING", 4 * MAX_WORKERS))
+REQUEST_TIMEOUT_SECONDS = float(os.environ.get("ASGI_REQUEST_TIMEOUT_SECONDS", 2.0))
+BATCH_TIMEOUT_SECONDS = float(os.environ.get("ASGI_BATCH_TIMEOUT_SECONDS", 120.0))
+# Records scored per executor call; batch responses are streamed one chunk at a time
+BATCH_CHUNK_RECORDS = int(os.environ.get("ASGI_BATCH_CHUNK_RECORDS", 1000))
+# Larger request bodies are rejected with 413 before they are buffered
+MAX_BODY_BYTES = int(os.environ.get("ASGI_MAX_BODY_BYTES", 16 * 2**20))
+EXECUTOR_KIND = os.environ.get("ASGI_EXECUTOR", "thread")
+
+predict_pipeline = PredictPipeline.from_environment()
+
+
+class Overloaded(Exception):
+    pass
+
+
+class BoundedExecutor:
+    '''
+    Runs blocking work on a thread or process pool, admitting at most
+    max_pending calls at once. A slot is released when the work itself
+    finishes, not when the caller gives up waiting, so timed-out work still
+    counts against the bound until it is done.
+    '''
+    def __init__(self, max_workers, max_pending, kind="thread"):
+        if kind == "process":
+            self.executor = ProcessPoolExecutor(max_workers=max_workers, initializer=_init_process_worker)
+        else:
+            self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="predict")
+        self.max_pending = max_pending
+        self.pending = 0
+
+    def _release(self, _):
+        self.pending -= 1
+
+    async def run(self, timeout, fn, *args, admit=True):
+        # admit=False continues work that was already admitted, such as the rest of a streamed batch
+        if admit and self.pending >= self.max_pending:
+            raise Overloaded()
+        self.pending += 1
+        future = asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+        future.add_done_callback(self._release)
+        return await asyncio.wait_for(asyncio.shield(future), timeout)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _init_process_worker():
+    predict_pipeline.registry.get()
+
+
+def score_record(body):
+    '''
+    Parses and scores one /predict body, returning (status, payload).
+    '''
+    try:
+        with predict_pipeline.stage("json_parse"):
+            data = parse_json(body)
+        if not data:
+            return 400, {'error': 'No data provided'}
+        result = predict_pipeline.predict_record(data)
+        request_logger.info("Credit score prediction made for user %s: %s", data['user_id'], result['credit_score'])
+        return 200, result
+    except RequestValidationError as e:
+        return 400, {'error': str(e), 'details': e.errors}
+    except Exception as e:
+        logger.error(f"Error: {str(e)}")
+        return 500, {'error': str(e)}
+
+
+def parse_batch(body, ndjson):
+    '''
+    Parses a /predict/batch body, returning (status, records or error payload).
+    A malformed NDJSON line becomes an exception in place of its record.
+    '''
+    if ndjson:
+        return 200, list(iter_json_lines(body.splitlines()))
+    try:
+        records = parse_json(body)
+    except RequestValidationError:
+        records = None
+    if not isinstance(records, list):
+        return 400, {'error': 'Expected a JSON array or newline-delimited JSON of records'}
+    return 200, records
+
+
+def score_batch_chunk(records, start):
+    '''
+    Scores a slice of a batch that begins at index start, returning
+    (status, NDJSON text or error payload).
+    '''
+    try:
+        lines = []
+        for result in predict_pipeline.predict_batch(records):
+            result['index'] += start
+            lines.append(json.dumps(result) + '\n')
+        return 200, ''.join(lines)
+    except Exception as e:
+        # Any error, including a batch-level one re-raised by row isolation, ends the stream with a record
+        logger.error(f"Error: {str(e)}")
+        return 500, {'error': str(e)}
+
+
+async def _read_body(request):
+    '''
+    The request body, or None as soon as it is known to exceed MAX_BODY_BYTES.
+    '''
+    declared = request.headers.get('content-length', '')
+    if declared.isdigit() and int(declared) > MAX_BODY_BYTES:
+        return None
+    chunks, size = [], 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > MAX_BODY_BYTES:
+            return None
+        chunks.append(chunk)
+    return b''.join(chunks)
+
+
+def _too_large(endpoint):
+    _record_request(endpoint, 413)
+    return JSONResponse({'error': f'Request body exceeds {MAX_BODY_BYTES} bytes'}, status_code=413)
+
+
+async def _run(request, timeout, fn, *args, admit=True):
+    try:
+        return await request.app.state.executor.run(timeout, fn, *args, admit=admit)
+    except Overloaded:
+        return 503, {'error': 'Server is at capacity, retry later'}
+    except asyncio.TimeoutError:
+        return 504, {'error': f'Prediction did not finish within {timeout}s'}
+
+
+def _record_request(endpoint, status):
+    if predict_pipeline.metrics is not None:
+        predict_pipeline.metrics.record_request(endpoint, status >= 500)
+
+
+async def predict(request):
+    body = await _read_body(request)
+    if body is None:
+        return _too_large('/predict')
+    status, payload = await _run(request, REQUEST_TIMEOUT_SECONDS, score_record, body)
+    _record_request('/predict', status)
+    with predict_pipeline.stage("serialize"):
+        return JSONResponse(payload, status_code=status)
+
+
+async def _stream_batch(request, records, first_chunk, deadline):
+    # Each later chunk is scored only when the client has taken the previous one
+    yield first_chunk
+    loop = asyncio.get_running_loop()
+    for start in range(BATCH_CHUNK_RECORDS, len(records), BATCH_CHUNK_RECORDS):
+        status, payload = await _run(request, max(deadline - loop.time(), 0), score_batch_chunk,
+                                     records[start:start + BATCH_CHUNK_RECORDS], start, admit=False)
+        if status != 200:
+            # The 200 status line has been sent; end the stream with the error instead
+            logger.warning(f"Batch stopped at record {start}: {payload['error']}")
+            yield json.dumps(payload) + '\n'
+            return
+        yield payload
+
+
+async def predict_batch(request):
+    body = await _read_body(request)
+    if body is None:
+        return _too_large('/predict/batch')
+    ndjson = request.headers.get('content-type', '').split(';')[0] in ('application/x-ndjson', 'application/jsonl')
+    deadline = asyncio.get_running_loop().time() + BATCH_TIMEOUT_SECONDS
+    status, payload = await _run(request, BATCH_TIMEOUT_SECONDS, parse_batch, body, ndjson)
+    # Only the parsed records are kept while the response streams
+    del body
+    if status == 200:
+        records = payload
+        status, payload = await _run(request, max(deadline - asyncio.get_running_loop().time(), 0),
+                                     score_batch_chunk, records[:BATCH_CHUNK_RECORDS], 0)
+    _record_request('/predict/batch', status)
+    if status != 200:
+        return JSONResponse(payload, status_code=status)
+    return StreamingResponse(_stream_batch(request, records, payload, deadline), media_type='application/x-ndjson')
+
+
+async def health_check(request):
+    model_info = predict_pipeline.registry.info()
+    executor = request.app.state.executor
+    return JSONResponse({
+        'status': 'healthy' if model_info['loaded'] else 'unhealthy',
+        'service': 'Credit Score Prediction Service',
+        'model': model_info,
+        'executor': {'pending': executor.pending, 'max_pending': executor.max_pending},
+        'prediction_cache': predict_pipeline.prediction_cache.stats() if predict_pipeline.prediction_cache else None,
+        'logging': logging_stats(),
+        'startup': request.app.state.startup
+    }, status_code=200 if model_info['loaded'] else 503)
+
+
+async def metrics(request):
+    # With ASGI_EXECUTOR=process the stage timings are recorded in the worker processes and do not show here
+    if predict_pipeline.metrics is None:
+        return JSONResponse({'error': 'Metrics are disabled (SERVING_METRICS=0)'}, status_code=404)
+    return Response(predict_pipeline.metrics.render(predict_pipeline.registry.info()),
+                    media_type='text/plain; version=0.0.4')
+
+
+async def home(request):
+    with open(os.path.join("templates", "index.html"), "rb") as file_obj:
+        return Response(file_obj.read(), media_type="text/html")
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    timings = {}
+    try:
+        timings = predict_pipeline.start(warm_up=os.environ.get('WARM_UP', '1') == '1')
+    except CustomException as e:
+        logger.error(f"Could not load model artifacts: {e}")
+    app.state.startup = startup_report(STARTED, timings)
+    logger.info(f"Service ready: {app.state.startup}")
+    if os.environ.get('ARTIFACT_WATCHER', '1') == '1':
+        predict_pipeline.registry.start_watcher()
+    app.state.executor = BoundedExecutor(MAX_WORKERS, MAX_PENDING, EXECUTOR_KIND)
+    yield
+    app.state.executor.shutdown()
+
+
+app = Starlette(
+    routes=[
+        Route('/', home),
+        Route('/predict', predict, methods=['POST']),
+        Route('/predict/batch', predict_batch, methods=['POST']),
+        Route('/health', health_check, methods=['GET']),
+        Route('/metrics', metrics, methods=['GET']),
+    ],
+    lifespan=lifespan,
+)
+
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run(
+        app,
+        host='0.0.0.0',
+        port=int(os.environ.get('PORT', 5000)),
+        timeout_keep_alive=int(os.environ.get('ASGI_KEEPALIVE_SECONDS', 75)),
+        backlog=4096,
+    )
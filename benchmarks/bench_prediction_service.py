@@ -0,0 +1,293 @@
+"""
+Latency and throughput benchmark for the prediction service.
+
+Drives PredictPipeline in-process, the Flask app through its test client,
+or a running server over HTTP with payloads sampled from the test split
+(artifacts/test_columns, or artifacts/test.csv on trees ingested as CSV).
+Every combination of concurrency and batch size is one scenario, reported
+with p50/p95/p99 latency, throughput, error rate and RSS. Results can be
+saved as a baseline JSON file; a run compared against a baseline exits 1
+when any scenario regresses by more than --max-regression.
+
+Run with: python benchmarks/bench_prediction_service.py --target pipeline flask --concurrency 1 4 --batch-size 1 32
+          python benchmarks/bench_prediction_service.py --save-baseline benchmarks/baseline.json
+          python benchmarks/bench_prediction_service.py --baseline benchmarks/baseline.json --max-regression 0.2
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import resource
+import threading
+import http.client
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from src.components.columnar_store import read_split, split_path
+from src.pipeline.model_registry import ModelRegistry, ModelRegistryConfig
+from src.pipeline.predict_pipeline import PredictPipeline
+
+# Lower is better for latency and memory, higher for throughput
+LOWER_IS_BETTER = ("p50_ms", "p95_ms", "p99_ms", "rss_mb")
+HIGHER_IS_BETTER = ("records_per_second",)
+
+
+def load_payloads(source, sample_size, seed=42):
+    '''
+    Request payloads for sample_size distinct records of source (a CSV or
+    columnar split, falling back to the CSV split), without the target.
+    '''
+    frame = read_split(split_path(source)).drop(columns=["credit_score"], errors="ignore")
+    frame = frame.sample(n=min(sample_size, len(frame)), random_state=seed)
+    if "record_date" in frame and np.issubdtype(frame["record_date"].dtype, np.datetime64):
+        frame["record_date"] = frame["record_date"].dt.strftime("%Y-%m-%d")
+    return json.loads(frame.to_json(orient="records"))
+
+
+def _serving_pipeline(model_path=None, preprocessor_path=None):
+    # The environment's serving configuration (cache, micro-batching, native model), optionally on other artifacts
+    pipeline = PredictPipeline.from_environment()
+    if model_path or preprocessor_path:
+        config = pipeline.registry.config
+        pipeline.registry = ModelRegistry(ModelRegistryConfig(
+            model_path=model_path or config.model_path,
+            preprocessor_path=preprocessor_path or config.preprocessor_path,
+            native_model_path=config.native_model_path))
+    return pipeline
+
+
+def _count_errors(results):
+    return sum('error' in result for result in results)
+
+
+def _pipeline_sender(model_path=None, preprocessor_path=None):
+    pipeline = _serving_pipeline(model_path, preprocessor_path)
+
+    def send(batch):
+        if len(batch) == 1:
+            try:
+                pipeline.predict_record(batch[0])
+                return 0
+            except Exception:
+                return 1
+        return _count_errors(pipeline.predict_batch(batch))
+    return send
+
+
+def _flask_sender(model_path=None, preprocessor_path=None):
+    os.environ.setdefault('ARTIFACT_WATCHER', '0')
+    import app as app_module
+    app_module.predict_pipeline = _serving_pipeline(model_path, preprocessor_path)
+    local = threading.local()
+
+    def send(batch):
+        if not hasattr(local, "client"):
+            local.client = app_module.app.test_client()
+        if len(batch) == 1:
+            response = local.client.post('/predict', json=batch[0])
+            return int(response.status_code >= 400)
+        response = local.client.post('/predict/batch', json=batch)
+        if response.status_code >= 400:
+            return len(batch)
+        return _count_errors(json.loads(line) for line in response.get_data(as_text=True).splitlines())
+    return send
+
+
+def _http_sender(url):
+    parts = urlsplit(url)
+    local = threading.local()
+
+    def send(batch):
+        # One keep-alive connection per benchmark thread
+        if not hasattr(local, "connection"):
+            local.connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+        path = '/predict' if len(batch) == 1 else '/predict/batch'
+        body = json.dumps(batch[0] if len(batch) == 1 else batch)
+        try:
+            local.connection.request('POST', parts.path.rstrip('/') + path, body=body,
+                                     headers={'Content-Type': 'application/json'})
+            response = local.connection.getresponse()
+            payload = response.read().decode()
+        except (OSError, http.client.HTTPException):
+            local.connection.close()
+            del local.connection
+            return len(batch)
+        if response.status >= 400:
+            return len(batch)
+        if len(batch) == 1:
+            return 0
+        return _count_errors(json.loads(line) for line in payload.splitlines())
+    return send
+
+
+def make_sender(target, url=None, model_path=None, preprocessor_path=None):
+    '''
+    Returns send(batch) -> number of records in batch that failed.
+    '''
+    if target == "pipeline":
+        return _pipeline_sender(model_path, preprocessor_path)
+    if target == "flask":
+        return _flask_sender(model_path, preprocessor_path)
+    if target == "http":
+        if not url:
+            raise ValueError("--url is required for the http target")
+        return _http_sender(url)
+    raise ValueError(f"Unknown target {target}")
+
+
+def rss_mb():
+    '''
+    (current, peak) resident set size of this process in MB.
+    '''
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    try:
+        with open("/proc/self/statm") as file_obj:
+            current = int(file_obj.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        current = peak
+    return current, peak
+
+
+def run_scenario(send, payloads, concurrency, batch_size, requests, warmup=10):
+    '''
+    Sends requests batches of batch_size payloads from concurrency threads
+    and summarises the per-request latencies.
+    '''
+    batches = [[payloads[(i * batch_size + j) % len(payloads)] for j in range(batch_size)]
+               for i in range(warmup + requests)]
+    # Warm up on other payloads than the measured ones, so the prediction cache does not serve them
+    for batch in batches[:warmup]:
+        send(batch)
+    batches = batches[warmup:]
+
+    def worker(share):
+        latencies, errors = [], 0
+        for batch in share:
+            started = time.perf_counter()
+            errors += send(batch)
+            latencies.append(time.perf_counter() - started)
+        return latencies, errors
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        outcomes = list(executor.map(worker, [batches[i::concurrency] for i in range(concurrency)]))
+    wall_seconds = time.perf_counter() - started
+
+    latencies = np.array([latency for share, _ in outcomes for latency in share]) * 1000
+    errors = sum(share_errors for _, share_errors in outcomes)
+    current_rss, peak_rss = rss_mb()
+    return {
+        "concurrency": concurrency,
+        "batch_size": batch_size,
+        "requests": requests,
+        "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "p95_ms": round(float(np.percentile(latencies, 95)), 3),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 3),
+        "requests_per_second": round(requests / wall_seconds, 1),
+        "records_per_second": round(requests * batch_size / wall_seconds, 1),
+        "error_rate": round(errors / (requests * batch_size), 4),
+        "rss_mb": round(current_rss, 1),
+        "peak_rss_mb": round(peak_rss, 1),
+    }
+
+
+def run(targets, concurrencies, batch_sizes, requests, source, url=None, model_path=None,
+        preprocessor_path=None, warmup=10):
+    '''
+    Runs every target x concurrency x batch size scenario and returns the
+    results document saved as a baseline.
+    '''
+    payloads = load_payloads(source, (warmup + requests) * max(batch_sizes))
+    scenarios = {}
+    for target in targets:
+        for concurrency in concurrencies:
+            for batch_size in batch_sizes:
+                # A fresh pipeline per scenario, so one scenario's prediction cache does not serve the next
+                send = make_sender(target, url, model_path, preprocessor_path)
+                result = run_scenario(send, payloads, concurrency, batch_size, requests, warmup)
+                if target == "http":
+                    # The server's memory is not visible from here
+                    result["rss_mb"] = result["peak_rss_mb"] = None
+                scenarios[f"{target}/c{concurrency}/b{batch_size}"] = {"target": target, **result}
+    return {
+        "environment": {"python": platform.python_version(), "machine": platform.machine(),
+                        "cpu_count": os.cpu_count(), "source": source, "payloads": len(payloads)},
+        "scenarios": scenarios,
+    }
+
+
+def compare(results, baseline, max_regression=0.2):
+    '''
+    Lists the metrics of scenarios present in both documents that are more
+    than max_regression (a fraction) worse than the baseline, plus any
+    increase in error rate.
+    '''
+    regressions = []
+    for name, current in results["scenarios"].items():
+        reference = baseline["scenarios"].get(name)
+        if reference is None:
+            continue
+        for metric in LOWER_IS_BETTER + HIGHER_IS_BETTER:
+            if current.get(metric) is None or not reference.get(metric):
+                continue
+            change = (current[metric] - reference[metric]) / reference[metric]
+            if metric in HIGHER_IS_BETTER:
+                change = -change
+            if change > max_regression:
+                regressions.append(f"{name} {metric}: {reference[metric]} -> {current[metric]} ({change:+.0%} worse)")
+        if current["error_rate"] > reference["error_rate"]:
+            regressions.append(f"{name} error_rate: {reference['error_rate']} -> {current['error_rate']}")
+    return regressions
+
+
+def print_table(results):
+    print(f"{'scenario':<24}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>10}{'rec/s':>11}"
+          f"{'errors':>8}{'RSS MB':>9}")
+    for name, row in results["scenarios"].items():
+        rss = f"{row['rss_mb']:.1f}" if row['rss_mb'] is not None else "-"
+        print(f"{name:<24}{row['p50_ms']:>10.3f}{row['p95_ms']:>10.3f}{row['p99_ms']:>10.3f}"
+              f"{row['requests_per_second']:>10.1f}{row['records_per_second']:>11.1f}"
+              f"{row['error_rate']:>8.1%}{rss:>9}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--target", nargs="+", default=["pipeline", "flask"], choices=["pipeline", "flask", "http"])
+    parser.add_argument("--url", help="base URL of a running server, for the http target")
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 4])
+    parser.add_argument("--batch-size", nargs="+", type=int, default=[1, 32])
+    parser.add_argument("--requests", type=int, default=500, help="requests per scenario")
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--source", default=os.path.join("artifacts", "test_columns"),
+                        help="columnar split directory or CSV to sample payloads from")
+    parser.add_argument("--model-path")
+    parser.add_argument("--preprocessor-path")
+    parser.add_argument("--output", help="write the results JSON here")
+    parser.add_argument("--save-baseline", help="write the results JSON here as the new baseline")
+    parser.add_argument("--baseline", help="compare against this baseline and exit 1 on a regression")
+    parser.add_argument("--max-regression", type=float, default=0.2,
+                        help="allowed fractional slowdown per metric before failing (default 0.2)")
+    args = parser.parse_args()
+
+    results = run(args.target, args.concurrency, args.batch_size, args.requests, args.source, args.url,
+                  args.model_path, args.preprocessor_path, args.warmup)
+    print_table(results)
+    for path in filter(None, (args.output, args.save_baseline)):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as file_obj:
+            json.dump(results, file_obj, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file_obj:
+            regressions = compare(results, json.load(file_obj), args.max_regression)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.max_regression:.0%} against {args.baseline}")
@@ -0,0 +1,79 @@
+"""
+Compares the CSV split format with the columnar .npy store: write time,
+time to load the full split, time to load the columns the transformation
+stage needs, and disk footprint.
+
+Run with: python benchmarks/bench_split_formats.py [--source artifacts/train.csv]
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from src.components.columnar_store import write_columnar, read_split
+
+NEEDED_COLUMNS = ['age', 'monthly_income_usd', 'monthly_expenses_usd', 'savings_usd', 'loan_amount_usd',
+                  'loan_term_months', 'monthly_emi_usd', 'loan_interest_rate_pct', 'debt_to_income_ratio',
+                  'savings_to_income_ratio', 'gender', 'education_level', 'employment_status', 'job_title',
+                  'has_loan', 'loan_type', 'region', 'credit_score']
+
+
+def best_of(repeats, fn):
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def disk_bytes(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+def run(source, repeats):
+    df = pd.read_csv(source)
+    directory = tempfile.mkdtemp(prefix="split_formats_")
+    try:
+        paths = {"csv": os.path.join(directory, "train.csv"), "columnar": os.path.join(directory, "train_columns")}
+        writers = {"csv": lambda: df.to_csv(paths["csv"], index=False),
+                   "columnar": lambda: write_columnar(df, paths["columnar"])}
+        results = {"rows": len(df)}
+        for name, path in paths.items():
+            results[name] = {
+                "write_seconds": best_of(repeats, writers[name]),
+                "read_all_seconds": best_of(repeats, lambda: read_split(path)),
+                "read_needed_seconds": best_of(repeats, lambda: read_split(path, NEEDED_COLUMNS)),
+                "disk_bytes": disk_bytes(path),
+            }
+        return results
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--source", default=os.path.join("artifacts", "train.csv"))
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="print the raw results as JSON")
+    args = parser.parse_args()
+
+    results = run(args.source, args.repeats)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{results['rows']} rows from {args.source}")
+        print(f"{'format':<10}{'write s':>10}{'read all s':>12}{'read needed s':>15}{'disk MB':>10}")
+        for name in ("csv", "columnar"):
+            row = results[name]
+            print(f"{name:<10}{row['write_seconds']:>10.4f}{row['read_all_seconds']:>12.4f}"
+                  f"{row['read_needed_seconds']:>15.4f}{row['disk_bytes'] / 1e6:>10.2f}")
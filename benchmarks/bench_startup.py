@@ -0,0 +1,71 @@
+"""
+Cold-start time of the prediction service: starts fresh interpreters that
+import the app and, for asgi_app, run its lifespan startup (loading and
+warming up the model), and reports the process wall time until ready plus
+the app's own startup report, for the pickled artifacts and for the native
+model with the compiled preprocessor.
+
+Run with: python benchmarks/bench_startup.py [--app app] [--repeats 5] [--workdir .]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONFIGURATIONS = {
+    "pickle": {"NATIVE_MODEL": "0"},
+    "native+compiled": {"NATIVE_MODEL": "1"},
+}
+# The Flask app loads at import time; the ASGI app only in its lifespan, which TestClient runs on entering
+PROBES = {
+    "app": "import json, app; print(json.dumps(app.startup))",
+    "asgi_app": ("import json, asgi_app; from starlette.testclient import TestClient\n"
+                 "with TestClient(asgi_app.app):\n"
+                 "    print(json.dumps(asgi_app.app.state.startup))"),
+}
+
+
+def cold_start(app, workdir, extra_env):
+    env = {**os.environ, **extra_env, "ARTIFACT_WATCHER": "0",
+           "PYTHONPATH": os.pathsep.join(filter(None, [ROOT, os.environ.get("PYTHONPATH")]))}
+    started = time.perf_counter()
+    completed = subprocess.run([sys.executable, "-W", "ignore", "-c", PROBES[app]], cwd=workdir, env=env,
+                               capture_output=True, text=True, check=True)
+    wall_seconds = time.perf_counter() - started
+    return wall_seconds, json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def run(app, workdir, repeats):
+    results = {}
+    for name, extra_env in CONFIGURATIONS.items():
+        runs = [cold_start(app, workdir, extra_env) for _ in range(repeats)]
+        report = runs[-1][1] or {}
+        results[name] = {
+            "process_seconds": round(statistics.median(wall for wall, _ in runs), 4),
+            "ready_seconds": round(statistics.median((r or {}).get("ready_seconds") or 0 for _, r in runs), 4),
+            **{key: value for key, value in report.items() if key != "ready_seconds"},
+        }
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--app", default="app", choices=sorted(PROBES), help="service to start")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--workdir", default=ROOT, help="directory holding artifacts/ and templates/")
+    parser.add_argument("--json", action="store_true", help="print the raw results as JSON")
+    args = parser.parse_args()
+
+    results = run(args.app, args.workdir, args.repeats)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'configuration':<18}{'process s':>11}{'ready s':>10}{'load s':>9}{'modules':>9}  heavy modules")
+        for name, row in results.items():
+            print(f"{name:<18}{row['process_seconds']:>11.3f}{row['ready_seconds']:>10.3f}"
+                  f"{row.get('artifact_load_seconds') or 0:>9.4f}{row.get('modules_loaded', 0):>9}  "
+                  f"{', '.join(row.get('heavy_modules', []))}")
@@ -0,0 +1,66 @@
+"""
+Production serving configuration.
+
+The app (and with it the model registry) is imported once in the master
+process and then forked into the workers, so the model and preprocessor
+pages are shared copy-on-write instead of each worker unpickling its own
+copy. The master watches the artifacts; when they change it loads the new
+pair and sends itself SIGHUP, which forks fresh workers from the updated
+master and lets the old ones finish their in-flight requests.
+
+Run with: gunicorn -c gunicorn.conf.py app:app
+"""
+import gc
+import os
+import signal
+import time
+import threading
+import multiprocessing
+
+bind = os.environ.get("BIND", "0.0.0.0:5000")
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+threads = int(os.environ.get("WEB_THREADS", 1))
+preload_app = True
+timeout = int(os.environ.get("WEB_TIMEOUT", 30))
+graceful_timeout = int(os.environ.get("WEB_GRACEFUL_TIMEOUT", 30))
+keepalive = 5
+accesslog = os.environ.get("ACCESS_LOG", None)
+
+# Workers must not run their own artifact watcher: a reload inside a worker
+# would give it a private copy of the model. The master does the watching.
+os.environ["ARTIFACT_WATCHER"] = "0"
+
+ARTIFACT_CHECK_INTERVAL_SECONDS = float(os.environ.get("ARTIFACT_CHECK_INTERVAL_SECONDS", 5))
+
+
+def _predict_pipeline():
+    import app
+    return app.predict_pipeline
+
+
+def _watch_artifacts(server):
+    registry = _predict_pipeline().registry
+    while True:
+        time.sleep(ARTIFACT_CHECK_INTERVAL_SECONDS)
+        if registry.reload_if_changed():
+            server.log.info("Model artifacts changed (version %s), reloading workers",
+                            registry.info().get("version"))
+            os.kill(os.getpid(), signal.SIGHUP)
+
+
+def when_ready(server):
+    # Move everything loaded so far out of the garbage collector's reach so
+    # collections in the workers do not touch (and copy) the shared pages
+    gc.freeze()
+    server.log.info("Model %s loaded in master, forking %s workers",
+                    _predict_pipeline().registry.info().get("version"), server.cfg.workers)
+    threading.Thread(target=_watch_artifacts, args=(server,), name="artifact-watcher", daemon=True).start()
+
+
+def on_reload(server):
+    gc.freeze()
+
+
+def worker_exit(server, worker):
+    import app
+    server.log.info("Worker %s exiting: %s", worker.pid, app.worker_stats.snapshot())
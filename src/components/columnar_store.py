@@ -0,0 +1,118 @@
+import os
+import sys
+import json
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from src.exception import CustomException
+
+SCHEMA_FILE = "schema.json"
+
+
+def _column_kind(series, datetime_columns, max_categories):
+    if series.name in datetime_columns:
+        return "datetime"
+    if pd.api.types.is_bool_dtype(series) or pd.api.types.is_numeric_dtype(series):
+        return "numeric"
+    if series.nunique(dropna=True) <= max_categories:
+        return "categorical"
+    return "string"
+
+
+def write_columnar(df, directory, datetime_columns=("record_date",), max_categories=1000):
+    '''
+    Writes a dataframe as one .npy file per column plus a schema.json with
+    each column's kind, dtype and, for categoricals, the dictionary of
+    values. Categoricals are stored as small integer codes (-1 for missing),
+    dates as datetime64 and other text as fixed-width unicode (missing text
+    becomes ""), so every column can be memory-mapped back without parsing.
+    '''
+    try:
+        staging = directory.rstrip(os.sep) + ".tmp"
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+
+        schema = {"n_rows": len(df), "columns": []}
+        for column in df.columns:
+            series = df[column]
+            kind = _column_kind(series, datetime_columns, max_categories)
+            entry = {"name": column, "kind": kind}
+            if kind == "numeric":
+                values = series.to_numpy()
+            elif kind == "datetime":
+                values = pd.to_datetime(series).to_numpy(dtype="datetime64[ns]")
+            elif kind == "categorical":
+                categorical = pd.Categorical(series)
+                entry["categories"] = categorical.categories.tolist()
+                values = categorical.codes
+            else:
+                values = series.fillna("").to_numpy(dtype=str)
+            entry["dtype"] = str(values.dtype)
+            np.save(os.path.join(staging, f"{column}.npy"), values)
+            schema["columns"].append(entry)
+
+        with open(os.path.join(staging, SCHEMA_FILE), "w") as file_obj:
+            json.dump(schema, file_obj, indent=2)
+
+        # Swap the finished store into place so readers never see a partial one
+        shutil.rmtree(directory, ignore_errors=True)
+        os.replace(staging, directory)
+
+    except Exception as e:
+        raise CustomException(e, sys)
+
+
+def read_schema(directory):
+    with open(os.path.join(directory, SCHEMA_FILE)) as file_obj:
+        return json.load(file_obj)
+
+
+def read_columnar(directory, columns=None):
+    '''
+    Reads the requested columns of a store written by write_columnar.
+    Numeric and date columns are memory-mapped; categoricals come back as
+    pandas categoricals built on the mapped codes.
+    '''
+    try:
+        schema = read_schema(directory)
+        entries = {entry["name"]: entry for entry in schema["columns"]}
+        data = {}
+        for column in columns or list(entries):
+            entry = entries[column]
+            values = np.load(os.path.join(directory, f"{column}.npy"), mmap_mode="r")
+            if entry["kind"] == "categorical":
+                data[column] = pd.Categorical.from_codes(values, categories=entry["categories"])
+            elif entry["kind"] == "string":
+                data[column] = values.astype(object)
+            else:
+                data[column] = values
+        return pd.DataFrame(data, copy=False)
+
+    except Exception as e:
+        raise CustomException(e, sys)
+
+
+def split_path(path):
+    '''
+    Resolves a columnar split that was never written to the CSV ingestion
+    writes instead (artifacts/test_columns -> artifacts/test.csv), so
+    readers defaulting to the columnar store also work on CSV-only trees.
+    '''
+    directory = path.rstrip(os.sep)
+    if os.path.exists(path) or not directory.endswith("_columns"):
+        return path
+    csv_path = directory[:-len("_columns")] + ".csv"
+    return csv_path if os.path.exists(csv_path) else path
+
+
+def read_split(path, columns=None):
+    '''
+    Reads a split from either a columnar store directory or a CSV file.
+    Requested columns the split does not have are skipped.
+    '''
+    if os.path.isdir(path):
+        available = [entry["name"] for entry in read_schema(path)["columns"]]
+        return read_columnar(path, None if columns is None else [c for c in available if c in columns])
+    return pd.read_csv(path, usecols=None if columns is None else (lambda column: column in columns))
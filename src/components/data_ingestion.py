@@ -1,7 +1,9 @@
 #make classes for data ingestion
 import pandas as pd
+import numpy as np
 import sys
 import os
+import zlib
 from pathlib import Path
 
 # Add the project root to Python path
@@ -11,17 +13,31 @@ sys.path.append(str(project_root))
 from src.exception import CustomException
 from src.logger import logging
 from sklearn.model_selection import train_test_split
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from src.components.columnar_store import write_columnar
 from src.components.data_transformation import DataTransformation
-from src.components.data_transformation import DataTransformationConfig
-from src.components.model_trainer import ModelTrainerConfig
-from src.components.model_trainer import ModelTrainer
 
 @dataclass
 class DataIngestionConfig:
     train_file_path: str=os.path.join("artifacts", "train.csv")
     test_file_path: str=os.path.join("artifacts", "test.csv")
     raw_file_path: str=os.path.join("artifacts", "data.csv")
+    source_file_path: str=os.path.join("notebook", "data", "personal_finance_dataset.csv")
+    test_size: float=0.2
+    chunk_rows: int=100000
+    # "columnar" writes typed, memory-mappable stores; "csv" keeps the text files
+    split_format: str=field(default_factory=lambda: os.environ.get("SPLIT_FORMAT", "columnar"))
+    raw_store_path: str=os.path.join("artifacts", "data_columns")
+    train_store_path: str=os.path.join("artifacts", "train_columns")
+    test_store_path: str=os.path.join("artifacts", "test_columns")
+
+def user_id_buckets(user_ids):
+    '''
+    Maps each user_id to a stable 32-bit bucket (CRC32), so a split on it is
+    reproducible across runs and machines without shuffling the dataset.
+    '''
+    return np.fromiter((zlib.crc32(str(user_id).encode()) for user_id in user_ids),
+                       dtype=np.uint32, count=len(user_ids))
 
 class DataIngestion:
     def __init__(self):
@@ -31,12 +47,23 @@ class DataIngestion:
         logging.info("Entered Data ingestion Component")
         try:
             
-            df = pd.read_csv(r"notebook\data\personal_finance_dataset.csv")
+            df = pd.read_csv(self.ingestion_config.source_file_path)
             logging.info("Read data into dataframe")
             os.makedirs(os.path.dirname(self.ingestion_config.train_file_path), exist_ok=True)
-            df.to_csv(self.ingestion_config.raw_file_path, index=False, header=True)
             logging.info("Initiated the train test split")
-            train_set, test_set = train_test_split(df, test_size=0.2, random_state=42)
+            train_set, test_set = train_test_split(df, test_size=self.ingestion_config.test_size, random_state=42)
+            if self.ingestion_config.split_format == "columnar":
+                write_columnar(df, self.ingestion_config.raw_store_path)
+                write_columnar(train_set, self.ingestion_config.train_store_path)
+                write_columnar(test_set, self.ingestion_config.test_store_path)
+                logging.info("Data ingestion completed")
+
+                return(
+                    self.ingestion_config.train_store_path,
+                    self.ingestion_config.test_store_path
+                )
+
+            df.to_csv(self.ingestion_config.raw_file_path, index=False, header=True)
             train_set.to_csv(self.ingestion_config.train_file_path, index=False, header=True)
             test_set.to_csv(self.ingestion_config.test_file_path, index=False, header=True)
             logging.info("Data ingestion completed")
@@ -48,12 +75,50 @@ class DataIngestion:
         except Exception as e:
             raise CustomException(e,sys)
 
+    def initiate_streaming_ingestion(self):
+        '''
+        Reads the source in chunks of chunk_rows and appends each row to the
+        train or test file by a hash of its user_id. Memory is bounded by the
+        chunk size, and all records of a user land on the same side.
+        '''
+        logging.info("Entered streaming Data ingestion Component")
+        try:
+            config = self.ingestion_config
+            os.makedirs(os.path.dirname(config.train_file_path), exist_ok=True)
+            for path in (config.raw_file_path, config.train_file_path, config.test_file_path):
+                if os.path.exists(path):
+                    os.remove(path)
+
+            test_threshold = int(config.test_size * 2**32)
+            rows = {"train": 0, "test": 0}
+            for number, chunk in enumerate(pd.read_csv(config.source_file_path, chunksize=config.chunk_rows)):
+                header = number == 0
+                in_test = user_id_buckets(chunk["user_id"]) < test_threshold
+                chunk.to_csv(config.raw_file_path, mode="a", index=False, header=header)
+                chunk[~in_test].to_csv(config.train_file_path, mode="a", index=False, header=header)
+                chunk[in_test].to_csv(config.test_file_path, mode="a", index=False, header=header)
+                rows["train"] += int((~in_test).sum())
+                rows["test"] += int(in_test.sum())
+            logging.info(f"Streaming data ingestion completed: {rows}")
+
+            return(
+                config.train_file_path,
+                config.test_file_path
+            )
+        except Exception as e:
+            raise CustomException(e,sys)
+
 if __name__=="__main__":
     obj=DataIngestion()
-    train_data,test_data=obj.initiate_data_ingestion()
+    if os.environ.get("STREAMING_TRAINING")=="1":
+        from src.components.streaming_trainer import StreamingModelTrainer
+
+        train_data,test_data=obj.initiate_streaming_ingestion()
+        preprocessor,_=DataTransformation().initiate_streaming_transformation(train_data)
+        print(StreamingModelTrainer().initiate_streaming_training(train_data,test_data,preprocessor))
+        sys.exit(0)
 
-    data_transformation=DataTransformation()
-    train_arr,test_arr,_=data_transformation.initiate_data_transformation(train_data,test_data)
+    # Stages whose inputs and configs are unchanged since the last run are skipped
+    from src.pipeline.train_pipeline import TrainPipeline
 
-    modeltrainer=ModelTrainer()
-    print(modeltrainer.initiate_model_trainer(train_arr,test_arr))
\ No newline at end of file
+    print(TrainPipeline().run())
\ No newline at end of file
@@ -1,6 +1,6 @@
 import pandas as pd
 import sys
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import numpy as np 
 from sklearn.compose import ColumnTransformer
 from sklearn.impute import SimpleImputer
@@ -10,12 +10,84 @@ from sklearn.preprocessing import OneHotEncoder,StandardScaler
 from src.exception import CustomException
 from src.logger import logging
 import os
+import uuid
+from collections import Counter
 
 from src.utils import save_object
+from src.pipeline.fast_encoder import write_compiled_preprocessor
+from src.components.columnar_store import read_split
 
 @dataclass
 class DataTransformationConfig:
     preprocessor_obj_file_path = os.path.join("artifacts", "preprocessor.pkl")
+    # Tree models and XGBoost work in float32 internally, so float64 features only cost memory
+    feature_dtype: type = np.float32
+    transform_chunk_rows: int = 8192
+    streaming_chunk_rows: int = 100000
+    # Medians come from a uniform sample of this many values per column; exact below it
+    median_sample_size: int = 1000000
+    random_state: int = 42
+    numerical_columns: list = field(default_factory=lambda: [
+        'age', 'monthly_income_usd', 'monthly_expenses_usd', 'savings_usd', 'loan_amount_usd',
+        'loan_term_months', 'monthly_emi_usd', 'loan_interest_rate_pct', 'debt_to_income_ratio',
+        'savings_to_income_ratio'])
+    categorical_columns: list = field(default_factory=lambda: [
+        'gender', 'education_level', 'employment_status', 'job_title', 'has_loan', 'loan_type', 'region'])
+
+class _ReservoirSample:
+    '''
+    Uniform fixed-size sample of a stream of values (Algorithm R, applied a
+    chunk at a time).
+    '''
+    def __init__(self, size, rng):
+        self.size = size
+        self.rng = rng
+        self.values = np.empty(size, dtype=np.float64)
+        self.seen = 0
+
+    def update(self, values):
+        free = min(self.size - min(self.seen, self.size), len(values))
+        self.values[self.seen:self.seen + free] = values[:free]
+        rest = values[free:]
+        if len(rest):
+            positions = self.rng.integers(0, self.seen + free + np.arange(1, len(rest) + 1))
+            keep = positions < self.size
+            self.values[positions[keep]] = rest[keep]
+        self.seen += len(values)
+
+    def median(self):
+        return float(np.median(self.values[:min(self.seen, self.size)])) if self.seen else np.nan
+
+class _RunningMoments:
+    '''
+    Count, mean and sum of squared deviations merged chunk by chunk (Chan et al.)
+    '''
+    def __init__(self):
+        self.n, self.mean, self.m2 = 0, 0.0, 0.0
+
+    def merge(self, n, mean, m2):
+        if n == 0:
+            return
+        total = self.n + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta ** 2 * self.n * n / total
+        self.n = total
+
+    def update(self, values):
+        if len(values):
+            self.merge(len(values), float(values.mean()), float(((values - values.mean()) ** 2).sum()))
+
+    @property
+    def var(self):
+        return self.m2 / self.n if self.n else 0.0
+
+def _set_scaler_statistics(scaler, mean, var, n_samples):
+    scaler.mean_ = np.asarray(mean, dtype=np.float64)
+    scaler.var_ = np.asarray(var, dtype=np.float64)
+    scale = np.sqrt(scaler.var_)
+    scaler.scale_ = np.where(scale < 10 * np.finfo(scale.dtype).eps, 1.0, scale)
+    scaler.n_samples_seen_ = n_samples
 
 class DataTransformation:
     def __init__(self):
@@ -124,43 +196,53 @@ class DataTransformation:
         except Exception as e:
             raise CustomException(e,sys)
 
-    def initiate_data_transformation(self,train_path,test_path):
-
+    def transform_features(self, preprocessor, input_feature_df):
+        '''
+        Transforms a dataframe chunk by chunk into a preallocated array of
+        feature_dtype, so no full-size float64 copy of the features exists.
+        '''
         try:
-            train_df=pd.read_csv(train_path)
-            test_df=pd.read_csv(test_path)
+            config = self.data_transformation_config
+            n_features = len(preprocessor.get_feature_names_out())
+            features = np.empty((len(input_feature_df), n_features), dtype=config.feature_dtype)
+            for start in range(0, len(input_feature_df), config.transform_chunk_rows):
+                chunk = preprocessor.transform(input_feature_df.iloc[start:start + config.transform_chunk_rows])
+                if hasattr(chunk, "toarray"):
+                    chunk = chunk.toarray()
+                features[start:start + len(chunk)] = chunk
+            return features
 
-            logging.info("Read train and test data completed")
+        except Exception as e:
+            raise CustomException(e,sys)
 
-            logging.info("Obtaining preprocessing object")
+    def initiate_data_transformation(self,train_path,test_path):
+        '''
+        Returns X_train, y_train, X_test, y_test and the preprocessor path.
+        Features are compact arrays of feature_dtype and targets are separate
+        vectors, so the trainer never has to slice a target column back off.
+        '''
 
+        try:
             target_column_name="credit_score"
             columns_to_drop = ["credit_score", "user_id", 'record_date']
             
             # Define the columns that should be processed
-            numerical_columns = ['age',
-            'monthly_income_usd',
-            'monthly_expenses_usd',
-            'savings_usd',
-            'loan_amount_usd',
-            'loan_term_months',
-            'monthly_emi_usd',
-            'loan_interest_rate_pct',
-            'debt_to_income_ratio',
-            'savings_to_income_ratio']
+            numerical_columns = self.data_transformation_config.numerical_columns
+            categorical_columns = self.data_transformation_config.categorical_columns
 
-            categorical_columns = ['gender',
-            'education_level',
-            'employment_status',
-            'job_title',
-            'has_loan',
-            'loan_type',
-            'region']
+            # Columnar splits memory-map just these columns; CSV splits parse just these
+            needed_columns = numerical_columns + categorical_columns + [target_column_name]
+            train_df=read_split(train_path, needed_columns)
+            test_df=read_split(test_path, needed_columns)
+
+            logging.info("Read train and test data completed")
+
+            logging.info("Obtaining preprocessing object")
 
-            input_feature_train_df=train_df.drop(columns=columns_to_drop,axis=1)
+            input_feature_train_df=train_df.drop(columns=columns_to_drop,axis=1,errors="ignore")
             target_feature_train_df=train_df[target_column_name]
 
-            input_feature_test_df=test_df.drop(columns=columns_to_drop,axis=1)
+            input_feature_test_df=test_df.drop(columns=columns_to_drop,axis=1,errors="ignore")
             target_feature_test_df=test_df[target_column_name]
 
             logging.info(f"Input feature train df shape: {input_feature_train_df.shape}")
@@ -181,30 +263,132 @@ class DataTransformation:
                 f"Applying preprocessing object on training dataframe and testing dataframe."
             )
 
-            input_feature_train_arr=preprocessing_obj.fit_transform(input_feature_train_df)
-            input_feature_test_arr=preprocessing_obj.transform(input_feature_test_df)
+            preprocessing_obj.fit(input_feature_train_df)
+            input_feature_train_arr=self.transform_features(preprocessing_obj, input_feature_train_df)
+            input_feature_test_arr=self.transform_features(preprocessing_obj, input_feature_test_df)
 
-            logging.info(f"Transformed train array shape: {input_feature_train_arr.shape}")
+            logging.info(f"Transformed train array shape: {input_feature_train_arr.shape}, dtype: {input_feature_train_arr.dtype}")
             logging.info(f"Target train array shape: {target_feature_train_df.shape}")
 
-            train_arr = np.c_[
-                input_feature_train_arr, np.array(target_feature_train_df)
-            ]
-            test_arr = np.c_[input_feature_test_arr, np.array(target_feature_test_df)]
-
             logging.info(f"Saved preprocessing object.")
 
+            # The registry only serves a preprocessor with the model carrying the same pair id, so it
+            # keeps the previous pair until model selection publishes the model fitted on this one
+            preprocessing_obj.pair_id_ = uuid.uuid4().hex
             save_object(
 
                 file_path=self.data_transformation_config.preprocessor_obj_file_path,
                 obj=preprocessing_obj
 
             )
+            # Written after the pickle, so serving sees it as current and can skip unpickling
+            write_compiled_preprocessor(preprocessing_obj, self.data_transformation_config.preprocessor_obj_file_path)
 
             return (
-                train_arr,
-                test_arr,
+                input_feature_train_arr,
+                target_feature_train_df.to_numpy(dtype=np.float64),
+                input_feature_test_arr,
+                target_feature_test_df.to_numpy(dtype=np.float64),
                 self.data_transformation_config.preprocessor_obj_file_path,
             )
         except Exception as e:
             raise CustomException(e,sys)
+
+    def fit_streaming_preprocessor(self, train_path, numerical_columns, categorical_columns):
+        '''
+        Fits the same preprocessor as get_data_transformer_object_with_columns
+        in one pass over train_path, holding one chunk at a time. Scaler
+        moments are merged per chunk and one-hot categories and modes come from
+        running counts; medians are exact up to median_sample_size values per
+        column and sampled beyond it.
+        '''
+        try:
+            config = self.data_transformation_config
+            rng = np.random.default_rng(config.random_state)
+            samples = {column: _ReservoirSample(config.median_sample_size, rng) for column in numerical_columns}
+            moments = {column: _RunningMoments() for column in numerical_columns}
+            counts = {column: Counter() for column in categorical_columns}
+            n_rows = 0
+            first_chunk = None
+
+            for chunk in pd.read_csv(train_path, usecols=numerical_columns + categorical_columns,
+                                     chunksize=config.streaming_chunk_rows):
+                if first_chunk is None:
+                    first_chunk = chunk
+                n_rows += len(chunk)
+                for column in numerical_columns:
+                    values = chunk[column].dropna().to_numpy(dtype=np.float64)
+                    samples[column].update(values)
+                    moments[column].update(values)
+                for column in categorical_columns:
+                    counts[column].update(chunk[column].dropna().tolist())
+
+            medians = [samples[column].median() for column in numerical_columns]
+            for column, median in zip(numerical_columns, medians):
+                # Imputed rows enter the scaler as the median
+                moments[column].merge(n_rows - moments[column].n, median, 0.0)
+
+            modes, categories, frequencies, fill_values = [], [], [], {}
+            for column in categorical_columns:
+                if not counts[column]:
+                    # Like SimpleImputer(strategy="most_frequent"), drop a column with no values at all
+                    logging.warning(f"Categorical column {column} has no values in {train_path}, dropping it")
+                    modes.append(np.nan)
+                    continue
+                top = max(counts[column].values())
+                # SimpleImputer breaks ties in favour of the smallest value
+                mode = min(value for value, count in counts[column].items() if count == top)
+                counts[column][mode] += n_rows - sum(counts[column].values())
+                values = sorted(counts[column])
+                modes.append(mode)
+                fill_values[column] = mode
+                categories.append(np.array(values, dtype=object))
+                frequencies.extend(counts[column][value] / n_rows for value in values)
+
+            # Fit on the first chunk to build the fitted structure, then install the streamed statistics.
+            # Its gaps are filled with the streamed modes so only the columns dropped above are dropped
+            structure_chunk = first_chunk.fillna(fill_values)
+            preprocessor = self.get_data_transformer_object_with_columns(numerical_columns, categorical_columns)
+            preprocessor.set_params(cat_pipelines__one_hot_encoder__categories=categories)
+            preprocessor.fit(structure_chunk)
+
+            num_pipeline = preprocessor.named_transformers_["num_pipeline"]
+            num_pipeline.named_steps["imputer"].statistics_ = np.array(medians)
+            _set_scaler_statistics(num_pipeline.named_steps["scaler"],
+                                   [moments[column].mean for column in numerical_columns],
+                                   [moments[column].var for column in numerical_columns], n_rows)
+
+            cat_pipeline = preprocessor.named_transformers_["cat_pipelines"]
+            cat_pipeline.named_steps["imputer"].statistics_ = np.array(modes, dtype=object)
+            frequencies = np.array(frequencies)
+            _set_scaler_statistics(cat_pipeline.named_steps["scaler"], frequencies,
+                                   frequencies * (1 - frequencies), n_rows)
+
+            logging.info(f"Fitted streaming preprocessor on {n_rows} rows")
+            return preprocessor
+
+        except Exception as e:
+            raise CustomException(e,sys)
+
+    def initiate_streaming_transformation(self, train_path):
+        '''
+        Fits the preprocessor out of core and saves it. Returns the fitted
+        preprocessor and its path; features are produced chunk by chunk by
+        the streaming trainer.
+        '''
+        try:
+            config = self.data_transformation_config
+            preprocessing_obj = self.fit_streaming_preprocessor(train_path, config.numerical_columns,
+                                                                config.categorical_columns)
+
+            # Paired with the streamed model the same way as in initiate_data_transformation
+            preprocessing_obj.pair_id_ = uuid.uuid4().hex
+            save_object(
+                file_path=self.data_transformation_config.preprocessor_obj_file_path,
+                obj=preprocessing_obj
+            )
+            write_compiled_preprocessor(preprocessing_obj, self.data_transformation_config.preprocessor_obj_file_path)
+            return preprocessing_obj, self.data_transformation_config.preprocessor_obj_file_path
+
+        except Exception as e:
+            raise CustomException(e,sys)
\ No newline at end of file
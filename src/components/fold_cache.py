@@ -0,0 +1,149 @@
+import os
+import sys
+import shutil
+import hashlib
+import threading
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.base import clone
+
+from src.exception import CustomException
+from src.logger import logging
+from src.utils import save_object, load_object
+
+
+@dataclass
+class FoldCacheConfig:
+    cache_dir: str = os.path.join("artifacts", "fold_cache")
+
+
+@dataclass(frozen=True)
+class CachedFold:
+    '''
+    Paths of one split's transformed arrays. Cheap to send to worker
+    processes, which memory-map the files instead of receiving copies.
+    '''
+    X_train_path: str
+    y_train_path: str
+    X_valid_path: str = None
+    y_valid_path: str = None
+
+    def load(self):
+        paths = (self.X_train_path, self.y_train_path, self.X_valid_path, self.y_valid_path)
+        return tuple(None if path is None else np.load(path, mmap_mode="r") for path in paths)
+
+
+def _digest_data(hasher, X):
+    if isinstance(X, (pd.DataFrame, pd.Series)):
+        hasher.update(repr(list(X.columns) if isinstance(X, pd.DataFrame) else [X.name]).encode())
+        hasher.update(pd.util.hash_pandas_object(X, index=False).values.tobytes())
+    else:
+        X = np.ascontiguousarray(X)
+        hasher.update(f"{X.dtype}{X.shape}".encode())
+        hasher.update(X.tobytes())
+
+
+def _rows(X, index):
+    return X.iloc[index] if isinstance(X, (pd.DataFrame, pd.Series)) else X[index]
+
+
+def _save(path, array):
+    if sparse.issparse(array):
+        array = array.toarray()
+    # Write then rename so a crashed run, or a concurrent writer of the same
+    # fold, never leaves a truncated array behind
+    temporary_path = f"{path}.{os.getpid()}-{threading.get_ident()}.tmp.npy"
+    np.save(temporary_path, np.ascontiguousarray(array))
+    os.replace(temporary_path, path)
+
+
+class FoldCache:
+    '''
+    Transforms each cross-validation split once and stores the result as
+    .npy files. With a preprocessor, it is fitted on the fold's training rows
+    only, so every candidate sees leakage-free features without refitting
+    the encoders. Entries are keyed on the data, the preprocessor's
+    parameters and the fold indices, so an unchanged rerun reuses them.
+    '''
+    def __init__(self, config=None):
+        self.config = config or FoldCacheConfig()
+
+    def _key(self, X, y, folds, preprocessor):
+        hasher = hashlib.sha256()
+        _digest_data(hasher, X)
+        _digest_data(hasher, y)
+        hasher.update(repr(None if preprocessor is None else preprocessor.get_params(deep=True)).encode())
+        for train_index, valid_index in folds:
+            hasher.update(np.asarray(train_index).tobytes())
+            hasher.update(b"|")
+            hasher.update(np.asarray(valid_index).tobytes())
+        return hasher.hexdigest()[:16]
+
+    def _prune(self, keep):
+        # Only the latest dataset is worth keeping on disk
+        for entry in os.listdir(self.config.cache_dir):
+            if entry != keep:
+                shutil.rmtree(os.path.join(self.config.cache_dir, entry), ignore_errors=True)
+
+    def _write_split(self, directory, X_train, y_train, X_valid, y_valid, preprocessor):
+        fold = CachedFold(
+            X_train_path=os.path.join(directory, "X_train.npy"),
+            y_train_path=os.path.join(directory, "y_train.npy"),
+            X_valid_path=None if X_valid is None else os.path.join(directory, "X_valid.npy"),
+            y_valid_path=None if X_valid is None else os.path.join(directory, "y_valid.npy"),
+        )
+        preprocessor_path = os.path.join(directory, "preprocessor.pkl")
+        paths = [path for path in (fold.X_train_path, fold.y_train_path, fold.X_valid_path, fold.y_valid_path) if path]
+        if preprocessor is not None:
+            paths.append(preprocessor_path)
+        if all(os.path.exists(path) for path in paths):
+            return fold, None if preprocessor is None else load_object(preprocessor_path)
+
+        if preprocessor is not None:
+            preprocessor = clone(preprocessor)
+            X_train = preprocessor.fit_transform(X_train)
+            X_valid = None if X_valid is None else preprocessor.transform(X_valid)
+        os.makedirs(directory, exist_ok=True)
+        _save(fold.X_train_path, X_train)
+        _save(fold.y_train_path, np.asarray(y_train))
+        if X_valid is not None:
+            _save(fold.X_valid_path, X_valid)
+            _save(fold.y_valid_path, np.asarray(y_valid))
+        if preprocessor is not None:
+            save_object(preprocessor_path, preprocessor)
+        return fold, preprocessor
+
+    def prepare(self, X, y, folds, preprocessor=None):
+        '''
+        Returns (folds, full, fitted_preprocessor): a CachedFold per split,
+        a CachedFold of all rows for the final refit, and the preprocessor
+        fitted on all rows (None when X is already transformed).
+        '''
+        try:
+            folds = [(np.asarray(train_index), np.asarray(valid_index)) for train_index, valid_index in folds]
+            key = self._key(X, y, folds, preprocessor)
+            root = os.path.join(self.config.cache_dir, key)
+            reused = os.path.isdir(root)
+            os.makedirs(root, exist_ok=True)
+            self._prune(keep=key)
+
+            cached = []
+            for number, (train_index, valid_index) in enumerate(folds):
+                fold, _ = self._write_split(
+                    os.path.join(root, f"fold_{number}"),
+                    _rows(X, train_index), _rows(y, train_index),
+                    _rows(X, valid_index), _rows(y, valid_index), preprocessor)
+                cached.append(fold)
+            full, fitted = self._write_split(os.path.join(root, "full"), X, y, None, None, preprocessor)
+
+            logging.info(f"Fold cache {key}: {len(cached)} folds {'reused' if reused else 'written'} in {root}")
+            return cached, full, fitted
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def clear(self):
+        shutil.rmtree(self.config.cache_dir, ignore_errors=True)
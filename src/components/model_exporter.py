@@ -0,0 +1,300 @@
+import os
+import sys
+import json
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from src.exception import CustomException
+from src.logger import logging
+
+# Objectives whose prediction is the raw margin, so trees plus base_score is the output
+IDENTITY_LINK_OBJECTIVES = {
+    "reg:squarederror",
+    "reg:absoluteerror",
+    "reg:pseudohubererror",
+    "reg:quantileerror",
+}
+
+
+# "float64" reproduces model.predict; "float32" stores thresholds, leaves and coefficients in single
+# precision; "binned" also replaces tree features and thresholds with small integer bin codes
+PRECISIONS = ("float64", "float32", "binned")
+
+
+@dataclass
+class ModelExporterConfig:
+    native_model_file_path: str = os.path.join("artifacts", "model_native.npz")
+    precision: str = field(default_factory=lambda: os.environ.get("NATIVE_PRECISION", "float64"))
+
+
+def _pack_trees(trees):
+    '''
+    Concatenates per-tree node arrays into flat arrays with global child indices.
+    Each tree is a dict with feature, threshold, left, right, value and default_left.
+    '''
+    roots = []
+    offset = 0
+    packed = {key: [] for key in ("feature", "threshold", "left", "right", "value", "default_left")}
+    max_depth = 0
+    for tree in trees:
+        n_nodes = len(tree["left"])
+        left = np.asarray(tree["left"], dtype=np.int32)
+        right = np.asarray(tree["right"], dtype=np.int32)
+        leaf = left < 0
+        roots.append(offset)
+        packed["left"].append(np.where(leaf, -1, left + offset))
+        packed["right"].append(np.where(leaf, -1, right + offset))
+        # Leaves get feature 0 so the evaluator can index X without masking
+        packed["feature"].append(np.where(leaf, 0, tree["feature"]).astype(np.int32))
+        packed["threshold"].append(np.asarray(tree["threshold"], dtype=np.float64))
+        packed["value"].append(np.asarray(tree["value"], dtype=np.float64))
+        packed["default_left"].append(np.asarray(tree["default_left"], dtype=bool))
+        max_depth = max(max_depth, _tree_depth(left, right))
+        offset += n_nodes
+
+    arrays = {key: np.concatenate(values) for key, values in packed.items()}
+    arrays["roots"] = np.asarray(roots, dtype=np.int32)
+    arrays["max_depth"] = np.asarray(max_depth, dtype=np.int32)
+    return arrays
+
+
+def _tree_depth(left, right):
+    depth = 0
+    level = np.asarray([0])
+    while True:
+        children = np.concatenate([left[level], right[level]])
+        level = children[children >= 0]
+        if not len(level):
+            return depth
+        depth += 1
+
+
+def _export_linear(model):
+    coef = np.asarray(model.coef_, dtype=np.float64).ravel()
+    return {
+        "kind": np.asarray("linear"),
+        "coef": coef,
+        "intercept": np.asarray(float(np.ravel(model.intercept_)[0])),
+        "n_features": np.asarray(coef.shape[0], dtype=np.int32),
+    }
+
+
+def _sklearn_tree(tree_):
+    return {
+        "feature": tree_.feature,
+        "threshold": tree_.threshold,
+        "left": tree_.children_left,
+        "right": tree_.children_right,
+        "value": tree_.value[:, 0, 0],
+        "default_left": np.zeros(tree_.node_count, dtype=bool),
+    }
+
+
+def _export_sklearn_trees(estimators, n_features, aggregation):
+    arrays = _pack_trees([_sklearn_tree(estimator.tree_) for estimator in estimators])
+    arrays.update({
+        "kind": np.asarray("trees"),
+        # sklearn sends x <= threshold left after casting X to float32
+        "comparison": np.asarray("le"),
+        "aggregation": np.asarray(aggregation),
+        "base_score": np.asarray(0.0),
+        "n_features": np.asarray(n_features, dtype=np.int32),
+    })
+    return arrays
+
+
+def _parse_base_score(value):
+    return float(str(value).strip("[]").split(",")[0])
+
+
+def _export_xgboost(model):
+    booster = model.get_booster()
+    learner = json.loads(booster.save_raw("json"))["learner"]
+    objective = learner["objective"]["name"]
+    if objective not in IDENTITY_LINK_OBJECTIVES:
+        raise ValueError(f"XGBoost objective {objective} is not supported for native export")
+    if learner["gradient_booster"]["name"] != "gbtree":
+        raise ValueError(f"XGBoost booster {learner['gradient_booster']['name']} is not supported for native export")
+
+    trees = []
+    for tree in learner["gradient_booster"]["model"]["trees"]:
+        if tree.get("categories_nodes"):
+            raise ValueError("XGBoost categorical splits are not supported for native export")
+        # Leaves store their value in split_conditions; both are float32 in XGBoost
+        conditions = np.asarray(tree["split_conditions"], dtype=np.float32).astype(np.float64)
+        trees.append({
+            "feature": tree["split_indices"],
+            "threshold": conditions,
+            "left": tree["left_children"],
+            "right": tree["right_children"],
+            "value": conditions,
+            "default_left": np.asarray(tree["default_left"], dtype=bool),
+        })
+
+    arrays = _pack_trees(trees)
+    arrays.update({
+        "kind": np.asarray("trees"),
+        # XGBoost sends x < threshold left and missing values to default_left
+        "comparison": np.asarray("lt"),
+        "aggregation": np.asarray("sum"),
+        "base_score": np.asarray(np.float32(_parse_base_score(learner["learner_model_param"]["base_score"])), dtype=np.float64),
+        "n_features": np.asarray(int(learner["learner_model_param"]["num_feature"]), dtype=np.int32),
+    })
+    return arrays
+
+
+def export_model_arrays(model):
+    '''
+    Flattens a fitted LinearRegression, DecisionTreeRegressor,
+    RandomForestRegressor or XGBRegressor into a dict of NumPy arrays.
+    '''
+    if hasattr(model, "get_booster"):
+        arrays = _export_xgboost(model)
+    elif hasattr(model, "estimators_") and hasattr(model.estimators_[0], "tree_"):
+        arrays = _export_sklearn_trees(model.estimators_, model.n_features_in_, "mean")
+    elif hasattr(model, "tree_"):
+        arrays = _export_sklearn_trees([model], model.n_features_in_, "sum")
+    elif hasattr(model, "coef_") and hasattr(model, "intercept_"):
+        arrays = _export_linear(model)
+    else:
+        raise ValueError(f"{type(model).__name__} is not supported for native export")
+    if getattr(model, "pair_id_", None) is not None:
+        arrays["pair_id"] = np.asarray(model.pair_id_)
+    return arrays
+
+
+def _float32_thresholds(threshold, comparison):
+    # Rounded toward the side that keeps every float32 feature on the same branch:
+    # down for "x <= t", up for "x < t"
+    rounded = threshold.astype(np.float32)
+    toward = -np.inf if comparison == "le" else np.inf
+    overshot = rounded > threshold if comparison == "le" else rounded < threshold
+    rounded[overshot] = np.nextafter(rounded[overshot], np.float32(toward))
+    return rounded
+
+
+def _bin_thresholds(arrays):
+    '''
+    Replaces each split threshold with its rank among the distinct
+    thresholds of its feature. A feature value binned against the same
+    edges (see NativeModel) goes left exactly when its bin <= that rank.
+    '''
+    feature, threshold = arrays["feature"], _float32_thresholds(arrays["threshold"], str(arrays["comparison"]))
+    internal = arrays["left"] >= 0
+    n_features = int(arrays["n_features"])
+    edges = [np.unique(threshold[internal & (feature == index)]) for index in range(n_features)]
+    offsets = np.cumsum([0] + [len(feature_edges) for feature_edges in edges])
+    widest = max(len(feature_edges) for feature_edges in edges)
+    # The largest code of the dtype is kept for missing values
+    code_dtype = next(dtype for dtype in (np.uint8, np.uint16, np.int32) if widest < np.iinfo(dtype).max)
+    ranks = np.zeros(len(threshold), dtype=code_dtype)
+    for index, feature_edges in enumerate(edges):
+        nodes = internal & (feature == index)
+        ranks[nodes] = np.searchsorted(feature_edges, threshold[nodes])
+    return {
+        "threshold": ranks,
+        "bin_edges": np.concatenate(edges).astype(np.float32) if edges else np.zeros(0, dtype=np.float32),
+        "bin_offsets": offsets.astype(np.int64),
+    }
+
+
+def reduce_precision(arrays, precision):
+    '''
+    Converts arrays from export_model_arrays to the given precision for
+    cache-friendlier inference. Tree splits stay exact because features are
+    compared in float32 anyway; the error comes from float32 leaf values
+    and linear coefficients. See precision_report for the measured deltas.
+    '''
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision {precision}, expected one of {PRECISIONS}")
+    if precision == "float64":
+        return arrays
+    arrays = dict(arrays, precision=np.asarray(precision))
+    if str(arrays["kind"]) == "linear":
+        if precision == "binned":
+            raise ValueError("Binned precision applies to tree models only; use float32 for linear models")
+        arrays["coef"] = arrays["coef"].astype(np.float32)
+        return arrays
+    arrays["value"] = arrays["value"].astype(np.float32)
+    if precision == "float32":
+        arrays["threshold"] = _float32_thresholds(arrays["threshold"], str(arrays["comparison"]))
+    else:
+        arrays.update(_bin_thresholds(arrays))
+    return _sibling_layout(arrays)
+
+
+def _sibling_layout(arrays):
+    '''
+    Renumbers the nodes of all trees level by level with every right child
+    stored right after its left sibling, and turns leaves into nodes that
+    point to themselves with a threshold nothing exceeds. Traversal is then
+    one step per level for every node, child = left + (x > threshold), with
+    no leaf checks, and each level's nodes are contiguous in memory.
+    '''
+    left, right, roots = arrays["left"], arrays["right"], arrays["roots"]
+    order, level = [roots], roots
+    while True:
+        internal = level[left[level] >= 0]
+        if not len(internal):
+            break
+        level = np.column_stack((left[internal], right[internal])).ravel()
+        order.append(level)
+    order = np.concatenate(order)
+    new_index = np.empty(len(left), dtype=np.int32)
+    new_index[order] = np.arange(len(order), dtype=np.int32)
+
+    arrays = dict(arrays)
+    leaf = left[order] < 0
+    arrays["left"] = np.where(leaf, np.arange(len(order), dtype=np.int32), new_index[np.maximum(left[order], 0)])
+    arrays["right"] = arrays["left"] + ~leaf
+    threshold = arrays["threshold"][order]
+    threshold[leaf] = np.inf if threshold.dtype.kind == "f" else np.iinfo(threshold.dtype).max
+    arrays["threshold"] = threshold
+    arrays["default_left"] = arrays["default_left"][order] | leaf
+    for key in ("feature", "value"):
+        arrays[key] = arrays[key][order]
+    arrays["roots"] = new_index[roots]
+    return arrays
+
+
+def remove_native_model(file_path):
+    '''
+    Deletes the native export of a previous model, so serving never pairs
+    it with a model.pkl it was not exported from.
+    '''
+    try:
+        os.remove(file_path)
+        logging.info(f"Removed stale native model {file_path}")
+    except FileNotFoundError:
+        pass
+
+
+class ModelExporter:
+    def __init__(self):
+        self.model_exporter_config = ModelExporterConfig()
+
+    def export(self, model):
+        '''
+        Writes the model as flat arrays that NativeModel can evaluate without
+        sklearn or xgboost.
+        '''
+        try:
+            arrays = reduce_precision(export_model_arrays(model), self.model_exporter_config.precision)
+            file_path = self.model_exporter_config.native_model_file_path
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            # Serving processes map this file, so it is replaced by rename, never rewritten in place
+            tmp_path = f"{file_path}.{os.getpid()}.tmp"
+            try:
+                with open(tmp_path, "wb") as file_obj:
+                    np.savez(file_obj, **arrays)
+                os.replace(tmp_path, file_path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            logging.info(f"Exported {type(model).__name__} to {file_path} in {self.model_exporter_config.precision}")
+            return file_path
+
+        except Exception as e:
+            raise CustomException(e, sys)
@@ -0,0 +1,258 @@
+import os
+import sys
+import copy
+import json
+import time
+import uuid
+import argparse
+from dataclasses import dataclass, asdict
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import LinearRegression
+from sklearn.metrics import r2_score
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+from sklearn.tree import DecisionTreeRegressor
+from xgboost import XGBRegressor
+
+from src.components.columnar_store import read_split
+from src.components.data_ingestion import user_id_buckets
+from src.components.model_exporter import ModelExporter, remove_native_model
+from src.pipeline.fast_encoder import write_compiled_preprocessor
+from src.exception import CustomException
+from src.logger import logging
+from src.utils import load_object, save_object
+
+TARGET_COLUMN = "credit_score"
+
+
+@dataclass
+class ModelRefreshConfig:
+    model_path: str = os.path.join("artifacts", "model.pkl")
+    preprocessor_path: str = os.path.join("artifacts", "preprocessor.pkl")
+    native_model_file_path: str = os.path.join("artifacts", "model_native.npz")
+    # Holdout the refreshed model must not do worse on; the columnar test split, or test.csv without one
+    holdout_path: str = os.path.join("artifacts", "test_columns")
+    records_log_path: str = os.path.join("artifacts", "refresh_records.csv")
+    # Share of the new records (by user_id hash) added to the holdout instead of trained on
+    new_holdout_fraction: float = 0.2
+    additional_estimators: int = 50
+    # How much holdout R2 may drop before a refresh is rejected
+    max_r2_regression: float = 0.0
+
+
+@dataclass
+class RefreshReport:
+    published: bool
+    model_kind: str
+    records: int
+    rejected_records: int
+    trained_records: int
+    holdout_records: int
+    previous_r2: float
+    refreshed_r2: float
+    seconds: float
+
+
+def _scaled_blocks(preprocessor):
+    '''
+    Yields (pipeline, columns) for each transformer of the ColumnTransformer,
+    checking that every block ends in a StandardScaler.
+    '''
+    for name, pipeline, columns in preprocessor.transformers_:
+        if name == "remainder" or pipeline == "drop":
+            continue
+        if not isinstance(pipeline, Pipeline) or not isinstance(pipeline.steps[-1][1], StandardScaler):
+            raise ValueError(f"Transformer {name} does not end in a StandardScaler; retrain instead")
+        yield pipeline, columns
+
+
+def feature_scaling(preprocessor):
+    '''
+    Per output feature (offset, scale) of the final StandardScalers, so an
+    output is (input - offset) / scale.
+    '''
+    offsets, scales = [], []
+    for pipeline, _ in _scaled_blocks(preprocessor):
+        scaler = pipeline.steps[-1][1]
+        offsets.append(scaler.mean_ if scaler.with_mean else np.zeros_like(scaler.scale_))
+        scales.append(scaler.scale_ if scaler.with_std else np.ones_like(scaler.mean_))
+    return np.concatenate(offsets), np.concatenate(scales)
+
+
+def update_preprocessor_statistics(preprocessor, features):
+    '''
+    Returns a copy of preprocessor whose scalers have also seen features,
+    merged through StandardScaler.partial_fit. Imputation values and one-hot
+    categories stay fixed, so the output columns do not change.
+    '''
+    updated = copy.deepcopy(preprocessor)
+    for pipeline, columns in _scaled_blocks(updated):
+        pipeline.steps[-1][1].partial_fit(Pipeline(pipeline.steps[:-1]).transform(features[columns]))
+    return updated
+
+
+def known_category_mask(preprocessor, features):
+    '''
+    Rows whose categorical values the fitted one-hot encoders know. Other
+    rows would need new output columns, which only a full retrain can add.
+    '''
+    mask = np.ones(len(features), dtype=bool)
+    for pipeline, columns in _scaled_blocks(preprocessor):
+        for _, step in pipeline.steps:
+            if isinstance(step, OneHotEncoder):
+                for column, categories in zip(columns, step.categories_):
+                    values = features[column]
+                    mask &= (values.isin(categories) | values.isna()).to_numpy()
+    return mask
+
+
+def _rebase_thresholds(thresholds, features, slope, intercept, toward):
+    '''
+    Maps split thresholds onto the new feature scale. Thresholds can sit
+    exactly on a float32 feature value, and the rebased value may land one
+    ulp either side of that value's new encoding. Nudging a few float32
+    ulps toward the side equal values are sent to (up for "x <= t", down
+    for "x < t") keeps them on their original branch.
+    '''
+    rebased = (slope[features] * thresholds + intercept[features]).astype(np.float32)
+    for _ in range(4):
+        rebased = np.nextafter(rebased, np.float32(toward))
+    return rebased.astype(np.float64)
+
+
+def rebase_model(model, slope, intercept):
+    '''
+    Rewrites a fitted model for features transformed as slope * x + intercept,
+    so it predicts on the rescaled features exactly as it did on the old
+    ones. Tree split thresholds and linear coefficients are adjusted; the
+    model is modified in place and returned.
+    '''
+    if isinstance(model, RandomForestRegressor):
+        for estimator in model.estimators_:
+            rebase_model(estimator, slope, intercept)
+    elif isinstance(model, DecisionTreeRegressor):
+        tree = model.tree_
+        internal = tree.children_left != -1
+        features = tree.feature[internal]
+        tree.threshold[internal] = _rebase_thresholds(tree.threshold[internal], features, slope, intercept, np.inf)
+    elif isinstance(model, XGBRegressor):
+        booster_json = json.loads(model.get_booster().save_raw("json"))
+        for tree in booster_json["learner"]["gradient_booster"]["model"]["trees"]:
+            features = np.array(tree["split_indices"])
+            internal = np.array(tree["left_children"]) != -1
+            conditions = np.array(tree["split_conditions"], dtype=np.float64)
+            conditions[internal] = _rebase_thresholds(conditions[internal], features[internal], slope, intercept,
+                                                      -np.inf)
+            tree["split_conditions"] = conditions.tolist()
+        model.get_booster().load_model(bytearray(json.dumps(booster_json).encode()))
+    elif isinstance(model, LinearRegression):
+        model.coef_ = model.coef_ / slope
+        model.intercept_ = model.intercept_ - float(np.dot(model.coef_, intercept))
+    else:
+        raise ValueError(f"Cannot rebase a {type(model).__name__}")
+    return model
+
+
+def continue_training(model, X, y, additional_estimators):
+    '''
+    Grows a copy of model on new rows: more boosting rounds for XGBoost,
+    more trees for a random forest. Existing trees are kept as they are.
+    '''
+    refreshed = copy.deepcopy(model)
+    if isinstance(model, XGBRegressor):
+        refreshed.set_params(n_estimators=additional_estimators)
+        refreshed.fit(X, y, xgb_model=model.get_booster())
+    elif isinstance(model, RandomForestRegressor):
+        refreshed.set_params(warm_start=True, n_estimators=len(model.estimators_) + additional_estimators)
+        refreshed.fit(X, y)
+        refreshed.set_params(warm_start=False)
+    else:
+        raise ValueError(f"Incremental refresh supports XGBRegressor and RandomForestRegressor, "
+                         f"not {type(model).__name__}; run a full retrain")
+    return refreshed
+
+
+class ModelRefresher:
+    '''
+    Folds newly arrived records into the current model without a full
+    retrain: scaler statistics are updated, the model is rebased onto them
+    and grown on the new rows, and the result is published only if holdout
+    R2 does not regress.
+    '''
+    def __init__(self):
+        self.model_refresh_config = ModelRefreshConfig()
+
+    def _holdout(self, new_holdout):
+        config = self.model_refresh_config
+        holdout_path = config.holdout_path
+        csv_path = os.path.join(os.path.dirname(holdout_path), "test.csv")
+        # Splits ingested with SPLIT_FORMAT=csv have only test.csv
+        if not os.path.exists(holdout_path) and os.path.exists(csv_path):
+            holdout_path = csv_path
+        return pd.concat([read_split(holdout_path), new_holdout], ignore_index=True)
+
+    def refresh(self, new_records):
+        try:
+            started = time.time()
+            config = self.model_refresh_config
+            model = load_object(config.model_path)
+            preprocessor = load_object(config.preprocessor_path)
+
+            known = known_category_mask(preprocessor, new_records)
+            records = new_records[known]
+            in_holdout = user_id_buckets(records["user_id"]) < int(config.new_holdout_fraction * 2**32)
+            train_records = records[~in_holdout]
+            holdout = self._holdout(records[in_holdout])
+            features_in = list(preprocessor.feature_names_in_)
+
+            refreshed_preprocessor = update_preprocessor_statistics(preprocessor, train_records[features_in])
+            old_offset, old_scale = feature_scaling(preprocessor)
+            new_offset, new_scale = feature_scaling(refreshed_preprocessor)
+            # new = (old * old_scale + old_offset - new_offset) / new_scale
+            rebased = rebase_model(copy.deepcopy(model), old_scale / new_scale, (old_offset - new_offset) / new_scale)
+            refreshed = continue_training(rebased, refreshed_preprocessor.transform(train_records[features_in]),
+                                          train_records[TARGET_COLUMN].to_numpy(dtype=np.float64),
+                                          config.additional_estimators)
+
+            y_holdout = holdout[TARGET_COLUMN].to_numpy(dtype=np.float64)
+            previous_r2 = r2_score(y_holdout, model.predict(preprocessor.transform(holdout[features_in])))
+            refreshed_r2 = r2_score(y_holdout, refreshed.predict(refreshed_preprocessor.transform(holdout[features_in])))
+            published = refreshed_r2 >= previous_r2 - config.max_r2_regression
+
+            if published:
+                # The serving registry only swaps in a model and preprocessor carrying the same pair id,
+                # so polls between the writes below keep serving the previous pair
+                refreshed.pair_id_ = refreshed_preprocessor.pair_id_ = uuid.uuid4().hex
+                save_object(config.preprocessor_path, refreshed_preprocessor)
+                write_compiled_preprocessor(refreshed_preprocessor, config.preprocessor_path)
+                save_object(config.model_path, refreshed)
+                exporter = ModelExporter()
+                exporter.model_exporter_config.native_model_file_path = config.native_model_file_path
+                try:
+                    exporter.export(refreshed)
+                except CustomException as e:
+                    logging.warning(f"Native export skipped, serving will use model.pkl: {e}")
+                    remove_native_model(exporter.model_exporter_config.native_model_file_path)
+                records.to_csv(config.records_log_path, mode="a", index=False,
+                               header=not os.path.exists(config.records_log_path))
+
+            report = RefreshReport(
+                published=bool(published), model_kind=type(model).__name__, records=len(new_records),
+                rejected_records=int((~known).sum()), trained_records=len(train_records),
+                holdout_records=len(holdout), previous_r2=float(previous_r2), refreshed_r2=float(refreshed_r2),
+                seconds=round(time.time() - started, 3))
+            logging.info(f"Model refresh {'published' if published else 'rejected'}: {asdict(report)}")
+            return report
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fold new records into the current model")
+    parser.add_argument("records", help="CSV or columnar store of new records, including credit_score")
+    args = parser.parse_args()
+    print(json.dumps(asdict(ModelRefresher().refresh(read_split(args.records))), indent=2))
@@ -0,0 +1,203 @@
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.metrics import r2_score
+from sklearn.model_selection import KFold, ParameterGrid
+
+from src.components.fold_cache import FoldCache, FoldCacheConfig
+from src.exception import CustomException
+from src.logger import logging
+
+
+@dataclass
+class ModelSearchConfig:
+    # "grid" scores every candidate on every fold; "halving" uses successive halving
+    strategy: str = "grid"
+    cv: int = 3
+    n_jobs: int = -1
+    halving_factor: int = 3
+    random_state: int = 42
+    fold_cache_dir: str = os.path.join("artifacts", "fold_cache")
+
+
+@dataclass
+class ModelSearchResult:
+    name: str
+    estimator: object
+    best_params: dict
+    cv_score: float
+    test_score: float
+    train_score: float
+    candidates: int
+    wall_seconds: float
+    fit_seconds: float = 0.0
+    cv_results: list = field(default_factory=list)
+    # Fitted on the full training split when search_models was given one
+    preprocessor: object = None
+
+
+def _single_threaded(estimator):
+    # The pool already uses every core; nested threading would oversubscribe it
+    if "n_jobs" in estimator.get_params():
+        estimator.set_params(n_jobs=1)
+    return estimator
+
+
+def _fit_and_score(name, estimator, params, fold):
+    started = time.time()
+    X_train, y_train, X_valid, y_valid = fold.load()
+    model = _single_threaded(clone(estimator)).set_params(**params)
+    model.fit(X_train, y_train)
+    score = r2_score(y_valid, model.predict(X_valid))
+    return name, params, score, started, time.time()
+
+
+def _refit(name, estimator, params, full):
+    started = time.time()
+    X, y, _, _ = full.load()
+    model = _single_threaded(clone(estimator)).set_params(**params)
+    model.fit(X, y)
+    if "n_jobs" in model.get_params():
+        # Serve with the threading the estimator was configured with
+        model.set_params(n_jobs=estimator.get_params()["n_jobs"])
+    return name, model, started, time.time()
+
+
+def _grid_search(models, param_grids, folds, full, config):
+    '''
+    Flattens every (model, candidate, fold) fit into one process pool so all
+    model families search concurrently, then refits each winner once. Tasks
+    carry fold paths, not arrays; workers memory-map the cached folds.
+    '''
+    candidates = {name: list(ParameterGrid(param_grids.get(name, {}))) for name in models}
+
+    tasks = [
+        delayed(_fit_and_score)(name, models[name], params, fold)
+        for name in models if len(candidates[name]) > 1
+        for params in candidates[name]
+        for fold in folds
+    ]
+    scores = {}
+    spans = {name: [] for name in models}
+    for name, params, score, started, finished in Parallel(n_jobs=config.n_jobs)(tasks):
+        scores.setdefault((name, tuple(sorted(params.items()))), []).append(score)
+        spans[name].append((started, finished))
+
+    best = {}
+    cv_results = {name: [] for name in models}
+    for name in models:
+        if len(candidates[name]) == 1:
+            # Nothing to choose between, so cross-validation would only cost time
+            best[name] = (candidates[name][0], float("nan"))
+            continue
+        ranked = []
+        for params in candidates[name]:
+            mean_score = float(np.mean(scores[(name, tuple(sorted(params.items())))]))
+            ranked.append((mean_score, params))
+            cv_results[name].append({"params": params, "mean_test_score": mean_score})
+        mean_score, params = max(ranked, key=lambda item: item[0])
+        best[name] = (params, mean_score)
+
+    refits = Parallel(n_jobs=config.n_jobs)(
+        delayed(_refit)(name, models[name], best[name][0], full) for name in models
+    )
+    fitted = {}
+    for name, model, started, finished in refits:
+        fitted[name] = (model, finished - started)
+        spans[name].append((started, finished))
+
+    return {
+        name: (fitted[name][0], best[name][0], best[name][1], len(candidates[name]),
+               max(end for _, end in spans[name]) - min(start for start, _ in spans[name]),
+               fitted[name][1], cv_results[name])
+        for name in models
+    }
+
+
+def _halving_search(models, param_grids, full, config):
+    '''
+    Successive halving per model: every candidate starts on a small sample and
+    only the best 1/halving_factor advance to the next, larger budget.
+    '''
+    from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+    from sklearn.model_selection import HalvingGridSearchCV
+
+    X_train, y_train, _, _ = full.load()
+    searched = {}
+    for name, model in models.items():
+        started = time.time()
+        grid = param_grids.get(name, {})
+        n_candidates = len(ParameterGrid(grid))
+        if n_candidates == 1:
+            estimator = clone(model).fit(X_train, y_train)
+            searched[name] = (estimator, list(ParameterGrid(grid))[0], float("nan"), 1,
+                              time.time() - started, time.time() - started, [])
+            continue
+        search = HalvingGridSearchCV(
+            _single_threaded(clone(model)), grid, cv=config.cv, factor=config.halving_factor,
+            n_jobs=config.n_jobs, random_state=config.random_state, refit=True,
+        )
+        search.fit(X_train, y_train)
+        cv_results = [
+            {"params": params, "mean_test_score": float(score), "n_resources": int(resources)}
+            for params, score, resources in zip(search.cv_results_["params"],
+                                                search.cv_results_["mean_test_score"],
+                                                search.cv_results_["n_resources"])
+        ]
+        searched[name] = (search.best_estimator_, search.best_params_, float(search.best_score_),
+                          n_candidates, time.time() - started, float(search.refit_time_), cv_results)
+    return searched
+
+
+def search_models(models, param_grids, X_train, y_train, X_test, y_test, config=None, preprocessor=None):
+    '''
+    Tunes every model on the training split and scores the refitted best
+    estimator on the test split. Returns a dict of ModelSearchResult by name.
+    With a preprocessor, X_train and X_test are raw frames and the
+    preprocessor is fitted per fold through the fold cache.
+    '''
+    try:
+        config = config or ModelSearchConfig()
+        if config.strategy not in ("grid", "halving"):
+            raise ValueError(f"Unknown search strategy {config.strategy}")
+
+        folds, full, fitted_preprocessor = FoldCache(FoldCacheConfig(config.fold_cache_dir)).prepare(
+            X_train, y_train, list(KFold(n_splits=config.cv).split(X_train)), preprocessor)
+        if config.strategy == "grid":
+            searched = _grid_search(models, param_grids, folds, full, config)
+        else:
+            # Halving resamples its own folds, so it searches the full-split features
+            searched = _halving_search(models, param_grids, full, config)
+
+        X_train, y_train, _, _ = full.load()
+        if fitted_preprocessor is not None:
+            X_test = fitted_preprocessor.transform(X_test)
+
+        results = {}
+        for name, (estimator, params, cv_score, candidates, wall_seconds, fit_seconds, cv_results) in searched.items():
+            results[name] = ModelSearchResult(
+                name=name,
+                estimator=estimator,
+                best_params=params,
+                cv_score=cv_score,
+                test_score=r2_score(y_test, estimator.predict(X_test)),
+                train_score=r2_score(y_train, estimator.predict(X_train)),
+                candidates=candidates,
+                wall_seconds=wall_seconds,
+                fit_seconds=fit_seconds,
+                cv_results=cv_results,
+                preprocessor=fitted_preprocessor,
+            )
+            logging.info(
+                f"{name}: test R2 {results[name].test_score:.4f}, best params {params}, "
+                f"{candidates} candidates in {wall_seconds:.1f}s wall clock"
+            )
+        return results
+
+    except Exception as e:
+        raise CustomException(e, sys)
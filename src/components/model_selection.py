@@ -0,0 +1,138 @@
+import sys
+import time
+import pickle
+from dataclasses import dataclass, asdict
+
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import r2_score
+from sklearn.tree import DecisionTreeRegressor
+from xgboost import XGBRegressor
+
+from src.exception import CustomException
+from src.logger import logging
+
+
+@dataclass
+class ModelSelectionConfig:
+    # Candidates within r2_tolerance of the best test R2 count as equally accurate; the fastest of them wins.
+    # The default 0 picks purely by R2; a positive tolerance opts in to trading accuracy for latency
+    r2_tolerance: float = 0.0
+    # Hard budgets; None leaves that dimension unconstrained
+    max_row_latency_ms: float = None
+    max_batch_latency_ms: float = None
+    max_artifact_mb: float = None
+    batch_size: int = 1000
+    row_repeats: int = 50
+    batch_repeats: int = 5
+    # Replace a winning ensemble with a single tree fitted to its predictions when that costs little R2
+    distill: bool = False
+    distill_max_depth: int = 12
+    distill_max_r2_loss: float = 0.01
+
+
+def measure_inference(estimator, X, batch_size=1000, row_repeats=50, batch_repeats=5):
+    '''
+    Median latency of predicting one row and one batch of batch_size rows,
+    in milliseconds, and the pickled size of the estimator in bytes.
+    '''
+    X = np.asarray(X)
+    batch = X[:batch_size]
+    estimator.predict(X[:1])
+    row_times = []
+    for index in range(min(row_repeats, len(X))):
+        started = time.perf_counter()
+        estimator.predict(X[index:index + 1])
+        row_times.append(time.perf_counter() - started)
+    batch_times = []
+    for _ in range(batch_repeats):
+        started = time.perf_counter()
+        estimator.predict(batch)
+        batch_times.append(time.perf_counter() - started)
+    return {
+        "row_latency_ms": round(float(np.median(row_times)) * 1000, 4),
+        "batch_latency_ms": round(float(np.median(batch_times)) * 1000, 4),
+        "batch_size": len(batch),
+        "artifact_bytes": len(pickle.dumps(estimator, protocol=5)),
+    }
+
+
+def _over_budget(measurement, config):
+    reasons = []
+    if config.max_row_latency_ms is not None and measurement["row_latency_ms"] > config.max_row_latency_ms:
+        reasons.append(f"row latency {measurement['row_latency_ms']} ms > {config.max_row_latency_ms} ms")
+    if config.max_batch_latency_ms is not None and measurement["batch_latency_ms"] > config.max_batch_latency_ms:
+        reasons.append(f"batch latency {measurement['batch_latency_ms']} ms > {config.max_batch_latency_ms} ms")
+    if config.max_artifact_mb is not None and measurement["artifact_bytes"] > config.max_artifact_mb * 2**20:
+        reasons.append(f"artifact {measurement['artifact_bytes'] / 2**20:.1f} MB > {config.max_artifact_mb} MB")
+    return reasons
+
+
+def distill_model(teacher, X_train, max_depth, random_state=42):
+    '''
+    Fits a single decision tree to the teacher's predictions on the
+    training rows, so it learns the ensemble's function rather than the
+    noisy targets.
+    '''
+    student = DecisionTreeRegressor(max_depth=max_depth, min_samples_leaf=5, random_state=random_state)
+    return student.fit(X_train, teacher.predict(X_train))
+
+
+def select_model(model_report, estimators, X_test, y_test, X_train=None, config=None):
+    '''
+    Measures every candidate's inference latency and size, drops those over
+    a budget and, among the rest, picks the fastest whose test R2 is within
+    r2_tolerance of the best. With distill, a winning ensemble is swapped
+    for its distilled tree when that stays within distill_max_r2_loss.
+    Returns (name, estimator, test R2, report).
+    '''
+    try:
+        config = config or ModelSelectionConfig()
+        candidates = {}
+        for name, estimator in estimators.items():
+            measurement = measure_inference(estimator, X_test, config.batch_size, config.row_repeats,
+                                            config.batch_repeats)
+            candidates[name] = {"r2": float(model_report[name]), **measurement,
+                                "over_budget": _over_budget(measurement, config)}
+            logging.info(f"{name}: test R2 {candidates[name]['r2']:.4f}, "
+                         f"{measurement['row_latency_ms']:.3f} ms/row, "
+                         f"{measurement['batch_latency_ms']:.2f} ms per {measurement['batch_size']} rows, "
+                         f"{measurement['artifact_bytes'] / 2**20:.2f} MB")
+
+        eligible = [name for name, candidate in candidates.items() if not candidate["over_budget"]]
+        if not eligible:
+            raise ValueError(f"No model meets the inference budget: "
+                             f"{ {name: candidate['over_budget'] for name, candidate in candidates.items()} }")
+        best_r2 = max(candidates[name]["r2"] for name in eligible)
+        close = [name for name in eligible if candidates[name]["r2"] >= best_r2 - config.r2_tolerance]
+        selected = min(close, key=lambda name: (candidates[name]["row_latency_ms"], -candidates[name]["r2"]))
+        model, r2 = estimators[selected], candidates[selected]["r2"]
+
+        distilled = None
+        if config.distill and X_train is not None and isinstance(model, (RandomForestRegressor, XGBRegressor)):
+            student = distill_model(model, X_train, config.distill_max_depth)
+            measurement = measure_inference(student, X_test, config.batch_size, config.row_repeats,
+                                            config.batch_repeats)
+            student_r2 = float(r2_score(y_test, student.predict(X_test)))
+            accepted = (student_r2 >= r2 - config.distill_max_r2_loss
+                        and measurement["row_latency_ms"] <= candidates[selected]["row_latency_ms"]
+                        and not _over_budget(measurement, config))
+            distilled = {"teacher": selected, "r2": student_r2, **measurement, "accepted": accepted}
+            logging.info(f"Distilled {selected} into a depth-{config.distill_max_depth} tree: "
+                         f"test R2 {student_r2:.4f}, {measurement['row_latency_ms']:.3f} ms/row, "
+                         f"{'accepted' if accepted else 'rejected'}")
+            if accepted:
+                model, r2 = student, student_r2
+
+        report = {
+            "selected": selected if distilled is None or not distilled["accepted"] else f"{selected} (distilled)",
+            "r2": r2,
+            "config": asdict(config),
+            "candidates": candidates,
+            "distilled": distilled,
+        }
+        logging.info(f"Selected {report['selected']} with test R2 {r2:.4f}")
+        return report["selected"], model, r2, report
+
+    except Exception as e:
+        raise CustomException(e, sys)
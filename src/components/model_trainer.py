@@ -1,6 +1,7 @@
 import os
 import sys
-from dataclasses import dataclass
+import json
+from dataclasses import dataclass, field, replace
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.linear_model import LinearRegression
 from sklearn.metrics import r2_score
@@ -8,78 +9,125 @@ from sklearn.tree import DecisionTreeRegressor
 from xgboost import XGBRegressor
 from src.exception import CustomException
 from src.logger import logging
-from src.utils import save_object,evaluate_models
+from src.utils import save_object
+from src.components.model_exporter import ModelExporter, remove_native_model
+from src.components.model_search import ModelSearchConfig, search_models
+from src.components.model_selection import ModelSelectionConfig, select_model
 
 @dataclass
 class ModelTrainerConfig:
     trained_model_file_path=os.path.join("artifacts","model.pkl")
+    native_model_file_path: str = os.path.join("artifacts", "model_native.npz")
+    # Latencies, sizes and the choice made, written next to model.pkl
+    selection_report_file_path: str = os.path.join("artifacts", "model_selection.json")
+    selection_config: ModelSelectionConfig = field(default_factory=ModelSelectionConfig)
+    search_config: ModelSearchConfig = field(default_factory=lambda: ModelSearchConfig(
+        strategy=os.environ.get("MODEL_SEARCH_STRATEGY", "grid"),
+        n_jobs=int(os.environ.get("MODEL_SEARCH_N_JOBS", -1))))
+    # Define the parameter grids
+    param_grids: dict = field(default_factory=lambda: {
+        'Linear Regression': {},
+        'Decision Tree': {
+            'max_depth': [None, 10, 20, 30]
+            },
+        'Random Forest': {
+            'n_estimators': [50, 100, 200],
+            'max_depth': [None, 10, 20]
+            },
+        'XGBoost': {
+            'n_estimators': [50, 100, 200],
+            'learning_rate': [0.01, 0.1, 0.2]
+            }
+    })
 
 class ModelTrainer:
     def __init__(self):
         self.model_trainer_config=ModelTrainerConfig()
 
 
-    def initiate_model_trainer(self,train_array,test_array):
-        try:
-            logging.info("Split training and test input data")
-            X_train,y_train,X_test,y_test=(
-                train_array[:,:-1],
-                train_array[:,-1],
-                test_array[:,:-1],
-                test_array[:,-1]
-            )
-            models = {
-                'Linear Regression': LinearRegression(),
-                'Decision Tree': DecisionTreeRegressor(random_state=42),
-                'Random Forest': RandomForestRegressor(random_state=42),
-                'XGBoost': XGBRegressor(random_state=42)
-                }
-
-            # Define the parameter grids
-            param_grids = {
-                'Linear Regression': {},
-                'Decision Tree': {
-                    'max_depth': [None, 10, 20, 30]
-                    },
-                'Random Forest': {
-                    'n_estimators': [50, 100, 200],
-                    'max_depth': [None, 10, 20]
-                    },
-                'XGBoost': {
-                    'n_estimators': [50, 100, 200],
-                    'learning_rate': [0.01, 0.1, 0.2]
-                    }
+    def get_models(self):
+        return {
+            'Linear Regression': LinearRegression(),
+            'Decision Tree': DecisionTreeRegressor(random_state=42),
+            'Random Forest': RandomForestRegressor(random_state=42),
+            'XGBoost': XGBRegressor(random_state=42)
             }
-            model_report:dict=evaluate_models(X_train=X_train,y_train=y_train,X_test=X_test,y_test=y_test,
-                                             models=models,param=param_grids)
-            
-            ## To get best model score from dict
-            best_model_score = max(sorted(model_report.values()))
 
-            ## To get best model name from dict
+    def search_model(self,name,X_train,y_train,X_test,y_test,n_jobs=None):
+        '''
+        Searches a single model family. The training DAG runs each family as
+        its own node through this.
+        '''
+        try:
+            search_config=self.model_trainer_config.search_config
+            if n_jobs is not None:
+                search_config=replace(search_config,n_jobs=n_jobs)
+            return search_models(models={name: self.get_models()[name]},
+                                 param_grids={name: self.model_trainer_config.param_grids.get(name, {})},
+                                 X_train=X_train,y_train=y_train,X_test=X_test,y_test=y_test,
+                                 config=search_config)[name]
 
-            best_model_name = list(model_report.keys())[
-                list(model_report.values()).index(best_model_score)
-            ]
-            best_model = models[best_model_name]
+        except Exception as e:
+            raise CustomException(e,sys)
+
+    def save_best_model(self,model_report,estimators,X_test,y_test,X_train=None,pair_id=None):
+        '''
+        Picks the model to serve by test R2 weighed against inference latency
+        and size (see model_selection), saves and exports it, writes the
+        selection report and returns its R2. X_train is only needed to
+        distill an ensemble. pair_id is the pair_id_ of the preprocessor the
+        model was fitted on; the model is stamped with it.
+        '''
+        try:
+            # The refitted estimators from the search; no second fit needed
+            best_model_name, best_model, best_model_score, selection_report = select_model(
+                model_report, estimators, X_test, y_test, X_train, self.model_trainer_config.selection_config)
 
             if best_model_score<0.6:
                 raise CustomException("No best model found")
-            logging.info(f"Best found model on both training and testing dataset")
+            logging.info(f"Best found model on both training and testing dataset: {best_model_name}")
 
+            if pair_id is not None:
+                best_model.pair_id_ = pair_id
             save_object(
                 file_path=self.model_trainer_config.trained_model_file_path,
                 obj=best_model
             )
+            report_path = self.model_trainer_config.selection_report_file_path
+            with open(report_path + ".tmp", "w") as file_obj:
+                json.dump(selection_report, file_obj, indent=2)
+            os.replace(report_path + ".tmp", report_path)
+
+            exporter = ModelExporter()
+            exporter.model_exporter_config.native_model_file_path = self.model_trainer_config.native_model_file_path
+            try:
+                exporter.export(best_model)
+            except CustomException as e:
+                logging.warning(f"Native export skipped, serving will use model.pkl: {e}")
+                remove_native_model(exporter.model_exporter_config.native_model_file_path)
 
             predicted=best_model.predict(X_test)
 
             r2_square = r2_score(y_test, predicted)
             return r2_square
-            
-
 
+        except Exception as e:
+            raise CustomException(e,sys)
 
+    def initiate_model_trainer(self,X_train,y_train,X_test,y_test,pair_id=None):
+        try:
+            models = self.get_models()
+            param_grids = self.model_trainer_config.param_grids
+            search_results=search_models(models=models,param_grids=param_grids,X_train=X_train,y_train=y_train,
+                                         X_test=X_test,y_test=y_test,config=self.model_trainer_config.search_config)
+            model_report:dict={name: result.test_score for name, result in search_results.items()}
+            for result in search_results.values():
+                logging.info(f"{result.name}: {result.candidates} candidates searched in {result.wall_seconds:.1f}s, "
+                             f"refit {result.fit_seconds:.1f}s, test R2 {result.test_score:.4f}")
             
+            return self.save_best_model(model_report,
+                                        {name: result.estimator for name, result in search_results.items()},
+                                        X_test, y_test, X_train, pair_id)
+
         except Exception as e:
-            raise CustomException(e,sys)
\ No newline at end of file
+            raise CustomException(e,sys)
\ No newline at end of file
@@ -0,0 +1,144 @@
+import os
+import sys
+import json
+import time
+import argparse
+from dataclasses import dataclass
+
+import numpy as np
+from sklearn.metrics import r2_score
+
+from src.exception import CustomException
+from src.logger import logging
+from src.utils import load_object
+from src.components.columnar_store import read_split, split_path
+from src.components.model_exporter import export_model_arrays, reduce_precision
+from src.pipeline.native_model import NativeModel
+from src.pipeline.predict_pipeline import MIN_CREDIT_SCORE, MAX_CREDIT_SCORE, get_credit_ratings
+
+TARGET_COLUMN = "credit_score"
+
+
+@dataclass
+class PrecisionReportConfig:
+    model_path: str = os.path.join("artifacts", "model.pkl")
+    preprocessor_path: str = os.path.join("artifacts", "preprocessor.pkl")
+    # Columnar split directory or CSV; a missing test_columns falls back to test.csv
+    test_path: str = os.path.join("artifacts", "test_columns")
+    report_file_path: str = os.path.join("artifacts", "precision_report.json")
+    precisions: tuple = ("float64", "float32", "binned")
+    # A precision is safe to enable when no raw prediction moves further than this
+    # and no served credit score or rating changes
+    max_abs_delta: float = 0.5
+    max_changed_scores: int = 0
+    timing_repeats: int = 3
+    single_row_samples: int = 200
+
+
+def _best_seconds(predict, X, repeats):
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        predict(X)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def _row_latency_us(predict, X, samples):
+    timings = []
+    for index in range(min(samples, len(X))):
+        started = time.perf_counter()
+        predict(X[index:index + 1])
+        timings.append(time.perf_counter() - started)
+    return round(float(np.median(timings)) * 1e6, 1)
+
+
+def precision_report(model, X_test, y_test, config=None):
+    '''
+    Compares every native precision with the full-precision model.predict
+    on the same rows: prediction deltas, served scores and ratings that
+    change, test R2, and batch throughput and single-row latency.
+    '''
+    config = config or PrecisionReportConfig()
+    X_test = np.asarray(X_test, dtype=np.float64)
+    reference = np.asarray(model.predict(X_test), dtype=np.float64)
+    reference_scores = np.floor(np.clip(reference, MIN_CREDIT_SCORE, MAX_CREDIT_SCORE))
+    reference_ratings = get_credit_ratings(np.clip(reference, MIN_CREDIT_SCORE, MAX_CREDIT_SCORE))
+    reference_seconds = _best_seconds(model.predict, X_test, config.timing_repeats)
+    report = {
+        "model": type(model).__name__,
+        "rows": len(X_test),
+        "reference": {
+            "r2": float(r2_score(y_test, reference)),
+            "rows_per_second": round(len(X_test) / reference_seconds, 1),
+            "row_latency_us": _row_latency_us(model.predict, X_test, config.single_row_samples),
+        },
+        "precisions": {},
+    }
+
+    arrays = export_model_arrays(model)
+    for precision in config.precisions:
+        try:
+            native = NativeModel(reduce_precision(arrays, precision))
+        except ValueError as e:
+            report["precisions"][precision] = {"supported": False, "reason": str(e)}
+            continue
+        predictions = native.predict(X_test)
+        delta = np.abs(predictions - reference)
+        max_delta = float(delta.max(initial=0.0))
+        clamped = np.clip(predictions, MIN_CREDIT_SCORE, MAX_CREDIT_SCORE)
+        changed_scores = int(np.count_nonzero(np.floor(clamped) != reference_scores))
+        seconds = _best_seconds(native.predict, X_test, config.timing_repeats)
+        report["precisions"][precision] = {
+            "supported": True,
+            "max_abs_delta": max_delta,
+            "mean_abs_delta": float(delta.mean()) if len(delta) else 0.0,
+            "changed_scores": changed_scores,
+            "changed_ratings": int(np.count_nonzero(get_credit_ratings(clamped) != reference_ratings)),
+            "r2": float(r2_score(y_test, predictions)),
+            "rows_per_second": round(len(X_test) / seconds, 1),
+            "row_latency_us": _row_latency_us(native.predict, X_test, config.single_row_samples),
+            "safe": max_delta <= config.max_abs_delta and changed_scores <= config.max_changed_scores,
+        }
+    return report
+
+
+def build_precision_report(config=None):
+    '''
+    Runs precision_report for the trained artifacts on the test split and
+    writes it next to model.pkl.
+    '''
+    try:
+        config = config or PrecisionReportConfig()
+        model = load_object(config.model_path)
+        preprocessor = load_object(config.preprocessor_path)
+        test = read_split(split_path(config.test_path))
+        X_test = preprocessor.transform(test.drop(columns=[TARGET_COLUMN]))
+        report = precision_report(model, X_test, test[TARGET_COLUMN].to_numpy(dtype=np.float64), config)
+
+        os.makedirs(os.path.dirname(config.report_file_path) or ".", exist_ok=True)
+        with open(config.report_file_path + ".tmp", "w") as file_obj:
+            json.dump(report, file_obj, indent=2)
+        os.replace(config.report_file_path + ".tmp", config.report_file_path)
+        for precision, entry in report["precisions"].items():
+            if entry["supported"]:
+                logging.info(f"{precision}: max |delta| {entry['max_abs_delta']:.2e}, "
+                             f"{entry['changed_scores']} scores changed, {entry['rows_per_second']:.0f} rows/s, "
+                             f"{'safe' if entry['safe'] else 'NOT safe'} to enable")
+        return report
+
+    except Exception as e:
+        raise CustomException(e, sys)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare reduced-precision native inference with model.predict")
+    parser.add_argument("--model-path", default=PrecisionReportConfig.model_path)
+    parser.add_argument("--preprocessor-path", default=PrecisionReportConfig.preprocessor_path)
+    parser.add_argument("--test-path", default=PrecisionReportConfig.test_path)
+    parser.add_argument("--report-path", default=PrecisionReportConfig.report_file_path)
+    args = parser.parse_args()
+
+    print(json.dumps(build_precision_report(PrecisionReportConfig(
+        model_path=args.model_path, preprocessor_path=args.preprocessor_path,
+        test_path=args.test_path, report_file_path=args.report_path)), indent=2))
@@ -0,0 +1,107 @@
+import os
+import sys
+import re
+import json
+import hashlib
+from dataclasses import dataclass, field
+
+from src.exception import CustomException
+from src.logger import logging
+
+
+@dataclass
+class StageCacheConfig:
+    manifest_dir: str = os.path.join("artifacts", "stages")
+    enabled: bool = field(default_factory=lambda: os.environ.get("STAGE_CACHE", "1") == "1")
+
+
+def fingerprint(*parts):
+    '''
+    Hashes JSON-able parts (configs, column lists, param grids, upstream
+    fingerprints) into a stable hex key. Objects JSON cannot encode are
+    hashed by their repr.
+    '''
+    encoded = json.dumps(parts, sort_keys=True, default=repr)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+def slugify(name):
+    '''
+    A filename-safe form of a stage or model name ("search:Random Forest"
+    becomes "search_random_forest").
+    '''
+    return re.sub(r"[^a-z0-9]+", "_", name.lower()).strip("_")
+
+
+def content_digest(path, chunk_size=1 << 20):
+    '''
+    sha256 of a file, or of every file under a directory in sorted order.
+    '''
+    digest = hashlib.sha256()
+    if os.path.isdir(path):
+        files = sorted(os.path.join(root, name) for root, _, names in os.walk(path) for name in names)
+    else:
+        files = [path]
+    for file_path in files:
+        digest.update(os.path.relpath(file_path, path).encode())
+        with open(file_path, "rb") as file_obj:
+            for chunk in iter(lambda: file_obj.read(chunk_size), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _output_signature(path):
+    # Size and mtime are enough to notice an output that was rewritten or removed since it was recorded
+    if os.path.isdir(path):
+        return sorted(
+            [os.path.relpath(os.path.join(root, name), path), os.stat(os.path.join(root, name)).st_size,
+             os.stat(os.path.join(root, name)).st_mtime_ns]
+            for root, _, names in os.walk(path) for name in names)
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+class StageCache:
+    '''
+    Remembers, per pipeline stage, the fingerprint of its inputs and the
+    outputs it wrote. A stage whose fingerprint is unchanged and whose
+    outputs are still on disk as written can be skipped.
+    '''
+    def __init__(self, config=None):
+        self.config = config or StageCacheConfig()
+
+    def _manifest_path(self, stage):
+        return os.path.join(self.config.manifest_dir, f"{slugify(stage)}.json")
+
+    def lookup(self, stage, key):
+        '''
+        Returns the result recorded for stage under key, or None on a miss.
+        '''
+        if not self.config.enabled or not os.path.exists(self._manifest_path(stage)):
+            return None
+        with open(self._manifest_path(stage)) as file_obj:
+            manifest = json.load(file_obj)
+        if manifest["fingerprint"] != key:
+            return None
+        for path, signature in manifest["outputs"].items():
+            if not os.path.exists(path) or _output_signature(path) != signature:
+                logging.info(f"Stage {stage}: output {path} changed since it was recorded")
+                return None
+        logging.info(f"Stage {stage}: inputs unchanged ({key[:12]}), reusing its outputs")
+        return manifest["result"]
+
+    def record(self, stage, key, outputs, result):
+        try:
+            os.makedirs(self.config.manifest_dir, exist_ok=True)
+            manifest = {
+                "fingerprint": key,
+                "outputs": {path: _output_signature(path) for path in outputs if os.path.exists(path)},
+                "result": result,
+            }
+            temporary_path = self._manifest_path(stage) + ".tmp"
+            with open(temporary_path, "w") as file_obj:
+                json.dump(manifest, file_obj, indent=2)
+            os.replace(temporary_path, self._manifest_path(stage))
+
+        except Exception as e:
+            raise CustomException(e, sys)
@@ -0,0 +1,132 @@
+import os
+import sys
+import shutil
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+import xgboost
+
+from src.components.data_transformation import DataTransformation
+from src.components.model_exporter import ModelExporter, remove_native_model
+from src.exception import CustomException
+from src.logger import logging
+from src.utils import save_object
+
+TARGET_COLUMN = "credit_score"
+NON_FEATURE_COLUMNS = ["credit_score", "user_id", "record_date"]
+
+
+@dataclass
+class StreamingTrainerConfig:
+    trained_model_file_path: str = os.path.join("artifacts", "model.pkl")
+    native_model_file_path: str = os.path.join("artifacts", "model_native.npz")
+    cache_dir: str = os.path.join("artifacts", "xgb_cache")
+    chunk_rows: int = 100000
+    n_estimators: int = 200
+    learning_rate: float = 0.1
+    max_depth: int = 6
+    max_bin: int = 256
+    random_state: int = 42
+
+
+class CsvChunkIter(xgboost.DataIter):
+    '''
+    Feeds a CSV to XGBoost one transformed chunk at a time. XGBoost pages
+    the chunks to cache_prefix, so the training matrix is never held in
+    memory as a whole.
+    '''
+    def __init__(self, path, preprocessor, chunk_rows, cache_prefix):
+        self.path = path
+        self.preprocessor = preprocessor
+        self.chunk_rows = chunk_rows
+        self.transformation = DataTransformation()
+        self._chunks = None
+        super().__init__(cache_prefix=cache_prefix)
+
+    def next(self, input_data):
+        if self._chunks is None:
+            self._chunks = iter(pd.read_csv(self.path, chunksize=self.chunk_rows))
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            return False
+        features = self.transformation.transform_features(self.preprocessor, chunk.drop(columns=NON_FEATURE_COLUMNS))
+        input_data(data=features, label=chunk[TARGET_COLUMN].to_numpy(dtype=np.float32))
+        return True
+
+    def reset(self):
+        self._chunks = None
+
+
+def external_memory_matrix(iterator, max_bin):
+    '''
+    XGBoost 3.0+ quantises the chunks once and pages the bins through
+    ExtMemQuantileDMatrix; older releases (the last ones for Python 3.9)
+    page the transformed rows through DMatrix and bin them with hist.
+    '''
+    if hasattr(xgboost, "ExtMemQuantileDMatrix"):
+        return xgboost.ExtMemQuantileDMatrix(iterator, max_bin=max_bin)
+    return xgboost.DMatrix(iterator)
+
+
+def streaming_r2(model, path, preprocessor, chunk_rows):
+    '''
+    R2 of model on a CSV, accumulated chunk by chunk.
+    '''
+    transformation = DataTransformation()
+    n, total, total_squares, squared_error = 0, 0.0, 0.0, 0.0
+    for chunk in pd.read_csv(path, chunksize=chunk_rows):
+        y = chunk[TARGET_COLUMN].to_numpy(dtype=np.float64)
+        predicted = model.predict(transformation.transform_features(preprocessor, chunk.drop(columns=NON_FEATURE_COLUMNS)))
+        n += len(y)
+        total += y.sum()
+        total_squares += (y ** 2).sum()
+        squared_error += ((y - predicted) ** 2).sum()
+    return 1 - squared_error / (total_squares - total ** 2 / n)
+
+
+class StreamingModelTrainer:
+    '''
+    Trains XGBoost on train.csv through an external-memory matrix, for
+    datasets that do not fit in RAM. Peak memory is bounded by chunk_rows.
+    '''
+    def __init__(self):
+        self.streaming_trainer_config = StreamingTrainerConfig()
+
+    def initiate_streaming_training(self, train_path, test_path, preprocessor):
+        try:
+            config = self.streaming_trainer_config
+            os.makedirs(config.cache_dir, exist_ok=True)
+            iterator = CsvChunkIter(train_path, preprocessor, config.chunk_rows,
+                                    os.path.join(config.cache_dir, "train"))
+            train_matrix = external_memory_matrix(iterator, config.max_bin)
+            booster = xgboost.train(
+                {"objective": "reg:squarederror", "tree_method": "hist", "eta": config.learning_rate,
+                 "max_depth": config.max_depth, "max_bin": config.max_bin, "seed": config.random_state},
+                train_matrix, num_boost_round=config.n_estimators)
+            n_rows = train_matrix.num_row()
+            # XGBoost removes its page files when the matrix is freed
+            del train_matrix, iterator
+            shutil.rmtree(config.cache_dir, ignore_errors=True)
+
+            # Wrap the booster so serving and export see the same estimator type as in-memory training
+            model = xgboost.XGBRegressor()
+            model.load_model(bytearray(booster.save_raw("json")))
+
+            r2_square = streaming_r2(model, test_path, preprocessor, config.chunk_rows)
+            logging.info(f"Streaming XGBoost trained on {n_rows} rows, test R2 {r2_square:.4f}")
+
+            model.pair_id_ = getattr(preprocessor, "pair_id_", None)
+            save_object(file_path=config.trained_model_file_path, obj=model)
+            exporter = ModelExporter()
+            exporter.model_exporter_config.native_model_file_path = config.native_model_file_path
+            try:
+                exporter.export(model)
+            except CustomException as e:
+                logging.warning(f"Native export skipped, serving will use model.pkl: {e}")
+                remove_native_model(exporter.model_exporter_config.native_model_file_path)
+
+            return r2_square
+
+        except Exception as e:
+            raise CustomException(e, sys)
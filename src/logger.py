@@ -1,17 +1,277 @@
-import logging
 import os
-from datetime import datetime
+import json
+import time
+import queue
+import atexit
+import logging
+import logging.handlers
+import itertools
+from datetime import datetime, timezone
+from dataclasses import dataclass, field
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows
+    fcntl = None
+
+# Per-request lines go to this logger so they can be sampled under load
+REQUEST_LOGGER = "credit.requests"
+TEXT_FORMAT = "[ %(asctime)s ] %(lineno)d %(name)s - %(levelname)s - %(message)s"
 
 LOG_FILE=f"{datetime.now().strftime('%m_%d_%Y_%H_%M_%S')}.log"
-logs_path=os.path.join(os.getcwd(),"logs",LOG_FILE)
-os.makedirs(logs_path,exist_ok=True)
+logs_path=os.path.join(os.getcwd(),"logs")
+
+LOG_FILE_PATH=os.environ.get("LOG_FILE_PATH") or os.path.join(logs_path,LOG_FILE)
+
+# Processes started from this one (forked, spawned or run as subprocesses) inherit these and log
+# to worker files next to its log instead of starting a log of their own
+if "LOG_OWNER_PID" not in os.environ:
+    os.environ["LOG_FILE_PATH"] = LOG_FILE_PATH
+    os.environ["LOG_OWNER_PID"] = str(os.getpid())
+_owner_pid = int(os.environ["LOG_OWNER_PID"])
+
+
+def _env(name, default, cast=str):
+    return field(default_factory=lambda: cast(os.environ.get(name, default)))
+
+
+@dataclass
+class LoggingConfig:
+    file_path: str = LOG_FILE_PATH
+    level: str = _env("LOG_LEVEL", "INFO")
+    # "text" keeps the classic line format, "json" writes one object per line
+    format: str = _env("LOG_FORMAT", "text")
+    # "size" rotates at max_bytes, "time" at rotate_when (a TimedRotatingFileHandler interval)
+    rotation: str = _env("LOG_ROTATION", "size")
+    max_bytes: int = _env("LOG_MAX_BYTES", 10 * 2**20, int)
+    rotate_when: str = _env("LOG_ROTATE_WHEN", "midnight")
+    backup_count: int = _env("LOG_BACKUP_COUNT", 5, int)
+    # Records waiting for the writer thread; beyond this they are dropped rather than blocking the caller
+    queue_size: int = _env("LOG_QUEUE_SIZE", 10000, int)
+    # Per-request INFO lines kept per second; warnings and errors are never sampled
+    request_lines_per_second: float = _env("LOG_REQUEST_LINES_PER_SECOND", 100, float)
+    # Also write to stderr, which docker logs and process supervisors collect, apart from program output
+    console: bool = _env("LOG_CONSOLE", "1", lambda value: value == "1")
+
+
+class JsonFormatter(logging.Formatter):
+    '''
+    One JSON object per record. Fields passed as extra={"fields": {...}}
+    are added to the object.
+    '''
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "module": record.module,
+            "line": record.lineno,
+            "process": record.process,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", None) or {})
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class RequestSampler(logging.Filter):
+    '''
+    Token bucket over the per-request logger: passes at most rate INFO
+    lines a second and counts the rest. The next line let through reports
+    how many were skipped. Approximate under concurrency, which is fine for
+    sampling and keeps a lock off the request path.
+    '''
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+        self.suppressed = 0
+        self.suppressed_total = 0
+
+    def filter(self, record):
+        if record.name != REQUEST_LOGGER or record.levelno >= logging.WARNING or self.rate <= 0:
+            return True
+        now = time.monotonic()
+        self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < 1:
+            self.suppressed += 1
+            self.suppressed_total += 1
+            return False
+        self.tokens -= 1
+        if self.suppressed:
+            record.fields = {**(getattr(record, "fields", None) or {}), "sampled_out": self.suppressed}
+            self.suppressed = 0
+        return True
+
+
+_PLAIN_ARGS = (str, int, float, bool, type(None))
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    '''
+    Hands records to the writer thread. Formatting, rotation and disk writes
+    all happen there; when the queue is full the record is dropped and
+    counted instead of making the caller wait.
+    '''
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        record = logging.makeLogRecord(record.__dict__)
+        if record.exc_info:
+            # Tracebacks must be rendered while their frames are still current
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        args = record.args
+        if args and not (isinstance(args, tuple) and all(isinstance(arg, _PLAIN_ARGS) for arg in args)):
+            # Mutable arguments could change before the writer formats them
+            record.msg, record.args = record.getMessage(), None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _Logging:
+    handler = None
+    listener = None
+    sampler = None
+    config = None
+    # (pid, log file path, lock descriptor, worker file path) of the worker slot held
+    slot = None
+
+
+class _CreateDirectoryOnOpen:
+    # Create the log directory when the first record is written rather than at import
+    def _open(self):
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        return super()._open()
+
+
+class _RotatingFileHandler(_CreateDirectoryOnOpen, logging.handlers.RotatingFileHandler):
+    pass
+
+
+class _TimedRotatingFileHandler(_CreateDirectoryOnOpen, logging.handlers.TimedRotatingFileHandler):
+    pass
+
+
+def _file_handler(config, file_path):
+    if config.rotation == "time":
+        handler = _TimedRotatingFileHandler(
+            file_path, when=config.rotate_when, backupCount=config.backup_count, delay=True)
+    else:
+        handler = _RotatingFileHandler(
+            file_path, maxBytes=config.max_bytes, backupCount=config.backup_count, delay=True)
+    return handler
+
+
+def _process_file_path(file_path):
+    '''
+    Rotation is not safe with several processes on one file, so each worker
+    process writes to <stem>.worker<N><ext>, taking the lowest slot N no
+    running process holds. Files are reused by later workers, so there are
+    only as many as processes ever ran at once.
+    '''
+    if os.getpid() == _owner_pid:
+        return file_path
+    stem, extension = os.path.splitext(file_path)
+    if fcntl is None:
+        return f"{stem}.{os.getpid()}{extension}"
+    if _Logging.slot is not None:
+        pid, slot_file_path, fd, worker_file_path = _Logging.slot
+        if pid == os.getpid() and slot_file_path == file_path:
+            return worker_file_path
+        # A forked child shares its parent's lock and must take a slot of its own
+        os.close(fd)
+        _Logging.slot = None
+    os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+    for slot in itertools.count():
+        fd = os.open(f"{stem}.worker{slot}.lock", os.O_CREAT | os.O_RDWR, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            continue
+        # Held until the process exits
+        _Logging.slot = (os.getpid(), file_path, fd, f"{stem}.worker{slot}{extension}")
+        return _Logging.slot[3]
+
+
+def stop_logging():
+    '''
+    Flushes queued records and stops the writer thread.
+    '''
+    if _Logging.listener is not None:
+        _Logging.listener.stop()
+        for handler in _Logging.listener.handlers:
+            handler.close()
+        _Logging.listener = None
+
+
+def configure_logging(config=None):
+    '''
+    Routes the root logger through a bounded queue to a background writer
+    thread with a rotating file handler and stderr (LOG_CONSOLE=0 turns
+    the console off).
+    Calling it again replaces the previous setup.
+    '''
+    config = config or _Logging.config or LoggingConfig()
+    root = logging.getLogger()
+    if _Logging.handler is not None:
+        root.removeHandler(_Logging.handler)
+    stop_logging()
+
+    formatter = JsonFormatter() if config.format == "json" else logging.Formatter(TEXT_FORMAT)
+    handlers = [_file_handler(config, _process_file_path(config.file_path))]
+    if config.console:
+        handlers.append(logging.StreamHandler())
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.Queue(maxsize=config.queue_size)
+    queue_handler = NonBlockingQueueHandler(log_queue)
+    sampler = RequestSampler(config.request_lines_per_second)
+    queue_handler.addFilter(sampler)
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+
+    root.addHandler(queue_handler)
+    root.setLevel(config.level)
+    _Logging.handler, _Logging.listener, _Logging.sampler, _Logging.config = queue_handler, listener, sampler, config
+    return queue_handler
+
+
+def logging_stats():
+    '''
+    Counters of the logging pipeline, for health endpoints.
+    '''
+    if _Logging.handler is None:
+        return {}
+    return {
+        "queued": _Logging.handler.queue.qsize(),
+        "dropped": _Logging.handler.dropped,
+        "sampled_out": _Logging.sampler.suppressed_total,
+    }
 
-LOG_FILE_PATH=os.path.join(logs_path,LOG_FILE)
 
-logging.basicConfig(
-    filename=LOG_FILE_PATH,
-    format="[ %(asctime)s ] %(lineno)d %(name)s - %(levelname)s - %(message)s",
-    level=logging.INFO,
+def _restart_after_fork():
+    # The writer thread does not survive fork; the child starts its own, writing to a worker file
+    _Logging.listener = None
+    if _Logging.handler is not None:
+        configure_logging()
 
 
-)
+configure_logging()
+atexit.register(stop_logging)
+os.register_at_fork(after_in_child=_restart_after_fork)
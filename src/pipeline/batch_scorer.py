@@ -0,0 +1,188 @@
+import os
+import sys
+import json
+import time
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+from src.exception import CustomException
+from src.logger import logging
+from src.pipeline.model_registry import ModelRegistry, ModelRegistryConfig
+from src.pipeline.predict_pipeline import PredictPipeline
+from src.pipeline.request_schema import CUSTOM_DATA_FIELDS
+
+OUTPUT_COLUMNS = ["user_id", "credit_score", "credit_rating"]
+# Read as text so ids and categories are never turned into numbers
+TEXT_COLUMNS = {spec.name: str for spec in CUSTOM_DATA_FIELDS if spec.kind in ("category", "string")}
+
+
+@dataclass
+class BatchScorerConfig:
+    chunk_size: int = 20000
+    workers: int = field(default_factory=lambda: os.cpu_count() or 1)
+    # Chunks read ahead of the writer; memory stays around (max_pending + 1) chunks whatever the file size
+    max_pending: int = None
+    registry_config: ModelRegistryConfig = field(default_factory=ModelRegistryConfig)
+    # Failed rows kept in the report, on top of the count
+    error_examples: int = 5
+
+
+def iter_chunks(input_path, chunk_size):
+    '''
+    Streams the input file as DataFrames of at most chunk_size rows. CSV is
+    read with pandas; Parquet needs the optional pyarrow package.
+    '''
+    columns = {spec.name for spec in CUSTOM_DATA_FIELDS}
+    if input_path.endswith(".parquet"):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Scoring Parquet files needs pyarrow: pip install pyarrow") from e
+        parquet_file = pq.ParquetFile(input_path)
+        names = [name for name in parquet_file.schema_arrow.names if name in columns]
+        for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=names):
+            yield batch.to_pandas()
+        return
+    yield from pd.read_csv(input_path, chunksize=chunk_size, usecols=lambda name: name in columns,
+                           dtype=TEXT_COLUMNS)
+
+
+class _OutputWriter:
+    # Appends scored chunks to CSV, or to Parquet row groups through pyarrow
+    def __init__(self, output_path):
+        self.output_path = output_path
+        self.parquet = output_path.endswith(".parquet")
+        self.file_obj = None
+        self.writer = None
+
+    def write(self, scored):
+        scored = scored[OUTPUT_COLUMNS]
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(scored, preserve_index=False)
+            if self.writer is None:
+                self.writer = pq.ParquetWriter(self.output_path, table.schema)
+            self.writer.write_table(table)
+            return
+        if self.file_obj is None:
+            self.file_obj = open(self.output_path, "w", newline="")
+            scored.to_csv(self.file_obj, index=False)
+        else:
+            scored.to_csv(self.file_obj, index=False, header=False)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        if self.file_obj is not None:
+            self.file_obj.close()
+
+
+_worker = {}
+
+
+def _start_worker(registry_config):
+    pipeline = PredictPipeline(ModelRegistry(registry_config))
+    pipeline.start()
+    _worker["pipeline"] = pipeline
+
+
+def _score_chunk(frame):
+    return _worker["pipeline"].predict_frame(frame)
+
+
+class BatchScorer:
+    '''
+    Scores a CSV or Parquet file with the rows of artifacts/test.csv offline:
+    chunks are scored in parallel worker processes, each holding its own
+    PredictPipeline, and written out in input order as they complete.
+    '''
+    def __init__(self):
+        self.batch_scorer_config = BatchScorerConfig()
+
+    def _scored_chunks(self, chunks):
+        config = self.batch_scorer_config
+        if config.workers <= 1:
+            _start_worker(config.registry_config)
+            for chunk in chunks:
+                yield _score_chunk(chunk)
+            return
+
+        max_pending = config.max_pending or 2 * config.workers
+        with ProcessPoolExecutor(max_workers=config.workers, initializer=_start_worker,
+                                 initargs=(config.registry_config,)) as pool:
+            pending = deque()
+            for chunk in chunks:
+                pending.append(pool.submit(_score_chunk, chunk))
+                if len(pending) >= max_pending:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def score(self, input_path, output_path):
+        '''
+        Writes user_id, credit_score and credit_rating for every input row to
+        output_path (.csv or .parquet) and returns a report with the row
+        counts, failures and throughput. Rows that fail validation or
+        scoring are written without a score and counted.
+        '''
+        try:
+            config = self.batch_scorer_config
+            started = time.perf_counter()
+            rows, failed, errors = 0, 0, []
+            writer = _OutputWriter(output_path)
+            try:
+                for scored in self._scored_chunks(iter_chunks(input_path, config.chunk_size)):
+                    writer.write(scored)
+                    failures = scored["error"].dropna()
+                    rows += len(scored)
+                    failed += len(failures)
+                    errors.extend(failures.head(config.error_examples - len(errors)).tolist())
+                    logging.info(f"Scored {rows} rows from {input_path}, "
+                                 f"{rows / (time.perf_counter() - started):.0f} rows/s")
+            finally:
+                writer.close()
+
+            seconds = time.perf_counter() - started
+            report = {
+                "input_path": input_path,
+                "output_path": output_path,
+                "rows": rows,
+                "failed": failed,
+                "seconds": round(seconds, 3),
+                "rows_per_second": round(rows / seconds, 1) if seconds else None,
+                "workers": config.workers,
+                "error_examples": errors,
+            }
+            logging.info(f"Batch scoring finished: {report}")
+            return report
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+
+if __name__ == "__main__":
+    # Workers unpickle the chunk function by module name, which must not be __main__
+    from src.pipeline.batch_scorer import BatchScorer
+
+    parser = argparse.ArgumentParser(description="Score a CSV or Parquet file of credit records offline")
+    parser.add_argument("input_path", help="file with the columns of artifacts/test.csv")
+    parser.add_argument("output_path", help="where to write user_id, credit_score, credit_rating (.csv or .parquet)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=20000)
+    parser.add_argument("--model-path", default=ModelRegistryConfig.model_path)
+    parser.add_argument("--preprocessor-path", default=ModelRegistryConfig.preprocessor_path)
+    parser.add_argument("--native-model-path", default=None, help="score with the exported NativeModel (faster to start, slower on large chunks)")
+    args = parser.parse_args()
+
+    scorer = BatchScorer()
+    scorer.batch_scorer_config.workers = args.workers
+    scorer.batch_scorer_config.chunk_size = args.chunk_size
+    scorer.batch_scorer_config.registry_config.model_path = args.model_path
+    scorer.batch_scorer_config.registry_config.preprocessor_path = args.preprocessor_path
+    scorer.batch_scorer_config.registry_config.native_model_path = args.native_model_path
+    print(json.dumps(scorer.score(args.input_path, args.output_path), indent=2))
@@ -0,0 +1,259 @@
+import os
+import json
+
+import numpy as np
+
+
+class UnsupportedPreprocessor(Exception):
+    pass
+
+
+class _NumericBlock:
+    '''
+    SimpleImputer(median) -> StandardScaler as plain arrays.
+    '''
+    def __init__(self, columns, fill_values, mean, scale):
+        self.columns = list(columns)
+        self.fill_values = fill_values
+        self.mean = mean
+        self.scale = scale
+        self.width = len(self.columns)
+
+    def fill(self, out, offset, values):
+        block = np.asarray(values, dtype=np.float64)
+        missing = np.isnan(block)
+        if missing.any():
+            block = np.where(missing, self.fill_values, block)
+        if self.mean is not None:
+            block = block - self.mean
+        if self.scale is not None:
+            block = block / self.scale
+        out[:, offset:offset + self.width] = block
+
+
+class _OneHotBlock:
+    '''
+    SimpleImputer(most_frequent) -> OneHotEncoder -> StandardScaler(with_mean=False)
+    as per-column vocabularies and the scaled value of each indicator.
+    '''
+    def __init__(self, columns, fill_values, categories, indicator_values, handle_unknown):
+        self.columns = list(columns)
+        self.fill_values = list(fill_values)
+        self.vocabularies = []
+        offset = 0
+        for column_categories in categories:
+            self.vocabularies.append({category: offset + i for i, category in enumerate(column_categories)})
+            offset += len(column_categories)
+        self.indicator_values = indicator_values
+        self.handle_unknown = handle_unknown
+        self.width = offset
+
+    def fill(self, out, offset, values):
+        for j, column in enumerate(self.columns):
+            vocabulary = self.vocabularies[j]
+            fill_value = self.fill_values[j]
+            for i, value in enumerate(values[j]):
+                if value is None or value != value:
+                    value = fill_value
+                position = vocabulary.get(value)
+                if position is None:
+                    if self.handle_unknown == "error":
+                        raise ValueError(
+                            f"Found unknown categories [{value!r}] in column '{column}' during transform"
+                        )
+                    continue
+                out[i, offset + position] = self.indicator_values[position]
+
+
+def _compile_pipeline(pipeline, columns):
+    steps = [step for _, step in pipeline.steps] if hasattr(pipeline, "steps") else [pipeline]
+    names = [type(step).__name__ for step in steps]
+
+    if names and names[0] == "SimpleImputer":
+        imputer = steps[0]
+        if imputer.add_indicator:
+            raise UnsupportedPreprocessor("SimpleImputer(add_indicator=True) is not supported")
+        fill_values = imputer.statistics_
+    else:
+        fill_values = None
+
+    if names in (["SimpleImputer", "StandardScaler"], ["StandardScaler"]):
+        scaler = steps[-1]
+        if fill_values is None:
+            fill_values = np.full(len(columns), np.nan)
+        if np.isnan(np.asarray(fill_values, dtype=np.float64)).any():
+            raise UnsupportedPreprocessor("numeric imputer dropped an all-missing column")
+        return _NumericBlock(
+            columns,
+            np.asarray(fill_values, dtype=np.float64),
+            scaler.mean_ if scaler.with_mean else None,
+            scaler.scale_ if scaler.with_std else None,
+        )
+
+    if names in (["SimpleImputer", "OneHotEncoder", "StandardScaler"], ["SimpleImputer", "OneHotEncoder"]):
+        encoder = steps[1]
+        if encoder.drop is not None or getattr(encoder, "max_categories", None) or getattr(encoder, "min_frequency", None):
+            raise UnsupportedPreprocessor("OneHotEncoder with drop or infrequent categories is not supported")
+        if encoder.handle_unknown not in ("error", "ignore"):
+            raise UnsupportedPreprocessor(f"handle_unknown={encoder.handle_unknown!r} is not supported")
+        width = sum(len(column_categories) for column_categories in encoder.categories_)
+        indicator_values = np.ones(width, dtype=np.float64)
+        if len(steps) == 3:
+            scaler = steps[2]
+            if scaler.with_mean:
+                raise UnsupportedPreprocessor("centering one-hot columns is not supported")
+            if scaler.with_std:
+                # sklearn scales sparse input by multiplying with the reciprocal
+                indicator_values = indicator_values * (1 / scaler.scale_)
+        return _OneHotBlock(columns, fill_values, encoder.categories_, indicator_values, encoder.handle_unknown)
+
+    raise UnsupportedPreprocessor(f"unsupported pipeline steps {names}")
+
+
+def _plain(value):
+    # NumPy scalars (np.str_, np.float64) as the Python values JSON can write
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def compiled_preprocessor_path(preprocessor_path):
+    return os.path.splitext(preprocessor_path)[0] + "_compiled.json"
+
+
+def write_compiled_preprocessor(preprocessor, preprocessor_path):
+    '''
+    Saves the FastEncoder of preprocessor next to its pickle, so serving can
+    start without unpickling it (or importing sklearn). Returns the path,
+    or None when the preprocessor cannot be compiled; a stale compiled file
+    is removed then.
+    '''
+    file_path = compiled_preprocessor_path(preprocessor_path)
+    try:
+        encoder = FastEncoder.from_preprocessor(preprocessor)
+    except (UnsupportedPreprocessor, AttributeError):
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        return None
+    encoder.save(file_path)
+    return file_path
+
+
+class FastEncoder:
+    '''
+    Inference-only copy of the fitted ColumnTransformer built by
+    DataTransformation. It holds the imputer fill values, scaler statistics
+    and one-hot vocabularies as NumPy arrays and maps raw records straight to
+    the model input matrix, skipping pandas and sklearn input validation.
+    '''
+    def __init__(self, blocks, pair_id=None):
+        self.blocks = blocks
+        self.n_features_out = sum(block.width for block in blocks)
+        # Copied from the preprocessor; see ModelRegistry._is_compatible
+        self.pair_id_ = pair_id
+
+    @classmethod
+    def from_preprocessor(cls, preprocessor):
+        if type(preprocessor).__name__ != "ColumnTransformer":
+            raise UnsupportedPreprocessor(f"expected a ColumnTransformer, got {type(preprocessor).__name__}")
+        if preprocessor.sparse_output_:
+            raise UnsupportedPreprocessor("sparse ColumnTransformer output is not supported")
+
+        blocks = []
+        for name, transformer, columns in preprocessor.transformers_:
+            if name == "remainder":
+                if transformer != "drop":
+                    raise UnsupportedPreprocessor("only remainder='drop' is supported")
+                continue
+            if transformer == "drop":
+                continue
+            blocks.append(_compile_pipeline(transformer, columns))
+        return cls(blocks, getattr(preprocessor, "pair_id_", None))
+
+    def to_dict(self):
+        '''
+        The fitted state as plain JSON types. Floats survive the round trip
+        exactly, so a loaded encoder gives bit-identical output.
+        '''
+        blocks = []
+        for block in self.blocks:
+            if isinstance(block, _NumericBlock):
+                blocks.append({
+                    "kind": "numeric",
+                    "columns": block.columns,
+                    "fill_values": block.fill_values.tolist(),
+                    "mean": None if block.mean is None else np.asarray(block.mean).tolist(),
+                    "scale": None if block.scale is None else np.asarray(block.scale).tolist(),
+                })
+            else:
+                blocks.append({
+                    "kind": "one_hot",
+                    "columns": block.columns,
+                    "fill_values": [_plain(value) for value in block.fill_values],
+                    "categories": [[_plain(category) for category in sorted(vocabulary, key=vocabulary.get)]
+                                   for vocabulary in block.vocabularies],
+                    "indicator_values": np.asarray(block.indicator_values).tolist(),
+                    "handle_unknown": block.handle_unknown,
+                })
+        state = {"format": 1, "blocks": blocks}
+        if self.pair_id_ is not None:
+            state["pair_id"] = self.pair_id_
+        return state
+
+    @classmethod
+    def from_dict(cls, state):
+        blocks = []
+        for block in state["blocks"]:
+            if block["kind"] == "numeric":
+                blocks.append(_NumericBlock(
+                    block["columns"],
+                    np.asarray(block["fill_values"], dtype=np.float64),
+                    None if block["mean"] is None else np.asarray(block["mean"], dtype=np.float64),
+                    None if block["scale"] is None else np.asarray(block["scale"], dtype=np.float64),
+                ))
+            else:
+                blocks.append(_OneHotBlock(
+                    block["columns"],
+                    block["fill_values"],
+                    block["categories"],
+                    np.asarray(block["indicator_values"], dtype=np.float64),
+                    block["handle_unknown"],
+                ))
+        return cls(blocks, state.get("pair_id"))
+
+    def save(self, file_path):
+        # Written whole and swapped in, since the serving registry may be watching the file
+        with open(file_path + ".tmp", "w") as file_obj:
+            json.dump(self.to_dict(), file_obj)
+        os.replace(file_path + ".tmp", file_path)
+
+    @classmethod
+    def load(cls, file_path):
+        with open(file_path) as file_obj:
+            return cls.from_dict(json.load(file_obj))
+
+    @property
+    def columns(self):
+        return [column for block in self.blocks for column in block.columns]
+
+    def transform(self, records):
+        '''
+        Encodes a DataFrame, a list of record dicts or a single record dict.
+        '''
+        if isinstance(records, dict):
+            records = [records]
+        n_rows = len(records)
+        out = np.zeros((n_rows, self.n_features_out), dtype=np.float64)
+
+        offset = 0
+        for block in self.blocks:
+            if hasattr(records, "columns"):
+                columns = [records[column].tolist() for column in block.columns]
+            else:
+                columns = [[record[column] for record in records] for column in block.columns]
+
+            if isinstance(block, _NumericBlock):
+                values = [[np.nan if value is None else value for value in column] for column in columns]
+                block.fill(out, offset, np.array(values, dtype=np.float64).reshape(block.width, n_rows).T)
+            else:
+                block.fill(out, offset, columns)
+            offset += block.width
+        return out
@@ -0,0 +1,187 @@
+import os
+import time
+import queue
+import threading
+from concurrent.futures import Future, TimeoutError
+from dataclasses import dataclass
+
+from src.logger import logging
+
+
+@dataclass
+class MicroBatcherConfig:
+    max_batch_size: int = 64
+    max_wait_ms: float = 2.0
+    # Longest a caller waits for its prediction before giving up
+    timeout_seconds: float = 30.0
+
+
+def _concat(items):
+    if hasattr(items[0], "columns"):
+        # Only DataFrame callers get here, so pandas is already loaded
+        import pandas as pd
+        return pd.concat(items, ignore_index=True)
+    return [record for item in items for record in item]
+
+
+class MicroBatcher:
+    '''
+    Collects single-record predictions arriving within a short window into
+    one vectorized predict call and fans the results back to the callers.
+    Items submitted with a group (such as the model bundle that must score
+    them) are only merged with items of the same group, and predict_fn is
+    called as predict_fn(features, group) for them.
+    '''
+    def __init__(self, predict_fn, config=None):
+        self.predict_fn = predict_fn
+        self.config = config or MicroBatcherConfig()
+        self._queue = queue.Queue()
+        self._worker = None
+        self._worker_pid = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._rows = 0
+        self._requests = 0
+        self._cancelled = 0
+        self._histogram = {}
+        self._wait_seconds_total = 0.0
+        self._wait_seconds_max = 0.0
+
+    def _ensure_worker(self):
+        if self._worker_pid == os.getpid() and self._worker.is_alive():
+            return
+        with self._start_lock:
+            if self._worker_pid == os.getpid() and self._worker.is_alive():
+                return
+            if self._worker_pid != os.getpid():
+                # Threads do not survive fork, so a forked process starts its own worker on a fresh
+                # queue; a worker that merely died in this process is restarted on the queued requests
+                self._queue = queue.Queue()
+            self._worker = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+            self._worker_pid = os.getpid()
+            self._worker.start()
+
+    def submit(self, features, group=None):
+        '''
+        Queues a feature frame for prediction and returns a Future of its predictions.
+        '''
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((features, future, time.perf_counter(), group))
+        return future
+
+    def predict(self, features, timeout=None, group=None):
+        '''
+        Predicts through the batcher, raising concurrent.futures.TimeoutError
+        after timeout (config.timeout_seconds by default) seconds. A request
+        that times out before the worker picks it up is never scored.
+        '''
+        future = self.submit(features, group)
+        try:
+            return future.result(timeout=self.config.timeout_seconds if timeout is None else timeout)
+        except TimeoutError:
+            future.cancel()
+            raise
+
+    def _take(self, timeout=None):
+        # Skips requests whose callers gave up; the rest can no longer be cancelled
+        while True:
+            item = self._queue.get(timeout=timeout)
+            if item[1].set_running_or_notify_cancel():
+                return item
+            with self._stats_lock:
+                self._cancelled += 1
+
+    def _collect(self):
+        batch = [self._take()]
+        rows = len(batch[0][0])
+        deadline = batch[0][2] + self.config.max_wait_ms / 1000.0
+        while rows < self.config.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._take(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(item)
+            rows += len(item[0])
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                self._predict_batch(batch)
+            except Exception as e:
+                # The worker outlives any failure; the callers of this batch get the error
+                logging.exception("Micro-batch failed")
+                for _, future, _, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _predict_batch(self, batch):
+        self._record(batch, time.perf_counter())
+        groups = {}
+        for item in batch:
+            groups.setdefault(id(item[3]), []).append(item)
+        for items in groups.values():
+            self._predict_group(items, items[0][3])
+
+    def _call(self, features, group):
+        return self.predict_fn(features) if group is None else self.predict_fn(features, group)
+
+    def _predict_group(self, items, group):
+        try:
+            features = _concat([item[0] for item in items])
+            predictions = self._call(features, group)
+        except Exception:
+            # Score each request alone so one bad record only fails its own caller
+            for features, future, _, _ in items:
+                self._resolve(future, features, group)
+            return
+
+        offset = 0
+        for features, future, _, _ in items:
+            future.set_result(predictions[offset:offset + len(features)])
+            offset += len(features)
+
+    def _resolve(self, future, features, group):
+        try:
+            future.set_result(self._call(features, group))
+        except Exception as e:
+            future.set_exception(e)
+
+    def _record(self, batch, started):
+        rows = sum(len(item[0]) for item in batch)
+        waits = [started - item[2] for item in batch]
+        bucket = 1
+        while bucket < rows:
+            bucket *= 2
+        with self._stats_lock:
+            self._batches += 1
+            self._rows += rows
+            self._requests += len(batch)
+            self._histogram[bucket] = self._histogram.get(bucket, 0) + 1
+            self._wait_seconds_total += sum(waits)
+            self._wait_seconds_max = max(self._wait_seconds_max, max(waits))
+        if rows > 1:
+            logging.debug(f"Micro-batch of {rows} rows from {len(batch)} requests")
+
+    def stats(self):
+        with self._stats_lock:
+            requests_waited = self._requests or 1
+            return {
+                "queue_depth": self._queue.qsize(),
+                "batches": self._batches,
+                "requests": self._requests,
+                "cancelled": self._cancelled,
+                "rows": self._rows,
+                "mean_batch_size": round(self._rows / self._batches, 2) if self._batches else 0.0,
+                "batch_size_histogram": {f"le_{bucket}": count for bucket, count in sorted(self._histogram.items())},
+                "added_latency_ms_mean": round(1000 * self._wait_seconds_total / requests_waited, 3),
+                "added_latency_ms_max": round(1000 * self._wait_seconds_max, 3),
+                "max_batch_size": self.config.max_batch_size,
+                "max_wait_ms": self.config.max_wait_ms,
+            }
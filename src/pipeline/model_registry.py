@@ -0,0 +1,244 @@
+import os
+import sys
+import time
+import hashlib
+import threading
+from dataclasses import dataclass
+
+from src.exception import CustomException
+from src.logger import logging
+from src.utils import load_object
+from src.pipeline.fast_encoder import FastEncoder, UnsupportedPreprocessor, compiled_preprocessor_path
+from src.pipeline.native_model import NativeModel
+
+
+@dataclass
+class ModelRegistryConfig:
+    model_path: str = os.path.join("artifacts", "model.pkl")
+    preprocessor_path: str = os.path.join("artifacts", "preprocessor.pkl")
+    check_interval_seconds: float = 5.0
+    # When set and present, serve the exported NativeModel instead of model.pkl
+    native_model_path: str = None
+    # Load preprocessor_compiled.json instead of unpickling the preprocessor when it is at least as new
+    use_compiled_preprocessor: bool = True
+
+
+@dataclass(frozen=True)
+class ModelBundle:
+    '''
+    An immutable model/preprocessor pair. Requests take a reference to one
+    bundle and use it for their whole lifetime, so a swap never changes the
+    objects underneath an in-flight prediction.
+    '''
+    model: object
+    preprocessor: object
+    version: str
+    loaded_at: float
+    load_seconds: float
+    encoder: object = None
+
+    def transform(self, features):
+        '''
+        Encodes features with the compiled FastEncoder when the preprocessor
+        could be compiled, falling back to preprocessor.transform.
+        '''
+        if self.encoder is not None:
+            return self.encoder.transform(features)
+        if not hasattr(features, "columns"):
+            import pandas as pd
+            features = pd.DataFrame(features if isinstance(features, list) else [features])
+        return self.preprocessor.transform(features)
+
+
+def file_signature(file_path):
+    stat = os.stat(file_path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def file_digest(file_path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file_obj:
+        for chunk in iter(lambda: file_obj.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ModelRegistry:
+    '''
+    Keeps the model and preprocessor resident in memory and swaps in a new
+    pair when the artifact files change on disk.
+    '''
+    def __init__(self, config=None):
+        self.config = config or ModelRegistryConfig()
+        self._bundle = None
+        self._signature = None
+        self._lock = threading.Lock()
+        self._watcher = None
+        self._stop_event = threading.Event()
+
+    def _model_path(self):
+        native_model_path, model_path = self.config.native_model_path, self.config.model_path
+        if native_model_path and os.path.exists(native_model_path):
+            # An export older than model.pkl was left by a model that has since been replaced
+            if not os.path.exists(model_path) or \
+                    os.stat(native_model_path).st_mtime_ns >= os.stat(model_path).st_mtime_ns:
+                return native_model_path
+        return model_path
+
+    def _preprocessor_path(self):
+        preprocessor_path = self.config.preprocessor_path
+        compiled_path = compiled_preprocessor_path(preprocessor_path)
+        if self.config.use_compiled_preprocessor and os.path.exists(compiled_path):
+            # A pickle rewritten after the compiled file (by older training code) wins
+            if not os.path.exists(preprocessor_path) or \
+                    os.stat(compiled_path).st_mtime_ns >= os.stat(preprocessor_path).st_mtime_ns:
+                return compiled_path
+        return preprocessor_path
+
+    def _artifact_paths(self):
+        return [self._model_path(), self._preprocessor_path()]
+
+    def _current_signature(self):
+        return tuple((path,) + file_signature(path) for path in self._artifact_paths())
+
+    def _version(self):
+        digest = hashlib.sha256()
+        for path in self._artifact_paths():
+            digest.update(file_digest(path).encode())
+        return digest.hexdigest()[:12]
+
+    def load(self):
+        '''
+        Loads both artifacts and atomically publishes them as the current bundle.
+        '''
+        try:
+            with self._lock:
+                signature = self._current_signature()
+                start = time.perf_counter()
+                version = self._version()
+                model_path, preprocessor_path = self._artifact_paths()
+                if model_path == self.config.native_model_path:
+                    model = NativeModel.load(model_path)
+                else:
+                    model = load_object(file_path=model_path)
+                if preprocessor_path != self.config.preprocessor_path:
+                    # The compiled encoder needs neither the pickle nor sklearn
+                    preprocessor, encoder = None, FastEncoder.load(preprocessor_path)
+                else:
+                    preprocessor = load_object(file_path=preprocessor_path)
+                    encoder = self._compile_encoder(preprocessor)
+                load_seconds = time.perf_counter() - start
+
+                compatible = self._is_compatible(model, preprocessor, encoder)
+                if not compatible and self._bundle is not None:
+                    raise ValueError(
+                        f"Model and preprocessor at version {version} are incompatible, keeping version {self._bundle.version}"
+                    )
+                if not compatible:
+                    logging.warning(f"Model and preprocessor at version {version} do not belong together")
+
+                self._bundle = ModelBundle(
+                    model=model,
+                    preprocessor=preprocessor,
+                    version=version,
+                    loaded_at=time.time(),
+                    load_seconds=load_seconds,
+                    encoder=encoder,
+                )
+                self._signature = signature
+                logging.info(f"Loaded model version {version} in {load_seconds:.3f}s")
+                return self._bundle
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    @staticmethod
+    def _compile_encoder(preprocessor):
+        try:
+            return FastEncoder.from_preprocessor(preprocessor)
+        except (UnsupportedPreprocessor, AttributeError) as e:
+            logging.info(f"Using preprocessor.transform for inference: {e}")
+            return None
+
+    @staticmethod
+    def _is_compatible(model, preprocessor, encoder=None):
+        # A refresh stamps the model and preprocessor it publishes with one pair id, so a poll that
+        # lands between its writes sees a mismatch instead of a half-refreshed pair
+        fitted_with = preprocessor if preprocessor is not None else encoder
+        if getattr(model, "pair_id_", None) != getattr(fitted_with, "pair_id_", None):
+            return False
+        n_features = getattr(model, "n_features_in_", None)
+        if n_features is not None and encoder is not None:
+            return encoder.n_features_out == n_features
+        if n_features is None or not hasattr(preprocessor, "get_feature_names_out"):
+            return True
+        try:
+            return len(preprocessor.get_feature_names_out()) == n_features
+        except Exception:
+            return True
+
+    def get(self):
+        '''
+        Returns the current bundle, loading it on first use.
+        '''
+        bundle = self._bundle
+        if bundle is None:
+            bundle = self.load()
+        return bundle
+
+    def reload_if_changed(self):
+        '''
+        Reloads the artifacts if their mtime or size changed since the last load.
+        Returns True when a new bundle was published.
+        '''
+        try:
+            signature = self._current_signature()
+        except OSError:
+            # A retrain may be replacing the files right now; try again later
+            return False
+
+        if signature == self._signature:
+            return False
+
+        previous = self._bundle
+        try:
+            bundle = self.load()
+        except CustomException as e:
+            logging.error(f"Artifact reload failed, serving previous model: {e}")
+            return False
+
+        return previous is None or bundle.version != previous.version
+
+    def _watch(self):
+        while not self._stop_event.wait(self.config.check_interval_seconds):
+            self.reload_if_changed()
+
+    def start_watcher(self):
+        '''
+        Starts a daemon thread that polls the artifact files for changes.
+        '''
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+        self._stop_event.clear()
+        self._watcher = threading.Thread(target=self._watch, name="model-registry-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watcher(self):
+        self._stop_event.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+    def info(self):
+        bundle = self._bundle
+        if bundle is None:
+            return {"loaded": False}
+        return {
+            "loaded": True,
+            "version": bundle.version,
+            "loaded_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(bundle.loaded_at)),
+            "load_seconds": round(bundle.load_seconds, 4),
+            "fast_encoder": bundle.encoder is not None,
+            "native_model": isinstance(bundle.model, NativeModel),
+            "compiled_preprocessor": bundle.preprocessor is None,
+        }
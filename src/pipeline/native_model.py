@@ -0,0 +1,154 @@
+import mmap
+import struct
+import zipfile
+import numpy as np
+
+_HEADER_READERS = {(1, 0): np.lib.format.read_array_header_1_0, (2, 0): np.lib.format.read_array_header_2_0}
+
+
+def _map_npz(file_path):
+    '''
+    Reads the arrays of an uncompressed .npz as read-only views of one
+    shared mapping of the file, so processes serving the same model share
+    its pages. Returns None when a member cannot be mapped.
+    '''
+    arrays = {}
+    with zipfile.ZipFile(file_path) as archive, open(file_path, "rb") as file_obj:
+        if not archive.infolist():
+            return None
+        data = mmap.mmap(file_obj.fileno(), 0, access=mmap.ACCESS_READ)
+        for info in archive.infolist():
+            if info.compress_type != zipfile.ZIP_STORED or not info.filename.endswith(".npy"):
+                return None
+            # The member starts after its local header: 30 fixed bytes, then the name and extra field
+            name_length, extra_length = struct.unpack("<HH", data[info.header_offset + 26:info.header_offset + 30])
+            file_obj.seek(info.header_offset + 30 + name_length + extra_length)
+            read_header = _HEADER_READERS.get(np.lib.format.read_magic(file_obj))
+            if read_header is None:
+                return None
+            shape, fortran_order, dtype = read_header(file_obj)
+            if dtype.hasobject:
+                return None
+            count = int(np.prod(shape))
+            array = np.frombuffer(data, dtype=dtype, count=count, offset=file_obj.tell())
+            arrays[info.filename[:-len(".npy")]] = array.reshape(shape, order="F" if fortran_order else "C")
+    return arrays
+
+
+class NativeModel:
+    '''
+    Pure-NumPy evaluator for models written by ModelExporter. Linear models
+    are a dot product; tree ensembles are traversed level by level for all
+    rows and trees at once.
+    '''
+    def __init__(self, arrays):
+        self.kind = str(arrays["kind"])
+        self.n_features_in_ = int(arrays["n_features"])
+        # Set by reduce_precision at export; see model_exporter.PRECISIONS
+        self.precision = str(arrays["precision"]) if "precision" in arrays else "float64"
+        # Set for models published by a refresh; see ModelRegistry._is_compatible
+        self.pair_id_ = str(arrays["pair_id"]) if "pair_id" in arrays else None
+        if self.kind == "linear":
+            self.coef = arrays["coef"]
+            self.intercept = float(arrays["intercept"])
+        elif self.kind == "trees":
+            self.feature = arrays["feature"]
+            self.threshold = arrays["threshold"]
+            self.left = arrays["left"]
+            self.right = arrays["right"]
+            self.value = arrays["value"]
+            self.default_left = arrays["default_left"]
+            self.roots = arrays["roots"]
+            self.max_depth = int(arrays["max_depth"])
+            self.comparison = str(arrays["comparison"])
+            self.aggregation = str(arrays["aggregation"])
+            self.base_score = float(arrays["base_score"])
+            if self.precision == "binned":
+                self.bin_edges = arrays["bin_edges"]
+                self.bin_offsets = arrays["bin_offsets"]
+        else:
+            raise ValueError(f"Unknown native model kind {self.kind}")
+
+    @classmethod
+    def load(cls, file_path, mmap_arrays=True):
+        arrays = _map_npz(file_path) if mmap_arrays else None
+        if arrays is not None:
+            return cls(arrays)
+        with np.load(file_path, allow_pickle=False) as data:
+            return cls({key: data[key] for key in data.files})
+
+    def predict(self, X, chunk_size=4096):
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"Feature shape mismatch, expected: {self.n_features_in_}, got {X.shape[-1]}")
+        if self.kind == "linear":
+            if self.precision != "float64":
+                return (X.astype(np.float32) @ self.coef).astype(np.float64) + self.intercept
+            return X @ self.coef + self.intercept
+        if len(X) <= chunk_size:
+            return self._predict_trees(X)
+        return np.concatenate([self._predict_trees(X[start:start + chunk_size])
+                               for start in range(0, len(X), chunk_size)])
+
+    def _bin(self, X):
+        # Bin codes are compared as "code <= rank" whichever way the model compares raw values
+        side = "left" if self.comparison == "le" else "right"
+        codes = np.zeros(X.shape, dtype=self.threshold.dtype)
+        for index in np.flatnonzero(np.diff(self.bin_offsets)):
+            edges = self.bin_edges[self.bin_offsets[index]:self.bin_offsets[index + 1]]
+            codes[:, index] = np.searchsorted(edges, X[:, index], side=side)
+        return codes
+
+    def _predict_reduced(self, X):
+        # Nodes are in the sibling layout from reduce_precision: leaves loop to themselves
+        X = X.astype(np.float32)
+        missing = np.isnan(X)
+        any_missing = missing.any()
+        binned = self.precision == "binned"
+        if binned:
+            X = self._bin(X)
+        rows = np.arange(len(X))[:, None]
+        node = np.broadcast_to(self.roots, (len(X), len(self.roots))).copy()
+        for _ in range(self.max_depth):
+            feature = self.feature[node]
+            x = X[rows, feature]
+            if self.comparison == "le" or binned:
+                go_right = x > self.threshold[node]
+            else:
+                go_right = x >= self.threshold[node]
+            if any_missing:
+                go_right = np.where(missing[rows, feature], ~self.default_left[node], go_right)
+            node = self.left[node] + go_right
+
+        leaf_values = self.value[node]
+        if self.aggregation == "mean":
+            return leaf_values.mean(axis=1, dtype=np.float64)
+        return leaf_values.sum(axis=1, dtype=np.float64) + self.base_score
+
+    def _predict_trees(self, X):
+        if self.precision != "float64":
+            return self._predict_reduced(X)
+        # Both sklearn and XGBoost compare features in float32
+        X = X.astype(np.float32)
+        rows = np.arange(len(X))[:, None]
+        node = np.broadcast_to(self.roots, (len(X), len(self.roots))).copy()
+
+        for _ in range(self.max_depth):
+            left = self.left[node]
+            internal = left >= 0
+            if not internal.any():
+                break
+            x = X[rows, self.feature[node]]
+            if self.comparison == "le":
+                go_left = x <= self.threshold[node]
+            else:
+                go_left = x < self.threshold[node]
+            missing = np.isnan(x)
+            if missing.any():
+                go_left = np.where(missing, self.default_left[node], go_left)
+            node = np.where(internal, np.where(go_left, left, self.right[node]), node)
+
+        leaf_values = self.value[node]
+        if self.aggregation == "mean":
+            return leaf_values.mean(axis=1)
+        return leaf_values.sum(axis=1) + self.base_score
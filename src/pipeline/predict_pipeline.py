@@ -1,29 +1,401 @@
 import sys
 import os
-import pandas as pd
+import time
+import numpy as np
+from contextlib import nullcontext
 from src.exception import CustomException
-from src.utils import load_object
+from src.logger import logging
+from src.pipeline.model_registry import ModelRegistry, ModelRegistryConfig
+from src.pipeline.micro_batcher import MicroBatcher, MicroBatcherConfig
+from src.pipeline.prediction_cache import PredictionCache, PredictionCacheConfig
+from src.pipeline.serving_metrics import ServingMetrics
+from src.pipeline.request_schema import RequestSchema, parse_json
+
+# What a transform raises for values it cannot encode; anything else is not the rows' fault
+ROW_DATA_ERRORS = (ValueError, TypeError, KeyError)
+# Transform calls spent bisecting a rejected batch before the rows still unresolved are failed together
+MAX_ISOLATION_TRANSFORMS = 64
+
+MIN_CREDIT_SCORE = 300
+MAX_CREDIT_SCORE = 850
+
+
+def get_credit_rating(credit_score):
+    """Convert credit score to credit rating"""
+    if credit_score >= 800:
+        return "Excellent"
+    elif credit_score >= 740:
+        return "Very Good"
+    elif credit_score >= 670:
+        return "Good"
+    elif credit_score >= 580:
+        return "Fair"
+    else:
+        return "Poor"
+
+
+def get_credit_ratings(credit_scores):
+    """Vectorized get_credit_rating; NaN scores get None"""
+    credit_scores = np.asarray(credit_scores, dtype=np.float64)
+    return np.select(
+        [credit_scores >= 800, credit_scores >= 740, credit_scores >= 670, credit_scores >= 580, credit_scores < 580],
+        ["Excellent", "Very Good", "Good", "Fair", "Poor"],
+        default=None,
+    )
+
+
+def clamp_credit_score(credit_score):
+    """Keep a raw model output within the 300-850 credit score range"""
+    return max(MIN_CREDIT_SCORE, min(MAX_CREDIT_SCORE, float(credit_score)))
+
+
+def format_prediction(user_id, prediction):
+    credit_score = clamp_credit_score(prediction)
+    return {
+        'credit_score': int(credit_score),
+        'credit_rating': get_credit_rating(credit_score),
+        'user_id': user_id
+    }
 
 
 class PredictPipeline:
-    def __init__(self):
-        pass
+    def __init__(self, registry=None, micro_batcher_config=None, prediction_cache_config=None, metrics=None):
+        self.registry = registry or ModelRegistry()
+        self.micro_batcher = None
+        self.prediction_cache = None
+        self.metrics = metrics
+        self._schema = None
+        if micro_batcher_config is not None:
+            self.enable_micro_batching(micro_batcher_config)
+        if prediction_cache_config is not None:
+            # Entries follow the version the registry serves, not whichever bundle looked last
+            self.prediction_cache = PredictionCache(prediction_cache_config,
+                                                    current_version=lambda: self.registry.get().version)
+
+    @classmethod
+    def from_environment(cls):
+        '''
+        Builds the serving pipeline from environment variables:
+        NATIVE_MODEL=1 serves artifacts/model_native.npz,
+        PREDICTION_CACHE_SIZE / PREDICTION_CACHE_TTL_SECONDS size the cache (0 disables it),
+        MICRO_BATCHING=1 with MICRO_BATCH_MAX_SIZE / MICRO_BATCH_WAIT_MS enables micro-batching,
+        SERVING_METRICS=0 turns off the per-stage timings behind /metrics.
+        '''
+        registry_config = ModelRegistryConfig()
+        if os.environ.get('NATIVE_MODEL', '0') == '1':
+            registry_config.native_model_path = os.path.join("artifacts", "model_native.npz")
+
+        prediction_cache_config = None
+        cache_size = int(os.environ.get('PREDICTION_CACHE_SIZE', 10000))
+        if cache_size > 0:
+            prediction_cache_config = PredictionCacheConfig(
+                max_entries=cache_size,
+                ttl_seconds=float(os.environ.get('PREDICTION_CACHE_TTL_SECONDS', 300))
+            )
+
+        micro_batcher_config = None
+        if os.environ.get('MICRO_BATCHING', '0') == '1':
+            micro_batcher_config = MicroBatcherConfig(
+                max_batch_size=int(os.environ.get('MICRO_BATCH_MAX_SIZE', 64)),
+                max_wait_ms=float(os.environ.get('MICRO_BATCH_WAIT_MS', 2.0)),
+                timeout_seconds=float(os.environ.get('MICRO_BATCH_TIMEOUT_SECONDS', 30.0))
+            )
 
-    def predict(self,features):
+        metrics = ServingMetrics() if os.environ.get('SERVING_METRICS', '1') == '1' else None
+
+        return cls(ModelRegistry(registry_config), micro_batcher_config, prediction_cache_config, metrics)
+
+    def enable_micro_batching(self, config=None):
+        '''
+        Routes predict calls through a MicroBatcher that merges concurrent
+        requests into one vectorized transform and predict.
+        '''
+        self.micro_batcher = MicroBatcher(self._predict_now, config)
+        return self.micro_batcher
+
+    def stage(self, name):
+        '''
+        Times a block as one stage of the request in the serving metrics.
+        '''
+        if self.metrics is None:
+            return nullcontext()
+        return self.metrics.stage(name)
+
+    def schema(self, bundle):
+        '''
+        The request schema for bundle, allowing the categories its
+        preprocessor was fitted on. Compiled once per model version.
+        '''
+        cached = self._schema
+        if cached is None or cached[0] != bundle.version:
+            cached = self._schema = (bundle.version, RequestSchema.for_bundle(bundle))
+        return cached[1]
+
+    def warm_up(self):
+        '''
+        Runs one prediction on a placeholder record (the imputers' fill
+        values) and compiles the request schema, so the first real request
+        does not pay for lazy initialisation. Returns the seconds taken, or
+        None if the warm-up could not run; it never fails startup.
+        '''
+        started = time.perf_counter()
+        try:
+            bundle = self.registry.get()
+            self.schema(bundle)
+            if bundle.encoder is not None:
+                blocks = [(block.columns, block.fill_values) for block in bundle.encoder.blocks]
+            else:
+                blocks = [(columns, transformer.steps[0][1].statistics_)
+                          for _, transformer, columns in bundle.preprocessor.transformers_
+                          if hasattr(transformer, "steps")]
+            record = {column: value for columns, values in blocks for column, value in zip(columns, values)}
+            bundle.model.predict(bundle.transform([record]))
+            return time.perf_counter() - started
+        except Exception as e:
+            logging.warning(f"Warm-up prediction skipped: {e}")
+            return None
+
+    def start(self, warm_up=True):
+        '''
+        Loads the artifacts and optionally warms up, returning the timings
+        for the startup report. Raises CustomException if loading fails.
+        '''
+        started = time.perf_counter()
+        self.registry.load()
+        timings = {'artifact_load_seconds': time.perf_counter() - started}
+        if warm_up:
+            timings['warm_up_seconds'] = self.warm_up()
+        return timings
+
+    def format_prediction(self, user_id, prediction):
+        if self.metrics is not None and not MIN_CREDIT_SCORE <= prediction <= MAX_CREDIT_SCORE:
+            self.metrics.clamped_scores.inc()
+        return format_prediction(user_id, prediction)
+
+    def _predict_now(self, features, bundle=None):
+        bundle=bundle or self.registry.get()
+        with self.stage("preprocess"):
+            data_scaled=bundle.transform(features)
+        with self.stage("inference"):
+            return bundle.model.predict(data_scaled)
+
+    def predict(self,features,bundle=None):
+        '''
+        Predicts a DataFrame of raw features or a list of record dicts with
+        bundle, or with the registry's current bundle when none is given.
+        '''
         try:
-            model_path=os.path.join("artifacts","model.pkl")
-            preprocessor_path=os.path.join('artifacts','preprocessor.pkl')
-            print("Before Loading")
-            model=load_object(file_path=model_path)
-            preprocessor=load_object(file_path=preprocessor_path)
-            print("After Loading")
-            data_scaled=preprocessor.transform(features)
-            preds=model.predict(data_scaled)
-            return preds
+            if self.micro_batcher is not None:
+                return self.micro_batcher.predict(features, group=bundle)
+            return self._predict_now(features, bundle)
         
         except Exception as e:
             raise CustomException(e,sys)
 
+    def predict_record(self, data):
+        '''
+        Scores one raw request payload and returns the clamped score and rating.
+        Raises RequestValidationError for a payload that does not match the schema.
+        '''
+        bundle = self.registry.get()
+        with self.stage("custom_data"):
+            row = self.schema(bundle).validate(data)
+        cache = self.prediction_cache
+        if cache is None:
+            return self.format_prediction(data['user_id'], self.predict([row], bundle)[0])
+
+        key = cache.key(row, bundle)
+        prediction = cache.get(key, bundle.version)
+        if prediction is None:
+            # Scored by this bundle, so the entry is stored under the version that produced it
+            prediction = float(self.predict([row], bundle)[0])
+            cache.put(key, bundle.version, prediction)
+        return self.format_prediction(data['user_id'], prediction)
+
+    def predict_batch(self, records, chunk_size=10000):
+        '''
+        Scores an iterable of raw records and yields one result dict per record,
+        in input order. Each chunk of valid records goes through a single
+        preprocessor.transform and model.predict call; a record that fails
+        parsing or scoring gets an error entry instead of failing the batch.
+        '''
+        bundle = self.registry.get()
+        chunk = []
+        for index, record in enumerate(records):
+            chunk.append((index, record))
+            if len(chunk) >= chunk_size:
+                yield from self._score_chunk(bundle, chunk)
+                chunk = []
+        if chunk:
+            yield from self._score_chunk(bundle, chunk)
+
+    def _score_chunk(self, bundle, chunk):
+        results = {}
+        rows = []
+        schema = self.schema(bundle)
+        with self.stage("custom_data"):
+            for index, record in chunk:
+                try:
+                    if isinstance(record, Exception):
+                        raise record
+                    rows.append((index, record, schema.validate(record)))
+                except Exception as e:
+                    user_id = record.get('user_id') if isinstance(record, dict) else None
+                    results[index] = {'index': index, 'user_id': user_id, 'error': _error_message(e)}
+
+        cache = self.prediction_cache
+        pending = []
+        for index, record, row in rows:
+            key = None
+            if cache is not None:
+                key = cache.key(row, bundle)
+                prediction = cache.get(key, bundle.version)
+                if prediction is not None:
+                    results[index] = {'index': index, **self.format_prediction(record.get('user_id'), prediction)}
+                    continue
+            pending.append((index, record, row, key))
+
+        if pending:
+            predictions = self._predict_rows(bundle, [row for _, _, row, _ in pending])
+            for (index, record, _, key), prediction in zip(pending, predictions):
+                if isinstance(prediction, Exception):
+                    results[index] = {'index': index, 'user_id': record.get('user_id'), 'error': _error_message(prediction)}
+                    continue
+                if key is not None:
+                    cache.put(key, bundle.version, float(prediction))
+                results[index] = {'index': index, **self.format_prediction(record.get('user_id'), prediction)}
+
+        for index, _ in chunk:
+            yield results[index]
+
+    def predict_frame(self, frame):
+        '''
+        Scores a DataFrame of raw records, validated column by column, and
+        returns user_id, credit_score and credit_rating in the same row
+        order plus an error column. Rows that fail get no score or rating.
+        '''
+        import pandas as pd
+
+        bundle = self.registry.get()
+        with self.stage("custom_data"):
+            features, errors = self.schema(bundle).validate_frame(frame)
+        predictions = np.full(len(frame), np.nan)
+        messages = np.full(len(frame), None, dtype=object)
+        for position, problems in errors.items():
+            messages[position] = "; ".join(problems)
+
+        positions = np.setdiff1d(np.arange(len(frame)), list(errors))
+        if len(positions):
+            for position, prediction in zip(positions, self._predict_rows(bundle, features.iloc[positions])):
+                if isinstance(prediction, Exception):
+                    messages[position] = _error_message(prediction)
+                else:
+                    predictions[position] = prediction
+
+        credit_scores = np.clip(predictions, MIN_CREDIT_SCORE, MAX_CREDIT_SCORE)
+        user_ids = frame['user_id'].to_numpy() if 'user_id' in frame else np.full(len(frame), None, dtype=object)
+        return pd.DataFrame({
+            'user_id': user_ids,
+            'credit_score': pd.Series(np.floor(credit_scores)).astype("Int64"),
+            'credit_rating': get_credit_ratings(credit_scores),
+            'error': messages,
+        })
+
+    def _predict_rows(self, bundle, features):
+        '''
+        Predicts rows that passed schema validation in one vectorized call.
+        If the transform still rejects the data, the rows are bisected to
+        find the ones at fault and the rest are predicted; any other error
+        is raised for the whole call.
+        '''
+        try:
+            with self.stage("preprocess"):
+                data_scaled = bundle.transform(features)
+        except ROW_DATA_ERRORS as e:
+            return self._predict_isolating_rows(bundle, features, e)
+        with self.stage("inference"):
+            return list(bundle.model.predict(data_scaled))
+
+    def _predict_isolating_rows(self, bundle, features, batch_error):
+        '''
+        Bisects a rejected batch with transform calls only, so k bad rows
+        cost about 2k log2(N/k) transforms, and predicts each segment that
+        transformed. After MAX_ISOLATION_TRANSFORMS calls the unresolved
+        rows get batch_error.
+        '''
+        middle = len(features) // 2
+        pending = [list(range(middle, len(features))), list(range(middle))]
+        outcomes, transforms, isolated = [], 0, False
+        while pending:
+            positions = pending.pop()
+            if not positions:
+                continue
+            if transforms >= MAX_ISOLATION_TRANSFORMS:
+                outcomes.append((positions, batch_error))
+                continue
+            transforms += 1
+            try:
+                with self.stage("preprocess"):
+                    outcomes.append((positions, bundle.transform(_take_rows(features, positions))))
+            except ROW_DATA_ERRORS as e:
+                if len(positions) == 1:
+                    outcomes.append((positions, e))
+                    isolated = True
+                else:
+                    middle = len(positions) // 2
+                    pending += [positions[middle:], positions[:middle]]
+        if not isolated and all(isinstance(outcome, Exception) for _, outcome in outcomes):
+            # No row fails on its own and nothing transformed, so the fault is not in particular rows
+            raise batch_error
+
+        results = [None] * len(features)
+        for positions, outcome in outcomes:
+            if isinstance(outcome, Exception):
+                predictions = [outcome] * len(positions)
+            else:
+                with self.stage("inference"):
+                    predictions = bundle.model.predict(outcome)
+            for position, prediction in zip(positions, predictions):
+                results[position] = prediction
+        return results
+
+
+def startup_report(started, timings):
+    '''
+    How long the service took to become ready since started (a
+    perf_counter taken before its imports) and how much it imported.
+    '''
+    report = {name: None if seconds is None else round(seconds, 4) for name, seconds in timings.items()}
+    report['ready_seconds'] = round(time.perf_counter() - started, 4)
+    report['modules_loaded'] = len(sys.modules)
+    # Serving from preprocessor_compiled.json and model_native.npz needs none of these
+    report['heavy_modules'] = [name for name in ('pandas', 'scipy', 'sklearn', 'xgboost') if name in sys.modules]
+    return report
+
+
+def iter_json_lines(lines):
+    """Parse newline-delimited JSON, yielding an exception in place of a bad line"""
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield parse_json(line)
+        except ValueError as e:
+            yield e
+
+
+def _take_rows(features, positions):
+    if hasattr(features, "iloc"):
+        return features.iloc[positions]
+    return [features[position] for position in positions]
+
+
+def _error_message(error):
+    if isinstance(error, KeyError):
+        return f"missing field {error}"
+    return str(error)
+
 
 
 class CustomData:
@@ -68,28 +440,34 @@ class CustomData:
         self.region = region
         self.record_date = record_date
 
+    def get_data_as_dict(self):
+        return {
+            "user_id":self.user_id,
+            "age":self.age,
+            "gender":self.gender,
+            "education_level":self.education_level,
+            "employment_status":self.employment_status,
+            "job_title":self.job_title,
+            "monthly_income_usd":self.monthly_income_usd,
+            "monthly_expenses_usd":self.monthly_expenses_usd,
+            "savings_usd":self.savings_usd,
+            "has_loan":self.has_loan,
+            "loan_type":self.loan_type,
+            "loan_amount_usd":self.loan_amount_usd,
+            "loan_term_months":self.loan_term_months,
+            "monthly_emi_usd":self.monthly_emi_usd,
+            "loan_interest_rate_pct":self.loan_interest_rate_pct,
+            "debt_to_income_ratio":self.debt_to_income_ratio,
+            "savings_to_income_ratio":self.savings_to_income_ratio,
+            "region":self.region,
+            "record_date":self.record_date
+        }
+
     def get_data_as_data_frame(self):
         try:
+            import pandas as pd
             custom_data_input_dict = {
-                "user_id":[self.user_id],
-                "age":[self.age],
-                "gender":[self.gender],
-                "education_level":[self.education_level],
-                "employment_status":[self.employment_status],
-                "job_title":[self.job_title],
-                "monthly_income_usd":[self.monthly_income_usd],
-                "monthly_expenses_usd":[self.monthly_expenses_usd],
-                "savings_usd":[self.savings_usd],
-                "has_loan":[self.has_loan],
-                "loan_type":[self.loan_type],
-                "loan_amount_usd":[self.loan_amount_usd],
-                "loan_term_months":[self.loan_term_months],
-                "monthly_emi_usd":[self.monthly_emi_usd],
-                "loan_interest_rate_pct":[self.loan_interest_rate_pct],
-                "debt_to_income_ratio":[self.debt_to_income_ratio],
-                "savings_to_income_ratio":[self.savings_to_income_ratio],
-                "region":[self.region],
-                "record_date":[self.record_date]
+                key: [value] for key, value in self.get_data_as_dict().items()
             }
 
             return pd.DataFrame(custom_data_input_dict)
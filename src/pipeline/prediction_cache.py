@@ -0,0 +1,121 @@
+import time
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+# CustomData fields the preprocessor drops, used when the preprocessor does not list its inputs
+NON_MODEL_FIELDS = ("user_id", "record_date")
+
+
+@dataclass
+class PredictionCacheConfig:
+    max_entries: int = 10000
+    ttl_seconds: float = 300.0
+
+
+def _canonical(value):
+    # 30, 30.0 and "30"-cast-to-int must share an entry; any missing value is None
+    if value is None or (isinstance(value, float) and value != value):
+        return None
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return value
+
+
+class PredictionCache:
+    '''
+    In-process LRU cache of raw model outputs with a time-to-live, keyed on
+    the model-relevant fields of a record. Entries belong to one model
+    version; the first lookup after that version changes empties the cache.
+
+    current_version returns the version being served (the registry's). With
+    it, callers still holding an older bundle during a reload neither clear
+    the cache nor store into it; without it the version of the latest
+    lookup is taken as current.
+    '''
+    def __init__(self, config=None, current_version=None):
+        self.config = config or PredictionCacheConfig()
+        self.current_version = current_version
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = None
+        self._columns = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def _model_columns(self, bundle):
+        if self._columns is None or self._columns[0] != bundle.version:
+            columns = getattr(bundle.preprocessor, "feature_names_in_", None)
+            if columns is None and bundle.encoder is not None:
+                columns = bundle.encoder.columns
+            self._columns = (bundle.version, None if columns is None else tuple(columns))
+        return self._columns[1]
+
+    def key(self, record, bundle):
+        '''
+        Builds the cache key of a record dict from the fields the model sees.
+        '''
+        columns = self._model_columns(bundle)
+        if columns is None:
+            columns = sorted(field for field in record if field not in NON_MODEL_FIELDS)
+        return tuple(_canonical(record[column]) for column in columns)
+
+    def _check_version(self, version):
+        # Only a change of the current version empties the cache; returns the current version
+        current = version if self.current_version is None else self.current_version()
+        if current != self._version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._version = current
+        return current
+
+    def get(self, key, version):
+        with self._lock:
+            if self._check_version(version) != version:
+                self.misses += 1
+                return None
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, version, value):
+        with self._lock:
+            current = self._version if self.current_version is None else self._check_version(version)
+            if version != current:
+                # Scored by a model that is no longer current; do not cache it
+                return
+            self._entries[key] = (value, time.monotonic() + self.config.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.config.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.config.max_entries,
+                "ttl_seconds": self.config.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "model_version": self._version,
+            }
@@ -0,0 +1,259 @@
+import json
+import math
+from dataclasses import dataclass
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class RequestValidationError(ValueError):
+    '''
+    A request that does not match the schema. Carries every problem found,
+    one message per field, and deliberately no traceback detail.
+    '''
+    def __init__(self, errors):
+        super().__init__("; ".join(errors))
+        self.errors = list(errors)
+
+
+def parse_json(body):
+    '''
+    Decodes a request body with orjson when it is installed, raising
+    RequestValidationError for an empty or malformed body.
+    '''
+    if not body:
+        raise RequestValidationError(["No data provided"])
+    try:
+        if orjson is not None:
+            return orjson.loads(body)
+        return json.loads(body)
+    except ValueError as e:
+        raise RequestValidationError([f"invalid JSON: {e}"])
+
+
+@dataclass(frozen=True)
+class FieldSpec:
+    name: str
+    # "int", "float", "category" or "string"
+    kind: str
+    nullable: bool = False
+    minimum: float = None
+    maximum: float = None
+
+
+# The CustomData fields. Categorical fields may be null (the imputer fills them); ranges are domain limits
+CUSTOM_DATA_FIELDS = (
+    FieldSpec("user_id", "string"),
+    FieldSpec("age", "int", minimum=18, maximum=120),
+    FieldSpec("gender", "category", nullable=True),
+    FieldSpec("education_level", "category", nullable=True),
+    FieldSpec("employment_status", "category", nullable=True),
+    FieldSpec("job_title", "category", nullable=True),
+    FieldSpec("monthly_income_usd", "float", minimum=0),
+    FieldSpec("monthly_expenses_usd", "float", minimum=0),
+    FieldSpec("savings_usd", "float", minimum=0),
+    FieldSpec("has_loan", "category", nullable=True),
+    FieldSpec("loan_type", "category", nullable=True),
+    FieldSpec("loan_amount_usd", "float", minimum=0),
+    FieldSpec("loan_term_months", "int", minimum=0, maximum=600),
+    FieldSpec("monthly_emi_usd", "float", minimum=0),
+    FieldSpec("loan_interest_rate_pct", "float", minimum=0, maximum=100),
+    FieldSpec("debt_to_income_ratio", "float", minimum=0),
+    FieldSpec("savings_to_income_ratio", "float", minimum=0),
+    FieldSpec("region", "category", nullable=True),
+    FieldSpec("record_date", "string"),
+)
+
+
+def _parse_text(value):
+    # pd.to_numeric, which validate_frame uses, takes neither digit separators nor non-ASCII digits
+    if not value.isascii() or "_" in value:
+        raise ValueError
+    return float(value)
+
+
+def _to_int(value):
+    if isinstance(value, bool):
+        raise ValueError
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str):
+        value = _parse_text(value)
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    raise ValueError
+
+
+def _to_float(value):
+    if isinstance(value, bool):
+        raise ValueError
+    if isinstance(value, str):
+        value = _parse_text(value)
+    value = float(value) if isinstance(value, (int, float)) else None
+    if value is None or not math.isfinite(value):
+        raise ValueError
+    return value
+
+
+def _compile_field(spec, allowed):
+    '''
+    Builds parse(value) -> (converted value, error or None) for one field.
+    '''
+    name = spec.name
+    if spec.kind in ("int", "float"):
+        convert, expected = (_to_int, "an integer") if spec.kind == "int" else (_to_float, "a number")
+        minimum, maximum = spec.minimum, spec.maximum
+
+        def parse(value):
+            try:
+                value = convert(value)
+            except (ValueError, TypeError, OverflowError):
+                return None, f"field '{name}': expected {expected}, got {value!r}"
+            if (minimum is not None and value < minimum) or (maximum is not None and value > maximum):
+                return None, f"field '{name}': {value} is outside [{minimum}, {maximum}]"
+            return value, None
+        return parse
+
+    def parse(value):
+        if not isinstance(value, str):
+            return None, f"field '{name}': expected a string, got {value!r}"
+        if allowed is not None and value not in allowed:
+            return None, f"field '{name}': unknown value {value!r}, expected one of {sorted(allowed)}"
+        return value, None
+    return parse
+
+
+def categories_from_preprocessor(preprocessor):
+    '''
+    {column: allowed values} for the columns one-hot encoded with
+    handle_unknown="error", where an unseen value would fail the transform.
+    '''
+    allowed = {}
+    for _, transformer, columns in getattr(preprocessor, "transformers_", []):
+        for step in getattr(transformer, "steps", [("", transformer)]):
+            encoder = step[1]
+            if type(encoder).__name__ == "OneHotEncoder" and encoder.handle_unknown == "error":
+                for column, categories in zip(columns, encoder.categories_):
+                    allowed[column] = frozenset(c for c in categories if isinstance(c, str))
+    return allowed
+
+
+def categories_from_encoder(encoder):
+    '''
+    The same mapping as categories_from_preprocessor, read from a FastEncoder.
+    '''
+    allowed = {}
+    for block in encoder.blocks:
+        if getattr(block, "handle_unknown", None) == "error":
+            for column, vocabulary in zip(block.columns, block.vocabularies):
+                allowed[column] = frozenset(c for c in vocabulary if isinstance(c, str))
+    return allowed
+
+
+class RequestSchema:
+    '''
+    The request fields compiled into one parser per field. validate()
+    checks a record in a single pass and reports every bad field at once.
+    '''
+    def __init__(self, fields=CUSTOM_DATA_FIELDS, categories=None):
+        categories = categories or {}
+        self._specs = [(spec, categories.get(spec.name)) for spec in fields]
+        self._fields = [(spec.name, spec.nullable, _compile_field(spec, allowed)) for spec, allowed in self._specs]
+
+    @classmethod
+    def for_preprocessor(cls, preprocessor):
+        return cls(categories=categories_from_preprocessor(preprocessor))
+
+    @classmethod
+    def for_bundle(cls, bundle):
+        if bundle.encoder is not None:
+            return cls(categories=categories_from_encoder(bundle.encoder))
+        return cls.for_preprocessor(bundle.preprocessor)
+
+    def validate(self, data):
+        '''
+        Returns the record as a row dict for the preprocessor (missing
+        categorical values as NaN) or raises RequestValidationError.
+        '''
+        if not isinstance(data, dict):
+            raise RequestValidationError([f"expected a JSON object, got {type(data).__name__}"])
+        row, errors = {}, []
+        for name, nullable, parse in self._fields:
+            if name not in data:
+                errors.append(f"missing field '{name}'")
+                continue
+            value = data[name]
+            if value is None:
+                if nullable:
+                    row[name] = math.nan
+                else:
+                    errors.append(f"field '{name}' must not be null")
+                continue
+            value, error = parse(value)
+            if error is not None:
+                errors.append(error)
+            row[name] = value
+        if errors:
+            raise RequestValidationError(errors)
+        return row
+
+    def validate_frame(self, frame):
+        '''
+        validate() for a DataFrame of records, one column at a time. Returns
+        the rows ready for the preprocessor and {row position: [problems]}
+        for the rows that failed, with the same messages as validate().
+        '''
+        import numpy as np
+        import pandas as pd
+
+        errors = {}
+
+        def report(mask, message):
+            for position in np.flatnonzero(mask):
+                errors.setdefault(int(position), []).append(message(int(position)))
+
+        rows = {}
+        for spec, allowed in self._specs:
+            name = spec.name
+            if name not in frame:
+                report(np.ones(len(frame), dtype=bool), lambda _: f"missing field '{name}'")
+                continue
+            column = frame[name].reset_index(drop=True)
+            missing = column.isna().to_numpy()
+            if not spec.nullable:
+                report(missing, lambda _: f"field '{name}' must not be null")
+
+            if spec.kind in ("int", "float"):
+                values = pd.to_numeric(column, errors="coerce").to_numpy(dtype=np.float64)
+                if column.dtype == object:
+                    # validate() refuses booleans, which pd.to_numeric reads as 0 and 1
+                    values[column.map(lambda value: isinstance(value, bool)).to_numpy(dtype=bool)] = np.nan
+                invalid = ~missing & ~np.isfinite(values)
+                if spec.kind == "int":
+                    with np.errstate(invalid="ignore"):
+                        invalid |= ~missing & np.isfinite(values) & (values % 1 != 0)
+                expected = "an integer" if spec.kind == "int" else "a number"
+                report(invalid, lambda position: f"field '{name}': expected {expected}, got {column[position]!r}")
+                out_of_range = np.zeros(len(frame), dtype=bool)
+                if spec.minimum is not None:
+                    out_of_range |= values < spec.minimum
+                if spec.maximum is not None:
+                    out_of_range |= values > spec.maximum
+                cast = int if spec.kind == "int" else float
+                report(out_of_range & ~invalid, lambda position: (
+                    f"field '{name}': {cast(values[position])} is outside [{spec.minimum}, {spec.maximum}]"))
+                rows[name] = values
+                continue
+
+            if pd.api.types.infer_dtype(column, skipna=True) not in ("string", "empty"):
+                not_text = ~missing & ~column.map(lambda value: isinstance(value, str)).to_numpy(dtype=bool)
+                report(not_text, lambda position: f"field '{name}': expected a string, got {column[position]!r}")
+                missing |= not_text
+            if allowed is not None:
+                unknown = ~missing & ~column.isin(allowed).to_numpy()
+                report(unknown, lambda position: (
+                    f"field '{name}': unknown value {column[position]!r}, expected one of {sorted(allowed)}"))
+            rows[name] = column.where(~missing, np.nan)
+        return pd.DataFrame(rows), errors
@@ -0,0 +1,182 @@
+import time
+import threading
+from bisect import bisect_left
+from dataclasses import dataclass
+
+# Upper bounds in seconds; the hot path stages run from tens of microseconds to a few milliseconds
+DEFAULT_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25,
+                   0.5, 1.0, 2.5)
+
+
+@dataclass
+class ServingMetricsConfig:
+    buckets: tuple = DEFAULT_BUCKETS
+    prefix: str = "credit"
+
+
+class _PerThread:
+    '''
+    Per-thread shards of a metric. Recording touches only the calling
+    thread's shard, so it takes no lock; a scrape adds the shards up. Shards
+    of threads that have exited are folded into one retired shard, so
+    servers that start a thread per request do not accumulate them.
+    '''
+    def __init__(self, new_shard, merge):
+        self._new_shard = new_shard
+        self._merge = merge
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards = []
+        self._retired = new_shard()
+
+    def shard(self):
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = self._new_shard()
+            with self._lock:
+                self._shards.append((threading.current_thread(), shard))
+            return shard
+
+    def collect(self):
+        with self._lock:
+            live = []
+            for thread, shard in self._shards:
+                if thread.is_alive():
+                    live.append((thread, shard))
+                else:
+                    self._merge(self._retired, shard)
+            self._shards = live
+            total = self._new_shard()
+            self._merge(total, self._retired)
+            for _, shard in live:
+                self._merge(total, shard)
+            return total
+
+
+def _merge_counts(into, shard):
+    # dict() takes a consistent copy even while the owning thread keeps counting
+    for key, value in dict(shard).items():
+        into[key] = into.get(key, 0) + value
+
+
+class Counter:
+    '''
+    Monotonic counters keyed by a label value.
+    '''
+    def __init__(self):
+        self._cells = _PerThread(dict, _merge_counts)
+
+    def inc(self, key="", amount=1):
+        shard = self._cells.shard()
+        shard[key] = shard.get(key, 0) + amount
+
+    def values(self):
+        return self._cells.collect()
+
+
+class Histogram:
+    '''
+    Cumulative-bucket histogram of durations in seconds, keyed by a label
+    value. A shard maps each key to [bucket counts..., +Inf count, sum].
+    '''
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._cells = _PerThread(dict, self._merge)
+
+    def _merge(self, into, shard):
+        for key, cells in dict(shard).items():
+            total = into.setdefault(key, [0] * (len(self.buckets) + 1) + [0.0])
+            for i, value in enumerate(list(cells)):
+                total[i] += value
+
+    def observe(self, key, seconds):
+        shard = self._cells.shard()
+        cells = shard.get(key)
+        if cells is None:
+            cells = shard[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        cells[bisect_left(self.buckets, seconds)] += 1
+        cells[-1] += seconds
+
+    def values(self):
+        return self._cells.collect()
+
+
+class StageTimer:
+    '''
+    Context manager that records the time spent in its block under a stage.
+    '''
+    __slots__ = ("histogram", "stage", "started")
+
+    def __init__(self, histogram, stage):
+        self.histogram = histogram
+        self.stage = stage
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(self.stage, time.perf_counter() - self.started)
+        return False
+
+
+def _labels(**labels):
+    return "{" + ",".join(f'{name}="{str(value)}"' for name, value in labels.items()) + "}"
+
+
+class ServingMetrics:
+    '''
+    Request counters and per-stage latency histograms for the prediction
+    service, rendered in the Prometheus text format.
+    '''
+    def __init__(self, config=None):
+        self.config = config or ServingMetricsConfig()
+        self.stage_seconds = Histogram(self.config.buckets)
+        self.requests = Counter()
+        self.errors = Counter()
+        self.clamped_scores = Counter()
+
+    def stage(self, name):
+        return StageTimer(self.stage_seconds, name)
+
+    def observe(self, name, seconds):
+        self.stage_seconds.observe(name, seconds)
+
+    def record_request(self, endpoint, failed):
+        self.requests.inc(endpoint)
+        if failed:
+            self.errors.inc(endpoint)
+
+    def render(self, model_info=None):
+        '''
+        Renders every metric in the Prometheus text exposition format.
+        '''
+        prefix = self.config.prefix
+        lines = [f"# HELP {prefix}_predict_stage_seconds Time spent in each stage of a prediction request",
+                 f"# TYPE {prefix}_predict_stage_seconds histogram"]
+        for stage, cells in sorted(self.stage_seconds.values().items()):
+            cumulative = 0
+            for bound, count in zip(self.stage_seconds.buckets + ("+Inf",), cells[:-1]):
+                cumulative += count
+                lines.append(f"{prefix}_predict_stage_seconds_bucket{_labels(stage=stage, le=bound)} {cumulative}")
+            lines.append(f"{prefix}_predict_stage_seconds_sum{_labels(stage=stage)} {cells[-1]:.9f}")
+            lines.append(f"{prefix}_predict_stage_seconds_count{_labels(stage=stage)} {cumulative}")
+
+        for name, counter, help_text in (
+                ("requests_total", self.requests, "Requests handled, by endpoint"),
+                ("errors_total", self.errors, "Requests answered with a 5xx status, by endpoint")):
+            lines += [f"# HELP {prefix}_{name} {help_text}", f"# TYPE {prefix}_{name} counter"]
+            for endpoint, value in sorted(counter.values().items()):
+                lines.append(f"{prefix}_{name}{_labels(endpoint=endpoint)} {value}")
+
+        lines += [f"# HELP {prefix}_clamped_scores_total Predictions clamped into the 300-850 range",
+                  f"# TYPE {prefix}_clamped_scores_total counter",
+                  f"{prefix}_clamped_scores_total {sum(self.clamped_scores.values().values())}"]
+
+        model_info = model_info or {"loaded": False}
+        lines += [f"# HELP {prefix}_model_info Model version being served",
+                  f"# TYPE {prefix}_model_info gauge"]
+        if model_info.get("loaded"):
+            lines.append(f"{prefix}_model_info{_labels(version=model_info['version'])} 1")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,277 @@
+import os
+import sys
+import json
+import time
+import multiprocessing
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field, asdict
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+from src.components.data_ingestion import DataIngestion
+from src.components.data_transformation import DataTransformation
+from src.components.model_trainer import ModelTrainer
+from src.components.stage_cache import StageCache, content_digest, fingerprint, slugify
+from src.pipeline.fast_encoder import compiled_preprocessor_path
+from src.exception import CustomException
+from src.logger import logging
+from src.utils import save_object, load_object
+
+TRANSFORMED_ARRAYS = ("X_train", "y_train", "X_test", "y_test")
+
+
+@dataclass
+class TrainPipelineConfig:
+    transformed_dir: str = os.path.join("artifacts", "transformed")
+    search_dir: str = os.path.join("artifacts", "search")
+    report_file_path: str = os.path.join("artifacts", "pipeline_report.json")
+    # "process" runs every node in a fresh process (and so measures its own peak RSS); "thread" and "serial"
+    # run in-process
+    executor: str = field(default_factory=lambda: os.environ.get("PIPELINE_EXECUTOR", "process"))
+    max_workers: int = field(default_factory=lambda: int(os.environ.get("PIPELINE_MAX_WORKERS",
+                                                                        min(4, os.cpu_count() or 1))))
+
+
+@dataclass(frozen=True)
+class PipelineNode:
+    name: str
+    depends_on: tuple = ()
+
+
+def _peak_rss_mb():
+    # ru_maxrss is in KiB on Linux; None where the resource module is missing
+    if resource is None:
+        return None
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def _run_node(pipeline, name, inputs):
+    '''
+    Executes one node and measures it. Failures come back as a message
+    rather than an exception, since CustomException does not survive
+    pickling across the process pool.
+    '''
+    started, cpu_started = time.time(), time.process_time()
+    try:
+        result, outputs = pipeline.compute_node(name, inputs)
+        error = None
+    except Exception as e:
+        result, outputs, error = None, [], str(e)
+    metrics = {"wall_seconds": round(time.time() - started, 3),
+               "cpu_seconds": round(time.process_time() - cpu_started, 3),
+               "peak_rss_mb": _peak_rss_mb()}
+    return result, outputs, error, metrics
+
+
+class TrainPipeline:
+    '''
+    Training as a dependency graph: ingestion -> transformation -> one
+    search node per model family -> selection. Ready nodes run concurrently
+    on a pool. Every finished node is recorded in the stage cache under a
+    fingerprint of its config and its inputs' fingerprints, so a rerun after
+    a failure, or after changing one stage, resumes from what is still valid.
+    '''
+    def __init__(self):
+        self.train_pipeline_config = TrainPipelineConfig()
+        self.data_ingestion = DataIngestion()
+        self.data_transformation = DataTransformation()
+        self.model_trainer = ModelTrainer()
+        self.stage_cache = StageCache()
+
+    def build_graph(self):
+        models = list(self.model_trainer.get_models())
+        searches = tuple(f"search:{name}" for name in models)
+        return [PipelineNode("ingestion"),
+                PipelineNode("transformation", ("ingestion",)),
+                *(PipelineNode(search, ("transformation",)) for search in searches),
+                PipelineNode("selection", ("transformation", *searches))]
+
+    def node_key(self, name, inputs):
+        '''
+        Fingerprint of a node: what it is configured to do plus the
+        fingerprints of the nodes it reads from.
+        '''
+        upstream = sorted((dependency, result["key"]) for dependency, result in inputs.items())
+        if name == "ingestion":
+            config = self.data_ingestion.ingestion_config
+            return fingerprint(name, asdict(config), content_digest(config.source_file_path))
+        if name == "transformation":
+            config = self.data_transformation.data_transformation_config
+            preprocessor = self.data_transformation.get_data_transformer_object_with_columns(
+                config.numerical_columns, config.categorical_columns)
+            return fingerprint(name, asdict(config), config.preprocessor_obj_file_path,
+                               preprocessor.get_params(deep=True), self.train_pipeline_config.transformed_dir,
+                               upstream)
+        config = self.model_trainer.model_trainer_config
+        if name.startswith("search:"):
+            model_name = name.split(":", 1)[1]
+            # Parallelism and scratch locations do not change the searched model
+            search = {key: value for key, value in asdict(config.search_config).items()
+                      if key not in ("n_jobs", "fold_cache_dir")}
+            return fingerprint(name, search, config.param_grids.get(model_name, {}),
+                               self.model_trainer.get_models()[model_name].get_params(),
+                               self.train_pipeline_config.search_dir, upstream)
+        return fingerprint(name, config.trained_model_file_path, config.native_model_file_path,
+                           config.selection_report_file_path, asdict(config.selection_config), upstream)
+
+    def _transformed_paths(self):
+        directory = self.train_pipeline_config.transformed_dir
+        return {name: os.path.join(directory, f"{name}.npy") for name in TRANSFORMED_ARRAYS}
+
+    def _load_transformed(self):
+        paths = self._transformed_paths()
+        return [np.load(paths[name], mmap_mode="r") for name in TRANSFORMED_ARRAYS]
+
+    def _search_jobs(self):
+        # Share the cores between search nodes running side by side
+        if self.train_pipeline_config.executor == "serial":
+            return None
+        return max(1, (os.cpu_count() or 1) // self.train_pipeline_config.max_workers)
+
+    def compute_node(self, name, inputs):
+        '''
+        Runs one node. Returns (result, output_paths); the result must be
+        JSON-serialisable because it is recorded in the stage manifest.
+        '''
+        if name == "ingestion":
+            train_path, test_path = self.data_ingestion.initiate_data_ingestion()
+            return {"train_path": train_path, "test_path": test_path}, [train_path, test_path]
+
+        if name == "transformation":
+            ingestion = inputs["ingestion"]
+            *arrays, preprocessor_path = self.data_transformation.initiate_data_transformation(
+                ingestion["train_path"], ingestion["test_path"])
+            paths = self._transformed_paths()
+            os.makedirs(self.train_pipeline_config.transformed_dir, exist_ok=True)
+            for array_name, array in zip(TRANSFORMED_ARRAYS, arrays):
+                np.save(paths[array_name], array)
+            return {"preprocessor_path": preprocessor_path}, [preprocessor_path, compiled_preprocessor_path(preprocessor_path),
+                                                              *paths.values()]
+
+        if name.startswith("search:"):
+            model_name = name.split(":", 1)[1]
+            search_result = self.model_trainer.search_model(model_name, *self._load_transformed(),
+                                                            n_jobs=self._search_jobs())
+            estimator_path = os.path.join(self.train_pipeline_config.search_dir, f"{slugify(model_name)}.pkl")
+            save_object(estimator_path, search_result.estimator)
+            return {"model_name": model_name, "estimator_path": estimator_path,
+                    "test_score": float(search_result.test_score),
+                    "cv_score": None if np.isnan(search_result.cv_score) else float(search_result.cv_score),
+                    "best_params": search_result.best_params, "candidates": search_result.candidates,
+                    "search_seconds": round(search_result.wall_seconds, 3)}, [estimator_path]
+
+        searches = [result for dependency, result in inputs.items() if dependency.startswith("search:")]
+        model_report = {result["model_name"]: result["test_score"] for result in searches}
+        estimators = {result["model_name"]: load_object(result["estimator_path"]) for result in searches}
+        X_train, _, X_test, y_test = self._load_transformed()
+        preprocessor = load_object(inputs["transformation"]["preprocessor_path"])
+        r2_square = self.model_trainer.save_best_model(model_report, estimators, X_test, y_test, X_train,
+                                                       getattr(preprocessor, "pair_id_", None))
+        config = self.model_trainer.model_trainer_config
+        return {"r2_score": float(r2_square)}, [config.trained_model_file_path, config.native_model_file_path,
+                                                config.selection_report_file_path]
+
+    def _submit(self, shared_executor, name, inputs):
+        '''
+        Starts a node and returns (future, executor to shut down when it
+        finishes). In process mode every node gets its own short-lived
+        single-worker pool, so its peak RSS is measured in a fresh process.
+        '''
+        if self.train_pipeline_config.executor == "process":
+            executor = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+            return executor.submit(_run_node, self, name, inputs), executor
+        return shared_executor.submit(_run_node, self, name, inputs), None
+
+    def _executor(self):
+        config = self.train_pipeline_config
+        if config.executor == "thread":
+            return ThreadPoolExecutor(max_workers=config.max_workers, thread_name_prefix="pipeline")
+        return None
+
+    def run_graph(self):
+        '''
+        Runs the graph and returns {node: result}. Writes a report with each
+        node's status, wall/CPU time and peak RSS, even when a node fails.
+        '''
+        graph = self.build_graph()
+        results, report, running, failed = {}, {}, {}, []
+        started = time.time()
+        config = self.train_pipeline_config
+        serial = config.executor not in ("process", "thread")
+        executor = self._executor()
+        try:
+            while True:
+                for node in graph:
+                    if node.name in results or node.name in running or node.name in report:
+                        continue
+                    if any(dependency in failed or report.get(dependency, {}).get("status") == "skipped"
+                           for dependency in node.depends_on):
+                        report[node.name] = {"status": "skipped"}
+                        continue
+                    if not all(dependency in results for dependency in node.depends_on):
+                        continue
+                    inputs = {dependency: results[dependency] for dependency in node.depends_on}
+                    key = self.node_key(node.name, inputs)
+                    cached = self.stage_cache.lookup(node.name, key)
+                    if cached is not None:
+                        results[node.name] = cached
+                        report[node.name] = {"status": "cached"}
+                        continue
+                    if serial:
+                        running[node.name] = (key, _run_node(self, node.name, inputs), None)
+                    elif len(running) < config.max_workers:
+                        running[node.name] = (key, *self._submit(executor, node.name, inputs))
+
+                if not running:
+                    break
+                if serial:
+                    done_names = list(running)
+                else:
+                    done, _ = wait([future for _, future, _ in running.values()], return_when=FIRST_COMPLETED)
+                    done_names = [name for name, (_, future, _) in running.items() if future in done]
+                for name in done_names:
+                    key, outcome, node_executor = running.pop(name)
+                    if node_executor is not None:
+                        node_executor.shutdown(wait=True)
+                    result, outputs, error, metrics = outcome if serial else outcome.result()
+                    if error is not None:
+                        failed.append(name)
+                        report[name] = {"status": "failed", "error": error, **metrics}
+                        logging.error(f"Pipeline node {name} failed: {error}")
+                        continue
+                    result = {**result, "key": key}
+                    self.stage_cache.record(name, key, outputs, result)
+                    results[name] = result
+                    report[name] = {"status": "ran", **metrics}
+                    logging.info(f"Pipeline node {name} finished: {metrics}")
+        finally:
+            for _, outcome, node_executor in running.values():
+                if node_executor is not None:
+                    node_executor.shutdown(wait=True)
+            if executor is not None:
+                executor.shutdown(wait=True)
+            self.write_report(report, time.time() - started)
+
+        if failed:
+            raise RuntimeError(f"Pipeline nodes failed: {', '.join(failed)}; rerun to resume")
+        return results
+
+    def write_report(self, report, total_seconds):
+        report_path = self.train_pipeline_config.report_file_path
+        os.makedirs(os.path.dirname(report_path) or ".", exist_ok=True)
+        with open(report_path, "w") as file_obj:
+            json.dump({"total_seconds": round(total_seconds, 3), "nodes": report}, file_obj, indent=2)
+
+    def run(self):
+        try:
+            r2_square = self.run_graph()["selection"]["r2_score"]
+            logging.info(f"Training pipeline finished, test R2 {r2_square:.4f}")
+            return r2_square
+
+        except Exception as e:
+            raise CustomException(e, sys)
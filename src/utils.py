@@ -1,62 +1,129 @@
 import os
 import sys
-
-import numpy as np 
-import pandas as pd
-import dill
+import mmap
+import struct
 import pickle
-from sklearn.metrics import r2_score
-from sklearn.model_selection import GridSearchCV
 
 from src.exception import CustomException
 
+# Artifacts with large NumPy buffers are stored as this header, the pickle
+# stream and the raw buffers, each buffer aligned so it can be mapped in place
+ARTIFACT_MAGIC = b"CRPKL5\n\0"
+ARTIFACT_ALIGNMENT = 64
+# Smaller buffers stay inside the pickle stream
+OUT_OF_BAND_MIN_BYTES = 64 * 1024
+_SPAN = struct.Struct("<QQ")
+
+
+def _aligned(offset):
+    return -(-offset // ARTIFACT_ALIGNMENT) * ARTIFACT_ALIGNMENT
+
+
+def _write_artifact(file_obj, obj):
+    buffers = []
+
+    def out_of_band(buffer):
+        if buffer.raw().nbytes < OUT_OF_BAND_MIN_BYTES:
+            return True
+        buffers.append(buffer.raw())
+        return False
+
+    payload = pickle.dumps(obj, protocol=5, buffer_callback=out_of_band)
+    if not buffers:
+        # Nothing worth mapping: a plain pickle any reader can open
+        file_obj.write(payload)
+        return
+
+    offset = len(ARTIFACT_MAGIC) + _SPAN.size * (len(buffers) + 1) + len(payload)
+    spans = []
+    for buffer in buffers:
+        offset = _aligned(offset)
+        spans.append((offset, buffer.nbytes))
+        offset += buffer.nbytes
+    file_obj.write(ARTIFACT_MAGIC)
+    file_obj.write(_SPAN.pack(len(payload), len(buffers)))
+    for span in spans:
+        file_obj.write(_SPAN.pack(*span))
+    file_obj.write(payload)
+    for (offset, _), buffer in zip(spans, buffers):
+        file_obj.write(bytes(offset - file_obj.tell()))
+        file_obj.write(buffer)
+
+
 def save_object(file_path, obj):
+    '''
+    Pickles obj with protocol 5, keeping large NumPy buffers out of band so
+    load_object can map them. The file is written next to its destination
+    and renamed over it, so readers see the old or the new artifact, never a
+    partial one, and processes that mapped the old file keep a valid copy.
+    '''
     try:
         dir_path = os.path.dirname(file_path)
 
         os.makedirs(dir_path, exist_ok=True)
 
-        with open(file_path, "wb") as file_obj:
-            pickle.dump(obj, file_obj)
+        tmp_path = f"{file_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "wb") as file_obj:
+                _write_artifact(file_obj, obj)
+                file_obj.flush()
+                os.fsync(file_obj.fileno())
+            os.replace(tmp_path, file_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
 
     except Exception as e:
         raise CustomException(e, sys)
     
-def evaluate_models(X_train, y_train,X_test,y_test,models,param):
+def evaluate_models(X_train, y_train,X_test,y_test,models,param,search_config=None):
+    '''
+    Tunes and refits every model in place and returns its test R2 by name.
+    The search itself runs in src.components.model_search.
+    '''
     try:
-        report = {}
-
-        for i in range(len(list(models))):
-            model = list(models.values())[i]
-            para=param[list(models.keys())[i]]
-
-            gs = GridSearchCV(model,para,cv=3)
-            gs.fit(X_train,y_train)
-
-            model.set_params(**gs.best_params_)
-            model.fit(X_train,y_train)
+        from src.components.model_search import search_models
 
-            #model.fit(X_train, y_train)  # Train model
-
-            y_train_pred = model.predict(X_train)
-
-            y_test_pred = model.predict(X_test)
-
-            train_model_score = r2_score(y_train, y_train_pred)
-
-            test_model_score = r2_score(y_test, y_test_pred)
-
-            report[list(models.keys())[i]] = test_model_score
+        results = search_models(models, param, X_train, y_train, X_test, y_test, search_config)
+        report = {}
+        for name, result in results.items():
+            models[name] = result.estimator
+            report[name] = result.test_score
 
         return report
 
     except Exception as e:
         raise CustomException(e, sys)
     
-def load_object(file_path):
+def load_object(file_path, mmap_buffers=True):
+    '''
+    Loads an artifact written by save_object, or any plain pickle. With
+    mmap_buffers the out-of-band arrays are read-only views of a shared
+    mapping of the file, so every process loading the same artifact uses
+    the same physical pages; otherwise they are private, writable copies.
+    '''
     try:
         with open(file_path, "rb") as file_obj:
-            return pickle.load(file_obj)
+            if file_obj.read(len(ARTIFACT_MAGIC)) != ARTIFACT_MAGIC:
+                file_obj.seek(0)
+                return pickle.load(file_obj)
+
+            payload_length, buffer_count = _SPAN.unpack(file_obj.read(_SPAN.size))
+            spans = [_SPAN.unpack(file_obj.read(_SPAN.size)) for _ in range(buffer_count)]
+            payload_start = file_obj.tell()
+            data = None
+            if mmap_buffers:
+                try:
+                    data = memoryview(mmap.mmap(file_obj.fileno(), 0, access=mmap.ACCESS_READ))
+                except (OSError, ValueError):
+                    # Some filesystems cannot be mapped; fall back to reading the file
+                    data = None
+            if data is None:
+                file_obj.seek(0)
+                data = memoryview(bytearray(file_obj.read()))
+
+        return pickle.loads(data[payload_start:payload_start + payload_length],
+                            buffers=[data[offset:offset + length] for offset, length in spans])
 
     except Exception as e:
         raise CustomException(e, sys)
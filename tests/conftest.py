@@ -0,0 +1,39 @@
+import pickle
+import pytest
+import numpy as np
+from sklearn.linear_model import LinearRegression
+from src.components.columnar_store import read_split, split_path
+from src.components.data_ingestion import DataIngestionConfig
+from src.components.data_transformation import DataTransformation
+
+NUMERICAL_COLUMNS = ['age', 'monthly_income_usd', 'monthly_expenses_usd', 'savings_usd',
+                     'loan_amount_usd', 'loan_term_months', 'monthly_emi_usd',
+                     'loan_interest_rate_pct', 'debt_to_income_ratio', 'savings_to_income_ratio']
+CATEGORICAL_COLUMNS = ['gender', 'education_level', 'employment_status', 'job_title',
+                       'has_loan', 'loan_type', 'region']
+
+
+@pytest.fixture(scope="session")
+def sample_frame():
+    """A slice of the training split shared by tests that need real records"""
+    frame = read_split(split_path(DataIngestionConfig().train_store_path)).head(2000)
+    # The columnar store keeps dates and categories typed; tests expect the raw values as in the CSV
+    if np.issubdtype(frame["record_date"].dtype, np.datetime64):
+        frame["record_date"] = frame["record_date"].dt.strftime("%Y-%m-%d")
+    return frame.astype({column: object for column in frame.select_dtypes("category")})
+
+@pytest.fixture(scope="session")
+def fitted_artifacts(tmp_path_factory, sample_frame):
+    """Fit a small preprocessor and model and pickle them like the training pipeline does"""
+    directory = tmp_path_factory.mktemp("artifacts")
+    features = sample_frame.drop(columns=["credit_score", "user_id", "record_date"])
+    preprocessor = DataTransformation().get_data_transformer_object_with_columns(
+        NUMERICAL_COLUMNS, CATEGORICAL_COLUMNS)
+    model = LinearRegression().fit(preprocessor.fit_transform(features), sample_frame["credit_score"])
+
+    paths = {"model_path": str(directory / "model.pkl"),
+             "preprocessor_path": str(directory / "preprocessor.pkl")}
+    for key, obj in (("model_path", model), ("preprocessor_path", preprocessor)):
+        with open(paths[key], "wb") as file_obj:
+            pickle.dump(obj, file_obj)
+    return paths
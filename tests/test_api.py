@@ -1,10 +1,15 @@
 import pytest
 import json
+import app as app_module
 from app import app
+from src.pipeline.model_registry import ModelRegistry, ModelRegistryConfig
 
 @pytest.fixture
-def client():
-    """Create a test client for the Flask app"""
+def client(fitted_artifacts, monkeypatch):
+    """Create a test client for the Flask app serving the small fitted artifacts"""
+    registry = ModelRegistry(ModelRegistryConfig(**fitted_artifacts))
+    registry.load()
+    monkeypatch.setattr(app_module.predict_pipeline, "registry", registry)
     app.config['TESTING'] = True
     with app.test_client() as client:
         yield client
@@ -23,8 +28,8 @@ def test_predict_endpoint_valid_data(client):
         "user_id": "TEST001",
         "age": 30,
         "gender": "Male",
-        "education_level": "Bachelor's",
-        "employment_status": "Full-time",
+        "education_level": "Bachelor",
+        "employment_status": "Employed",
         "job_title": "Engineer",
         "monthly_income_usd": 5000.0,
         "monthly_expenses_usd": 2000.0,
@@ -65,7 +70,8 @@ def test_predict_endpoint_missing_data(client):
                           data=json.dumps(test_data),
                           content_type='application/json')
     
-    assert response.status_code == 500  # Should handle missing fields gracefully
+    assert response.status_code == 400  # Should handle missing fields gracefully
+    assert "missing field 'gender'" in json.loads(response.data)['details']
 
 def test_predict_endpoint_invalid_data(client):
     """Test the prediction endpoint with invalid data"""
@@ -73,8 +79,8 @@ def test_predict_endpoint_invalid_data(client):
         "user_id": "TEST001",
         "age": "invalid_age",  # Invalid age type
         "gender": "Male",
-        "education_level": "Bachelor's",
-        "employment_status": "Full-time",
+        "education_level": "Bachelor",
+        "employment_status": "Employed",
         "job_title": "Engineer",
         "monthly_income_usd": 5000.0,
         "monthly_expenses_usd": 2000.0,
@@ -95,7 +101,8 @@ def test_predict_endpoint_invalid_data(client):
                           data=json.dumps(test_data),
                           content_type='application/json')
     
-    assert response.status_code == 500  # Should handle invalid data gracefully
+    assert response.status_code == 400  # Should handle invalid data gracefully
+    assert json.loads(response.data)['details'][0].startswith("field 'age': expected an integer")
 
 def test_home_endpoint(client):
     """Test the home page endpoint"""
@@ -0,0 +1,96 @@
+import json
+import time
+import pytest
+from starlette.testclient import TestClient
+import asgi_app
+from src.pipeline.model_registry import ModelRegistry, ModelRegistryConfig
+
+
+@pytest.fixture
+def records(sample_frame):
+    """Raw request payloads taken from the training split"""
+    return json.loads(sample_frame.drop(columns=["credit_score"]).head(5).to_json(orient="records"))
+
+@pytest.fixture
+def client(fitted_artifacts, monkeypatch):
+    """Create an ASGI test client serving the small fitted artifacts"""
+    monkeypatch.setenv('ARTIFACT_WATCHER', '0')
+    monkeypatch.setattr(asgi_app.predict_pipeline, "registry", ModelRegistry(ModelRegistryConfig(**fitted_artifacts)))
+    with TestClient(asgi_app.app) as client:
+        yield client
+
+def test_asgi_health(client):
+    """Test the health check endpoint"""
+    response = client.get('/health')
+    assert response.status_code == 200
+    assert response.json()['status'] == 'healthy'
+
+def test_asgi_predict(client, records):
+    """Test single and batch predictions through the async service"""
+    response = client.post('/predict', json=records[0])
+    assert response.status_code == 200
+    assert 300 <= response.json()['credit_score'] <= 850
+
+    response = client.post('/predict/batch', json=records)
+    assert response.status_code == 200
+    assert len(response.text.splitlines()) == len(records)
+
+def test_asgi_rejects_when_saturated(client, records, monkeypatch):
+    """Test that a full executor answers 503 instead of queueing"""
+    monkeypatch.setattr(asgi_app.app.state.executor, "max_pending", 0)
+    response = client.post('/predict', json=records[0])
+    assert response.status_code == 503
+
+def test_asgi_times_out_slow_predictions(client, records, monkeypatch):
+    """Test that a prediction past its deadline answers 504"""
+    monkeypatch.setattr(asgi_app, "REQUEST_TIMEOUT_SECONDS", 0.05)
+    monkeypatch.setattr(asgi_app.predict_pipeline, "predict_record", lambda data: time.sleep(0.5))
+    response = client.post('/predict', json=records[0])
+    assert response.status_code == 504
+
+def test_asgi_streams_batches_in_chunks(client, sample_frame, monkeypatch):
+    """Test that a batch is scored chunk by chunk and streamed in input order"""
+    monkeypatch.setattr(asgi_app, "BATCH_CHUNK_RECORDS", 4)
+    chunks = []
+    score_batch_chunk = asgi_app.score_batch_chunk
+    def counting(records, start):
+        chunks.append((start, len(records)))
+        return score_batch_chunk(records, start)
+    monkeypatch.setattr(asgi_app, "score_batch_chunk", counting)
+    records = json.loads(sample_frame.drop(columns=["credit_score"]).head(10).to_json(orient="records"))
+    records[5] = dict(records[5], region="Atlantis")
+
+    response = client.post('/predict/batch', json=records)
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert response.status_code == 200
+    assert chunks == [(0, 4), (4, 4), (8, 2)]
+    assert [line['index'] for line in lines] == list(range(10))
+    assert 'error' in lines[5] and all('credit_score' in lines[i] for i in range(10) if i != 5)
+
+def test_asgi_ends_a_failed_stream_with_an_error_line(client, sample_frame, monkeypatch):
+    """Test that a chunk failing after the 200 status ends the body with an error record"""
+    monkeypatch.setattr(asgi_app, "BATCH_CHUNK_RECORDS", 4)
+    predict_batch = asgi_app.predict_pipeline.predict_batch
+    def failing(records, *args, **kwargs):
+        if records[0]['user_id'] == chunk_starts[1]:
+            raise RuntimeError("model crashed")
+        return predict_batch(records, *args, **kwargs)
+    monkeypatch.setattr(asgi_app.predict_pipeline, "predict_batch", failing)
+    records = json.loads(sample_frame.drop(columns=["credit_score"]).head(10).to_json(orient="records"))
+    chunk_starts = [records[0]['user_id'], records[4]['user_id']]
+
+    response = client.post('/predict/batch', json=records)
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert response.status_code == 200
+    assert [line['index'] for line in lines[:4]] == [0, 1, 2, 3]
+    assert lines[4:] == [{'error': 'model crashed'}]
+
+def test_asgi_rejects_oversized_bodies(client, records, monkeypatch):
+    """Test that bodies above the configured maximum get 413 on both endpoints"""
+    monkeypatch.setattr(asgi_app, "MAX_BODY_BYTES", 100)
+    assert client.post('/predict', json=records[0]).status_code == 413
+    assert client.post('/predict/batch', json=records).status_code == 413
+    # Without a Content-Length the limit applies while the body is read
+    lines = iter([json.dumps(record).encode() + b"\n" for record in records])
+    response = client.post('/predict/batch', content=lines, headers={'content-type': 'application/x-ndjson'})
+    assert response.status_code == 413
@@ -0,0 +1,136 @@
+import json
+import math
+import pytest
+import app as app_module
+from src.pipeline.model_registry import ModelRegistry, ModelRegistryConfig
+from src.pipeline import predict_pipeline
+from src.pipeline.predict_pipeline import PredictPipeline
+
+
+@pytest.fixture
+def records(sample_frame):
+    """Raw request payloads taken from the training split"""
+    frame = sample_frame.drop(columns=["credit_score"]).head(50)
+    return json.loads(frame.to_json(orient="records"))
+
+@pytest.fixture
+def client(fitted_artifacts, monkeypatch):
+    """Create a test client serving the small fitted artifacts"""
+    registry = ModelRegistry(ModelRegistryConfig(**fitted_artifacts))
+    monkeypatch.setattr(app_module.predict_pipeline, "registry", registry)
+    app_module.app.config['TESTING'] = True
+    with app_module.app.test_client() as client:
+        yield client
+
+def test_predict_batch_matches_single_predictions(fitted_artifacts, records):
+    """Test that vectorized scoring returns the same scores as one-at-a-time scoring"""
+    pipeline = PredictPipeline(ModelRegistry(ModelRegistryConfig(**fitted_artifacts)))
+    results = list(pipeline.predict_batch(records, chunk_size=16))
+
+    assert [result['index'] for result in results] == list(range(len(records)))
+    for record, result in zip(records[:5], results[:5]):
+        single = list(pipeline.predict_batch([record]))[0]
+        assert result['credit_score'] == single['credit_score']
+        assert 300 <= result['credit_score'] <= 850
+        assert result['user_id'] == record['user_id']
+
+def test_predict_batch_reports_bad_records(fitted_artifacts, records):
+    """Test that a bad record gets an error entry without failing the rest of the batch"""
+    pipeline = PredictPipeline(ModelRegistry(ModelRegistryConfig(**fitted_artifacts)))
+    records = records[:6]
+    records[1] = dict(records[1], region="Atlantis")
+    del records[3]['age']
+
+    results = list(pipeline.predict_batch(records))
+    assert 'error' in results[1] and 'error' in results[3]
+    assert "missing field 'age'" == results[3]['error']
+    assert all('credit_score' in results[i] for i in (0, 2, 4, 5))
+
+def test_predict_rows_isolates_rows_the_transform_rejects(fitted_artifacts, records, monkeypatch):
+    """Test that a row the transform rejects fails alone, found by bisection, and other errors fail the call"""
+    pipeline = PredictPipeline(ModelRegistry(ModelRegistryConfig(**fitted_artifacts)))
+    bundle = pipeline.registry.get()
+    rows = [pipeline.schema(bundle).validate(record) for record in records]
+    expected = pipeline._predict_rows(bundle, rows)
+    poisoned, calls = {id(rows[4]), id(rows[13])}, []
+    transform = bundle.transform
+
+    def failing_transform(self, features):
+        calls.append(len(features))
+        if any(id(row) in poisoned for row in features):
+            raise ValueError("cannot encode")
+        return transform(features)
+
+    monkeypatch.setattr(type(bundle), "transform", failing_transform)
+    predictions = pipeline._predict_rows(bundle, rows)
+    assert [i for i, prediction in enumerate(predictions) if isinstance(prediction, ValueError)] == [4, 13]
+    assert [predictions[i] for i in range(len(rows)) if i not in (4, 13)] == \
+        pytest.approx([expected[i] for i in range(len(rows)) if i not in (4, 13)])
+    # Two bad rows among 50 take a handful of transforms, not one per row
+    assert len(calls) - 1 <= 2 * 2 * math.ceil(math.log2(len(rows))) < len(rows)
+
+    def broken_transform(self, features):
+        calls.append(len(features))
+        raise RuntimeError("preprocessor unavailable")
+
+    calls.clear()
+    monkeypatch.setattr(type(bundle), "transform", broken_transform)
+    with pytest.raises(RuntimeError):
+        pipeline._predict_rows(bundle, rows)
+    assert calls == [len(rows)]
+
+def test_row_isolation_is_capped(fitted_artifacts, records, monkeypatch):
+    """Test that a transform rejecting every row stops bisecting after the cap"""
+    pipeline = PredictPipeline(ModelRegistry(ModelRegistryConfig(**fitted_artifacts)))
+    bundle = pipeline.registry.get()
+    rows = [pipeline.schema(bundle).validate(record) for record in records]
+    calls = []
+
+    def rejecting_transform(self, features):
+        calls.append(len(features))
+        raise ValueError("cannot encode")
+
+    monkeypatch.setattr(type(bundle), "transform", rejecting_transform)
+    monkeypatch.setattr(predict_pipeline, "MAX_ISOLATION_TRANSFORMS", 10)
+    predictions = pipeline._predict_rows(bundle, rows)
+    assert len(calls) == 1 + 10
+    assert len(predictions) == len(rows) and all(isinstance(p, ValueError) for p in predictions)
+
+def test_batch_endpoint_json_array(client, records):
+    """Test the batch endpoint with a JSON array body"""
+    response = client.post('/predict/batch', data=json.dumps(records[:10]), content_type='application/json')
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.data.decode().splitlines()]
+    assert len(lines) == 10
+    assert all('credit_rating' in line for line in lines)
+
+def test_batch_endpoint_ndjson(client, records):
+    """Test the batch endpoint with newline-delimited JSON, including a malformed line"""
+    body = "\n".join([json.dumps(records[0]), "{not json", json.dumps(records[1])])
+    response = client.post('/predict/batch', data=body, content_type='application/x-ndjson')
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.data.decode().splitlines()]
+    assert [line['index'] for line in lines] == [0, 1, 2]
+    assert 'error' in lines[1]
+    assert 'credit_score' in lines[2]
+
+def test_batch_endpoint_ends_a_failed_stream_with_an_error_line(client, records, monkeypatch):
+    """Test that an error raised mid-stream ends the body with an error record instead of truncating it"""
+    predict_batch = app_module.predict_pipeline.predict_batch
+    def failing(batch_records):
+        for result in predict_batch(batch_records):
+            if result['index'] == 3:
+                raise RuntimeError("model crashed")
+            yield result
+    monkeypatch.setattr(app_module.predict_pipeline, "predict_batch", failing)
+
+    response = client.post('/predict/batch', data=json.dumps(records[:10]), content_type='application/json')
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.data.decode().splitlines()]
+    assert [line['index'] for line in lines[:3]] == [0, 1, 2]
+    assert lines[3:] == [{'error': 'model crashed'}]
+
+def test_batch_endpoint_rejects_non_array(client):
+    """Test that a JSON object body is rejected with 400"""
+    response = client.post('/predict/batch', data=json.dumps({"user_id": "U1"}), content_type='application/json')
+    assert response.status_code == 400
@@ -0,0 +1,48 @@
+import json
+import numpy as np
+import pandas as pd
+import pytest
+from src.pipeline.batch_scorer import BatchScorer
+from src.pipeline.model_registry import ModelRegistry, ModelRegistryConfig
+from src.pipeline.predict_pipeline import PredictPipeline, get_credit_rating, get_credit_ratings
+
+
+@pytest.fixture
+def input_csv(sample_frame, tmp_path):
+    """Raw records with the columns of test.csv, one of them invalid"""
+    frame = sample_frame.head(250).copy()
+    frame["age"] = frame["age"].astype(object)
+    frame.loc[7, "age"] = "thirty"
+    path = tmp_path / "records.csv"
+    frame.to_csv(path, index=False)
+    return str(path)
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_batch_scorer_matches_predict_batch_in_input_order(workers, input_csv, fitted_artifacts, tmp_path):
+    """Test that the file is scored chunk by chunk, in order, like the batch endpoint"""
+    scorer = BatchScorer()
+    scorer.batch_scorer_config.workers = workers
+    scorer.batch_scorer_config.chunk_size = 60
+    scorer.batch_scorer_config.registry_config = ModelRegistryConfig(**fitted_artifacts)
+    output_path = str(tmp_path / "scores.csv")
+
+    report = scorer.score(input_csv, output_path)
+    assert (report["rows"], report["failed"]) == (250, 1)
+    assert report["error_examples"] == ["field 'age': expected an integer, got 'thirty'"]
+
+    scores = pd.read_csv(output_path, dtype={"user_id": str})
+    assert scores.columns.tolist() == ["user_id", "credit_score", "credit_rating"]
+    records = json.loads(pd.read_csv(input_csv).drop(columns=["credit_score"]).to_json(orient="records"))
+    expected = PredictPipeline(ModelRegistry(ModelRegistryConfig(**fitted_artifacts))).predict_batch(records)
+    for row, result in zip(scores.itertuples(), expected):
+        assert row.user_id == result["user_id"]
+        if "error" in result:
+            assert np.isnan(row.credit_score) and pd.isna(row.credit_rating)
+        else:
+            assert (row.credit_score, row.credit_rating) == (result["credit_score"], result["credit_rating"])
+
+def test_vectorized_ratings_match_get_credit_rating():
+    """Test that the vectorized bands agree with get_credit_rating on every boundary"""
+    scores = np.array([300, 579.9, 580, 669.5, 670, 739, 740, 799.99, 800, 850])
+    assert get_credit_ratings(scores).tolist() == [get_credit_rating(score) for score in scores]
+    assert get_credit_ratings([np.nan]).tolist() == [None]
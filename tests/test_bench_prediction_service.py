@@ -0,0 +1,44 @@
+import copy
+import app as app_module
+from benchmarks.bench_prediction_service import compare, load_payloads, run
+from src.components.columnar_store import write_columnar
+
+
+def test_benchmark_reports_every_scenario(fitted_artifacts, sample_frame, tmp_path, monkeypatch):
+    """Test that each target x concurrency x batch size scenario reports ordered percentiles"""
+    # The flask target swaps the app's pipeline; put the original back afterwards
+    monkeypatch.setattr(app_module, "predict_pipeline", app_module.predict_pipeline)
+    # Payloads come from a columnar split, the format ingestion writes by default
+    source = tmp_path / "test_columns"
+    write_columnar(sample_frame.head(200), str(source))
+    results = run(["pipeline", "flask"], [1, 2], [1, 8], requests=20, source=str(source), warmup=2,
+                  **fitted_artifacts)
+
+    assert len(results["scenarios"]) == 8
+    for scenario in results["scenarios"].values():
+        assert scenario["error_rate"] == 0
+        assert 0 < scenario["p50_ms"] <= scenario["p95_ms"] <= scenario["p99_ms"]
+        assert scenario["records_per_second"] > 0 and scenario["rss_mb"] > 0
+
+def test_payloads_fall_back_to_the_csv_split(sample_frame, tmp_path):
+    """Test that the default columnar source resolves to test.csv on a tree ingested as CSV"""
+    sample_frame.head(50).to_csv(tmp_path / "test.csv", index=False)
+    payloads = load_payloads(str(tmp_path / "test_columns"), 20)
+    assert len(payloads) == 20 and "credit_score" not in payloads[0]
+
+def test_compare_flags_regressions_past_the_threshold():
+    """Test that only changes beyond the allowed fraction, or new errors, count as regressions"""
+    baseline = {"scenarios": {"pipeline/c1/b1": {"p50_ms": 1.0, "p95_ms": 2.0, "p99_ms": 3.0,
+                                                 "records_per_second": 1000.0, "error_rate": 0.0,
+                                                 "rss_mb": 100.0}}}
+    current = copy.deepcopy(baseline)
+    scenario = current["scenarios"]["pipeline/c1/b1"]
+    scenario.update(p50_ms=1.1, p95_ms=2.6, records_per_second=700.0)
+    current["scenarios"]["flask/c1/b1"] = dict(scenario, p50_ms=100.0)
+
+    regressions = compare(current, baseline, max_regression=0.2)
+    assert [regression.split(":")[0] for regression in regressions] == [
+        "pipeline/c1/b1 p95_ms", "pipeline/c1/b1 records_per_second"]
+
+    scenario["error_rate"] = 0.01
+    assert compare(current, baseline, max_regression=1.0) == ["pipeline/c1/b1 error_rate: 0.0 -> 0.01"]
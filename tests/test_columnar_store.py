@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+from src.components.columnar_store import read_columnar, read_schema, read_split, write_columnar
+from src.components.data_ingestion import DataIngestionConfig
+from src.components.data_transformation import DataTransformation
+
+
+def test_columnar_round_trip_keeps_values_and_types(sample_frame, tmp_path):
+    """Test that a store reads back the same values with explicit dtypes"""
+    write_columnar(sample_frame, str(tmp_path / "train_columns"))
+    restored = read_columnar(str(tmp_path / "train_columns"))
+
+    kinds = {entry["name"]: entry["kind"] for entry in read_schema(str(tmp_path / "train_columns"))["columns"]}
+    assert kinds["loan_type"] == "categorical" and kinds["record_date"] == "datetime"
+    assert kinds["user_id"] == "string"
+    assert isinstance(restored["savings_usd"].to_numpy(), np.ndarray)
+    assert restored["loan_type"].isna().sum() == sample_frame["loan_type"].isna().sum()
+    pd.testing.assert_series_equal(restored["record_date"], pd.to_datetime(sample_frame["record_date"]))
+    for column in sample_frame.columns.drop("record_date"):
+        assert restored[column].astype(object).where(restored[column].notna(), None).tolist() == \
+            sample_frame[column].astype(object).where(sample_frame[column].notna(), None).tolist()
+
+def test_read_split_selects_columns_from_store_or_csv(sample_frame, tmp_path):
+    """Test that both formats return only the requested columns that exist"""
+    write_columnar(sample_frame, str(tmp_path / "train_columns"))
+    sample_frame.to_csv(tmp_path / "train.csv", index=False)
+    wanted = ["age", "region", "not_a_column"]
+
+    for path in (tmp_path / "train_columns", tmp_path / "train.csv"):
+        assert list(read_split(str(path), wanted).columns) == ["age", "region"]
+
+def test_transformation_reads_columnar_splits_like_csv(sample_frame, tmp_path):
+    """Test that the transformation stage gives the same arrays from stores as from CSV"""
+    outputs = {}
+    for split_format in ("csv", "columnar"):
+        train_path, test_path = tmp_path / f"train_{split_format}", tmp_path / f"test_{split_format}"
+        if split_format == "csv":
+            sample_frame.iloc[:1500].to_csv(train_path, index=False)
+            sample_frame.iloc[1500:].to_csv(test_path, index=False)
+        else:
+            write_columnar(sample_frame.iloc[:1500], str(train_path))
+            write_columnar(sample_frame.iloc[1500:], str(test_path))
+        transformation = DataTransformation()
+        transformation.data_transformation_config.preprocessor_obj_file_path = str(tmp_path / "preprocessor.pkl")
+        outputs[split_format] = transformation.initiate_data_transformation(str(train_path), str(test_path))[:4]
+
+    for from_csv, from_store in zip(outputs["csv"], outputs["columnar"]):
+        np.testing.assert_array_equal(from_csv, from_store)
+
+def test_split_format_is_read_when_the_config_is_created(monkeypatch):
+    """Test that SPLIT_FORMAT set after import still selects the split format"""
+    monkeypatch.setenv("SPLIT_FORMAT", "csv")
+    assert DataIngestionConfig().split_format == "csv"
+    monkeypatch.delenv("SPLIT_FORMAT")
+    assert DataIngestionConfig().split_format == "columnar"
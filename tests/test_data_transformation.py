@@ -0,0 +1,24 @@
+import numpy as np
+from src.components.data_transformation import DataTransformation
+from src.utils import load_object
+
+
+def test_transformation_returns_compact_features_and_separate_target(sample_frame, tmp_path):
+    """Test that features come back as float32 arrays with the target split off"""
+    train_path, test_path = tmp_path / "train.csv", tmp_path / "test.csv"
+    sample_frame.iloc[:1500].to_csv(train_path, index=False)
+    sample_frame.iloc[1500:].to_csv(test_path, index=False)
+    transformation = DataTransformation()
+    transformation.data_transformation_config.preprocessor_obj_file_path = str(tmp_path / "preprocessor.pkl")
+    transformation.data_transformation_config.transform_chunk_rows = 400
+
+    X_train, y_train, X_test, y_test, preprocessor_path = transformation.initiate_data_transformation(
+        str(train_path), str(test_path))
+
+    preprocessor = load_object(preprocessor_path)
+    assert X_train.dtype == np.float32 and X_train.shape == (1500, len(preprocessor.get_feature_names_out()))
+    assert X_test.shape[0] == 500
+    np.testing.assert_array_equal(y_train, sample_frame["credit_score"].iloc[:1500].to_numpy())
+    np.testing.assert_array_equal(y_test, sample_frame["credit_score"].iloc[1500:].to_numpy())
+    expected = preprocessor.transform(sample_frame.iloc[1500:].drop(columns=["credit_score", "user_id", "record_date"]))
+    np.testing.assert_array_equal(X_test, expected.astype(np.float32))
@@ -0,0 +1,50 @@
+import json
+import numpy as np
+import pytest
+from src.components.data_transformation import DataTransformation
+from src.pipeline.fast_encoder import FastEncoder, compiled_preprocessor_path, write_compiled_preprocessor
+from tests.conftest import NUMERICAL_COLUMNS, CATEGORICAL_COLUMNS
+
+
+@pytest.fixture(scope="module")
+def fitted_preprocessor(sample_frame):
+    """Fit the training preprocessor on a slice of the training split"""
+    preprocessor = DataTransformation().get_data_transformer_object_with_columns(
+        NUMERICAL_COLUMNS, CATEGORICAL_COLUMNS)
+    preprocessor.fit(sample_frame.drop(columns=["credit_score", "user_id", "record_date"]))
+    return preprocessor
+
+def test_fast_encoder_is_bit_identical_on_frames(fitted_preprocessor, sample_frame):
+    """Test that the compiled encoder reproduces preprocessor.transform exactly"""
+    features = sample_frame.drop(columns=["credit_score"])
+    features.loc[features.index[:20], 'age'] = np.nan
+    encoder = FastEncoder.from_preprocessor(fitted_preprocessor)
+
+    expected = fitted_preprocessor.transform(features)
+    actual = encoder.transform(features)
+    assert actual.dtype == expected.dtype
+    assert np.array_equal(actual, expected)
+
+def test_fast_encoder_is_bit_identical_on_records(fitted_preprocessor, sample_frame):
+    """Test that raw JSON records encode exactly like their DataFrame"""
+    features = sample_frame.drop(columns=["credit_score"]).head(200)
+    records = json.loads(features.to_json(orient="records", double_precision=15))
+    encoder = FastEncoder.from_preprocessor(fitted_preprocessor)
+
+    assert np.array_equal(encoder.transform(records), fitted_preprocessor.transform(features))
+    assert np.array_equal(encoder.transform(records[0]), fitted_preprocessor.transform(features.head(1)))
+
+def test_fast_encoder_rejects_unknown_categories(fitted_preprocessor, sample_frame):
+    """Test that unknown categories fail like the OneHotEncoder does"""
+    record = json.loads(sample_frame.drop(columns=["credit_score"]).head(1).to_json(orient="records"))[0]
+    record['region'] = "Atlantis"
+    with pytest.raises(ValueError):
+        FastEncoder.from_preprocessor(fitted_preprocessor).transform([record])
+
+def test_compiled_encoder_round_trips_exactly(fitted_preprocessor, sample_frame, tmp_path):
+    """Test that an encoder saved as JSON and loaded back encodes bit-identically"""
+    features = sample_frame.drop(columns=["credit_score"])
+    path = write_compiled_preprocessor(fitted_preprocessor, str(tmp_path / "preprocessor.pkl"))
+    assert path == compiled_preprocessor_path(str(tmp_path / "preprocessor.pkl"))
+
+    assert np.array_equal(FastEncoder.load(path).transform(features), fitted_preprocessor.transform(features))
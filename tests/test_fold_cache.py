@@ -0,0 +1,69 @@
+import os
+import numpy as np
+import pytest
+from sklearn.base import clone
+from sklearn.model_selection import GridSearchCV, KFold
+from sklearn.pipeline import Pipeline
+from sklearn.tree import DecisionTreeRegressor
+from src.components.data_transformation import DataTransformation
+from src.components.fold_cache import FoldCache, FoldCacheConfig
+from src.components.model_search import ModelSearchConfig, search_models
+from tests.conftest import NUMERICAL_COLUMNS, CATEGORICAL_COLUMNS
+
+
+@pytest.fixture(scope="module")
+def raw_split(sample_frame):
+    features = sample_frame.drop(columns=["credit_score", "user_id", "record_date"])
+    target = sample_frame["credit_score"]
+    return features.iloc[:600], target.iloc[:600], features.iloc[600:800], target.iloc[600:800]
+
+@pytest.fixture
+def preprocessor():
+    return DataTransformation().get_data_transformer_object_with_columns(NUMERICAL_COLUMNS, CATEGORICAL_COLUMNS)
+
+def test_folds_are_transformed_with_fold_fitted_preprocessor(raw_split, preprocessor, tmp_path):
+    """Test that each cached fold matches a preprocessor fitted on that fold's training rows"""
+    X, y, _, _ = raw_split
+    folds = list(KFold(n_splits=3).split(X))
+    cached, full, fitted = FoldCache(FoldCacheConfig(str(tmp_path))).prepare(X, y, folds, preprocessor)
+
+    train_index, valid_index = folds[1]
+    reference = clone(preprocessor).fit(X.iloc[train_index])
+    X_train, y_train, X_valid, y_valid = cached[1].load()
+    assert isinstance(X_train, np.memmap)
+    np.testing.assert_array_equal(X_train, reference.transform(X.iloc[train_index]))
+    np.testing.assert_array_equal(X_valid, reference.transform(X.iloc[valid_index]))
+    np.testing.assert_array_equal(y_valid, y.iloc[valid_index])
+    np.testing.assert_array_equal(full.load()[0], fitted.transform(X))
+
+def test_unchanged_inputs_reuse_cache_and_stale_entries_are_pruned(raw_split, preprocessor, tmp_path):
+    """Test that a rerun reuses the files and a new dataset replaces them"""
+    X, y, _, _ = raw_split
+    cache = FoldCache(FoldCacheConfig(str(tmp_path)))
+    folds = list(KFold(n_splits=3).split(X))
+    cached, _, _ = cache.prepare(X, y, folds, preprocessor)
+    written = os.stat(cached[0].X_train_path).st_mtime_ns
+
+    again, _, fitted = cache.prepare(X, y, folds, preprocessor)
+    assert again == cached
+    assert os.stat(again[0].X_train_path).st_mtime_ns == written
+    assert fitted is not None
+
+    cache.prepare(X.iloc[:300], y.iloc[:300], list(KFold(n_splits=3).split(X.iloc[:300])), preprocessor)
+    assert len(os.listdir(tmp_path)) == 1
+    assert not os.path.exists(cached[0].X_train_path)
+
+def test_search_with_preprocessor_matches_pipeline_grid_search(raw_split, preprocessor, tmp_path):
+    """Test that searching on cached folds equals a GridSearchCV over the full pipeline"""
+    X_train, y_train, X_test, y_test = raw_split
+    grid = {'max_depth': [2, 4, 6]}
+    results = search_models({'Decision Tree': DecisionTreeRegressor(random_state=42)}, {'Decision Tree': grid},
+                            X_train, y_train, X_test, y_test,
+                            ModelSearchConfig(n_jobs=1, fold_cache_dir=str(tmp_path)), preprocessor=preprocessor)
+
+    pipeline = Pipeline([("preprocessor", preprocessor), ("model", DecisionTreeRegressor(random_state=42))])
+    reference = GridSearchCV(pipeline, {'model__max_depth': grid['max_depth']}, cv=3).fit(X_train, y_train)
+    result = results['Decision Tree']
+    assert result.best_params['max_depth'] == reference.best_params_['model__max_depth']
+    assert result.cv_score == pytest.approx(reference.best_score_)
+    assert result.test_score == pytest.approx(reference.score(X_test, y_test))
@@ -0,0 +1,96 @@
+import os
+import json
+import queue
+import logging
+import pytest
+from src import logger as log_module
+from src.logger import (LoggingConfig, NonBlockingQueueHandler, RequestSampler, REQUEST_LOGGER,
+                        configure_logging, stop_logging)
+
+
+@pytest.fixture
+def log_config(tmp_path):
+    """Log to a temporary file, restoring the session's logging afterwards"""
+    original = log_module._Logging.config
+    config = LoggingConfig(file_path=str(tmp_path / "service.log"))
+    yield config
+    configure_logging(original)
+
+def read_lines(path):
+    with open(path) as file_obj:
+        return file_obj.read().splitlines()
+
+def test_records_are_written_by_the_background_thread(log_config):
+    """Test that JSON records with extra fields and tracebacks reach the file once flushed"""
+    log_config.format = "json"
+    configure_logging(log_config)
+    logging.getLogger("credit.test").info("scored %s", "U1", extra={"fields": {"latency_ms": 1.5}})
+    try:
+        raise ValueError("bad record")
+    except ValueError:
+        logging.getLogger("credit.test").exception("failed")
+    stop_logging()
+
+    first, second = (json.loads(line) for line in read_lines(log_config.file_path))
+    assert first["message"] == "scored U1" and first["latency_ms"] == 1.5 and first["logger"] == "credit.test"
+    assert second["level"] == "ERROR" and "ValueError: bad record" in second["exception"]
+
+def test_full_queue_drops_instead_of_blocking():
+    """Test that records beyond the queue bound are counted and dropped"""
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=1))
+    for _ in range(3):
+        handler.handle(logging.makeLogRecord({"msg": "line"}))
+    assert handler.queue.qsize() == 1 and handler.dropped == 2
+
+def test_request_lines_are_sampled_but_warnings_are_not():
+    """Test that the sampler caps per-request lines and reports what it skipped"""
+    sampler = RequestSampler(rate=5)
+    def record(name=REQUEST_LOGGER, level=logging.INFO):
+        return logging.makeLogRecord({"name": name, "levelno": level, "msg": "line"})
+
+    assert sum(sampler.filter(record()) for _ in range(100)) == 5
+    assert sampler.filter(record(level=logging.WARNING))
+    assert sampler.filter(record(name="credit.training"))
+
+    sampler.updated -= 1
+    passed = record()
+    assert sampler.filter(passed) and passed.fields == {"sampled_out": 95}
+
+def test_forked_child_restarts_its_writer(log_config):
+    """Test that a forked worker logs through its own writer to its own file"""
+    configure_logging(log_config)
+    pid = os.fork()
+    if pid == 0:
+        logging.getLogger("credit.test").warning("from the child")
+        stop_logging()
+        os._exit(0)
+    os.waitpid(pid, 0)
+
+    stem, extension = os.path.splitext(log_config.file_path)
+    assert "from the child" in read_lines(f"{stem}.worker0{extension}")[0]
+
+def test_worker_processes_reuse_free_slots(tmp_path, monkeypatch):
+    """Test that worker files are numbered by the slots held at once, not by pid"""
+    monkeypatch.setattr(log_module, "_owner_pid", -1)
+    monkeypatch.setattr(log_module._Logging, "slot", None)
+    path = str(tmp_path / "service.log")
+    first = log_module._process_file_path(path)
+    assert first == str(tmp_path / "service.worker0.log") and log_module._process_file_path(path) == first
+
+    # Another worker still holds slot 0
+    held = log_module._Logging.slot
+    log_module._Logging.slot = None
+    assert log_module._process_file_path(path) == str(tmp_path / "service.worker1.log")
+
+    # Once both have exited a new worker takes slot 0 again
+    os.close(held[2]), os.close(log_module._Logging.slot[2])
+    log_module._Logging.slot = None
+    assert log_module._process_file_path(path) == first
+    os.close(log_module._Logging.slot[2])
+
+def test_console_is_on_by_default(monkeypatch):
+    """Test that logs reach the console unless LOG_CONSOLE=0"""
+    monkeypatch.delenv("LOG_CONSOLE", raising=False)
+    assert LoggingConfig().console
+    monkeypatch.setenv("LOG_CONSOLE", "0")
+    assert not LoggingConfig().console
@@ -0,0 +1,116 @@
+import threading
+import numpy as np
+import pandas as pd
+import pytest
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from src.pipeline.micro_batcher import MicroBatcher, MicroBatcherConfig
+from src.pipeline.model_registry import ModelRegistry, ModelRegistryConfig
+from src.pipeline.predict_pipeline import PredictPipeline
+
+
+def test_micro_batcher_merges_concurrent_requests():
+    """Test that requests arriving inside the window share one predict call"""
+    calls = []
+    release = threading.Event()
+
+    def predict_fn(features):
+        release.wait()
+        calls.append(len(features))
+        return features['x'].to_numpy() * 2
+
+    batcher = MicroBatcher(predict_fn, MicroBatcherConfig(max_batch_size=8, max_wait_ms=50))
+    futures = [batcher.submit(pd.DataFrame({'x': [i]})) for i in range(8)]
+    release.set()
+
+    assert [future.result(timeout=5)[0] for future in futures] == [i * 2 for i in range(8)]
+    assert sum(calls) == 8 and len(calls) < 8
+    stats = batcher.stats()
+    assert stats['requests'] == 8
+    assert stats['batches'] == len(calls)
+
+def test_micro_batcher_isolates_failures():
+    """Test that a failing record only fails its own caller"""
+    def predict_fn(features):
+        if (features['x'] < 0).any():
+            raise ValueError("negative")
+        return features['x'].to_numpy()
+
+    batcher = MicroBatcher(predict_fn, MicroBatcherConfig(max_batch_size=4, max_wait_ms=50))
+    good, bad = batcher.submit(pd.DataFrame({'x': [1]})), batcher.submit(pd.DataFrame({'x': [-1]}))
+    assert good.result(timeout=5)[0] == 1
+    with pytest.raises(ValueError):
+        bad.result(timeout=5)
+
+def test_micro_batched_pipeline_matches_direct(fitted_artifacts, sample_frame):
+    """Test that micro-batched predictions equal unbatched ones"""
+    registry = ModelRegistry(ModelRegistryConfig(**fitted_artifacts))
+    direct = PredictPipeline(registry)
+    batched = PredictPipeline(registry, micro_batcher_config=MicroBatcherConfig(max_batch_size=16, max_wait_ms=5))
+    rows = [sample_frame.drop(columns=['credit_score']).iloc[[i]] for i in range(32)]
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        results = list(executor.map(batched.predict, rows))
+
+    expected = [direct.predict(row)[0] for row in rows]
+    np.testing.assert_allclose([result[0] for result in results], expected)
+
+def test_micro_batcher_survives_failures_outside_predict_fn():
+    """Test that a batch that cannot be fanned out fails its callers, not the worker"""
+    results = iter([None, np.array([3])])
+    batcher = MicroBatcher(lambda features: next(results), MicroBatcherConfig(max_batch_size=1, max_wait_ms=1))
+
+    with pytest.raises(TypeError):
+        batcher.predict(pd.DataFrame({'x': [1]}), timeout=5)
+    assert batcher.predict(pd.DataFrame({'x': [3]}), timeout=5)[0] == 3
+
+def test_micro_batcher_predict_times_out():
+    """Test that a caller stops waiting after the configured timeout"""
+    release = threading.Event()
+    batcher = MicroBatcher(lambda features: release.wait() and features['x'].to_numpy(),
+                           MicroBatcherConfig(max_wait_ms=1, timeout_seconds=0.05))
+    try:
+        with pytest.raises(TimeoutError):
+            batcher.predict(pd.DataFrame({'x': [1]}))
+    finally:
+        release.set()
+
+def test_micro_batcher_keeps_groups_apart():
+    """Test that items of different groups are never scored in the same call"""
+    calls = []
+    release = threading.Event()
+
+    def predict_fn(features, group):
+        release.wait()
+        calls.append((group, len(features)))
+        return features['x'].to_numpy() * group
+
+    batcher = MicroBatcher(predict_fn, MicroBatcherConfig(max_batch_size=8, max_wait_ms=50))
+    futures = [batcher.submit(pd.DataFrame({'x': [i]}), group=1 + i % 2) for i in range(6)]
+    release.set()
+
+    assert [future.result(timeout=5)[0] for future in futures] == [i * (1 + i % 2) for i in range(6)]
+    # Each result was multiplied by its own group, and the six rows took one call per group
+    assert sorted(calls) == [(1, 3), (2, 3)]
+
+def test_micro_batcher_skips_timed_out_requests():
+    """Test that a request whose caller timed out is not run through the model"""
+    seen = []
+    started, release = threading.Event(), threading.Event()
+
+    def predict_fn(features):
+        seen.extend(features['x'])
+        started.set()
+        release.wait()
+        return features['x'].to_numpy()
+
+    batcher = MicroBatcher(predict_fn, MicroBatcherConfig(max_batch_size=1, max_wait_ms=1))
+    busy = batcher.submit(pd.DataFrame({'x': [1]}))
+    started.wait(timeout=5)
+    with pytest.raises(TimeoutError):
+        batcher.predict(pd.DataFrame({'x': [2]}), timeout=0.05)
+    release.set()
+
+    assert busy.result(timeout=5)[0] == 1
+    assert batcher.predict(pd.DataFrame({'x': [3]}), timeout=5)[0] == 3
+    assert seen == [1, 3]
+    assert batcher.stats()['cancelled'] == 1
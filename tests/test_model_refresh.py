@@ -0,0 +1,117 @@
+import os
+import copy
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import LinearRegression
+from xgboost import XGBRegressor
+from src.components.data_transformation import DataTransformation
+from src.components.model_refresh import (ModelRefresher, feature_scaling, rebase_model,
+                                          update_preprocessor_statistics)
+from src.exception import CustomException
+from src.pipeline.model_registry import ModelRegistry, ModelRegistryConfig
+from src.utils import load_object, save_object
+from tests.conftest import CATEGORICAL_COLUMNS, NUMERICAL_COLUMNS
+
+
+@pytest.fixture
+def learnable_frame(sample_frame):
+    """Records with a target the models can learn, so refreshes can improve"""
+    frame = sample_frame.copy()
+    frame["credit_score"] = (300 + frame["monthly_income_usd"] / 50 - frame["debt_to_income_ratio"] * 100
+                             + (frame["has_loan"] == "Yes") * 40)
+    return frame
+
+def fit_artifacts(directory, frame, model):
+    preprocessor = DataTransformation().get_data_transformer_object_with_columns(
+        NUMERICAL_COLUMNS, CATEGORICAL_COLUMNS)
+    model.fit(preprocessor.fit_transform(frame), frame["credit_score"])
+    frame.to_csv(directory / "test.csv", index=False)
+    save_object(str(directory / "model.pkl"), model)
+    save_object(str(directory / "preprocessor.pkl"), preprocessor)
+    return preprocessor
+
+def make_refresher(directory):
+    refresher = ModelRefresher()
+    config = refresher.model_refresh_config
+    config.model_path = str(directory / "model.pkl")
+    config.preprocessor_path = str(directory / "preprocessor.pkl")
+    config.native_model_file_path = str(directory / "model_native.npz")
+    config.holdout_path = str(directory / "test_columns")
+    config.records_log_path = str(directory / "refresh_records.csv")
+    config.additional_estimators = 10
+    return refresher
+
+@pytest.mark.parametrize("model", [LinearRegression(), XGBRegressor(n_estimators=20, max_depth=4),
+                                   RandomForestRegressor(n_estimators=10, max_depth=8, random_state=0)])
+def test_rebased_model_predicts_like_the_original(learnable_frame, model):
+    """Test that rebasing onto updated scaler statistics keeps the predictions"""
+    old_frame, new_frame = learnable_frame.iloc[:1000], learnable_frame.iloc[1000:]
+    preprocessor = DataTransformation().get_data_transformer_object_with_columns(
+        NUMERICAL_COLUMNS, CATEGORICAL_COLUMNS).fit(old_frame)
+    model.fit(preprocessor.transform(old_frame), old_frame["credit_score"])
+    updated = update_preprocessor_statistics(preprocessor, new_frame[list(preprocessor.feature_names_in_)])
+
+    old_offset, old_scale = feature_scaling(preprocessor)
+    new_offset, new_scale = feature_scaling(updated)
+    assert not np.allclose(old_offset, new_offset)
+    rebased = rebase_model(copy.deepcopy(model), old_scale / new_scale, (old_offset - new_offset) / new_scale)
+
+    before = model.predict(preprocessor.transform(learnable_frame).astype(np.float32))
+    after = rebased.predict(updated.transform(learnable_frame).astype(np.float32))
+    if isinstance(model, RandomForestRegressor):
+        # A split between two adjacent float32 values can flip for a handful of rows
+        assert np.isclose(before, after).mean() > 0.95
+    else:
+        np.testing.assert_allclose(before, after, rtol=1e-5, atol=1e-3)
+
+def test_refresh_publishes_an_improved_model(learnable_frame, tmp_path):
+    """Test that new records grow the model and replace the published artifacts"""
+    fit_artifacts(tmp_path, learnable_frame.iloc[:300], XGBRegressor(n_estimators=5, max_depth=3))
+    new_records = learnable_frame.iloc[300:]
+
+    report = make_refresher(tmp_path).refresh(new_records)
+    assert report.published and report.refreshed_r2 > report.previous_r2
+    assert report.trained_records + report.holdout_records - 300 == report.records - report.rejected_records
+    assert load_object(str(tmp_path / "model.pkl")).get_booster().num_boosted_rounds() == 15
+    assert os.path.exists(tmp_path / "model_native.npz")
+    assert os.path.exists(tmp_path / "refresh_records.csv")
+
+def test_registry_never_pairs_a_refreshed_preprocessor_with_the_old_model(learnable_frame, tmp_path):
+    """Test that a poll landing between the refresh's writes keeps serving the previous pair"""
+    fit_artifacts(tmp_path, learnable_frame.iloc[:300], XGBRegressor(n_estimators=5, max_depth=3))
+    registry = ModelRegistry(ModelRegistryConfig(model_path=str(tmp_path / "model.pkl"),
+                                                 preprocessor_path=str(tmp_path / "preprocessor.pkl"),
+                                                 native_model_path=str(tmp_path / "model_native.npz")))
+    previous = registry.get().version
+    old_model = (tmp_path / "model.pkl").read_bytes()
+    assert make_refresher(tmp_path).refresh(learnable_frame.iloc[300:]).published
+    refreshed_model = (tmp_path / "model.pkl").read_bytes()
+
+    # The preprocessor is written, the model not yet
+    (tmp_path / "model_native.npz").unlink()
+    (tmp_path / "model.pkl").write_bytes(old_model)
+    assert registry.reload_if_changed() is False and registry.get().version == previous
+
+    (tmp_path / "model.pkl").write_bytes(refreshed_model)
+    assert registry.reload_if_changed() is True
+
+def test_refresh_rejects_a_regressing_model(learnable_frame, tmp_path):
+    """Test that a refresh that lowers holdout R2 leaves the published artifacts untouched"""
+    fit_artifacts(tmp_path, learnable_frame.iloc[:1000], XGBRegressor(n_estimators=50, max_depth=4))
+    before = {name: open(tmp_path / name, "rb").read() for name in ("model.pkl", "preprocessor.pkl")}
+    noisy = learnable_frame.iloc[1000:].copy()
+    noisy["credit_score"] = np.random.default_rng(0).permutation(noisy["credit_score"].to_numpy())
+
+    refresher = make_refresher(tmp_path)
+    refresher.model_refresh_config.additional_estimators = 50
+    report = refresher.refresh(noisy)
+    assert not report.published
+    assert {name: open(tmp_path / name, "rb").read() for name in before} == before
+    assert not os.path.exists(tmp_path / "refresh_records.csv")
+
+def test_refresh_needs_an_incremental_model(learnable_frame, tmp_path):
+    """Test that model families without incremental training ask for a full retrain"""
+    fit_artifacts(tmp_path, learnable_frame.iloc[:1000], LinearRegression())
+    with pytest.raises(CustomException, match="full retrain"):
+        make_refresher(tmp_path).refresh(learnable_frame.iloc[1000:])
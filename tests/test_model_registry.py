@@ -0,0 +1,112 @@
+import os
+import sys
+import json
+import pickle
+import subprocess
+import pytest
+from src.components.model_exporter import ModelExporter
+from src.pipeline.fast_encoder import compiled_preprocessor_path, write_compiled_preprocessor
+from src.pipeline.model_registry import ModelRegistry, ModelRegistryConfig
+from src.pipeline.native_model import NativeModel
+from src.pipeline.predict_pipeline import PredictPipeline
+
+
+def write_pickle(path, obj):
+    with open(path, "wb") as file_obj:
+        pickle.dump(obj, file_obj)
+
+
+@pytest.fixture
+def registry(tmp_path):
+    """Create a registry over throwaway artifacts"""
+    model_path = str(tmp_path / "model.pkl")
+    preprocessor_path = str(tmp_path / "preprocessor.pkl")
+    write_pickle(model_path, {"model": 1})
+    write_pickle(preprocessor_path, {"preprocessor": 1})
+    return ModelRegistry(ModelRegistryConfig(model_path=model_path, preprocessor_path=preprocessor_path))
+
+def test_registry_loads_once(registry):
+    """Test that repeated gets reuse the resident bundle"""
+    bundle = registry.get()
+    assert registry.get() is bundle
+    assert registry.reload_if_changed() is False
+    info = registry.info()
+    assert info['loaded'] is True
+    assert info['version'] == bundle.version
+
+def test_registry_hot_swaps_on_change(registry):
+    """Test that a changed artifact is swapped in without touching held bundles"""
+    old_bundle = registry.get()
+    write_pickle(registry.config.model_path, {"model": 2})
+    os.utime(registry.config.model_path, ns=(1, 1))
+
+    assert registry.reload_if_changed() is True
+    new_bundle = registry.get()
+    assert new_bundle.version != old_bundle.version
+    assert new_bundle.model == {"model": 2}
+    assert old_bundle.model == {"model": 1}
+
+def test_registry_keeps_serving_on_broken_artifact(registry):
+    """Test that a half-written artifact does not replace the loaded model"""
+    old_bundle = registry.get()
+    with open(registry.config.model_path, "wb") as file_obj:
+        file_obj.write(b"not a pickle")
+
+    assert registry.reload_if_changed() is False
+    assert registry.get() is old_bundle
+
+def test_registry_serves_compiled_preprocessor_without_sklearn(fitted_artifacts, tmp_path):
+    """Test that a fresh compiled preprocessor is used, and a newer pickle takes over"""
+    preprocessor_path = str(tmp_path / "preprocessor.pkl")
+    with open(fitted_artifacts["preprocessor_path"], "rb") as file_obj:
+        preprocessor = pickle.load(file_obj)
+    write_pickle(preprocessor_path, preprocessor)
+    write_compiled_preprocessor(preprocessor, preprocessor_path)
+    registry = ModelRegistry(ModelRegistryConfig(model_path=fitted_artifacts["model_path"],
+                                                 preprocessor_path=preprocessor_path))
+
+    bundle = registry.get()
+    assert bundle.preprocessor is None and registry.info()["compiled_preprocessor"] is True
+    assert PredictPipeline(registry).warm_up() > 0
+
+    write_pickle(preprocessor_path, preprocessor)
+    os.utime(compiled_preprocessor_path(preprocessor_path), ns=(1, 1))
+    assert registry.reload_if_changed() is True
+    assert registry.get().preprocessor is not None
+
+def test_registry_ignores_native_model_older_than_pickle(fitted_artifacts, tmp_path):
+    """Test that a native export left behind by a replaced model.pkl is not served"""
+    with open(fitted_artifacts["model_path"], "rb") as file_obj:
+        model = pickle.load(file_obj)
+    exporter = ModelExporter()
+    exporter.model_exporter_config.native_model_file_path = str(tmp_path / "model_native.npz")
+    exporter.export(model)
+    registry = ModelRegistry(ModelRegistryConfig(model_path=fitted_artifacts["model_path"],
+                                                 preprocessor_path=fitted_artifacts["preprocessor_path"],
+                                                 native_model_path=str(tmp_path / "model_native.npz")))
+    assert isinstance(registry.get().model, NativeModel)
+
+    os.utime(tmp_path / "model_native.npz", ns=(1, 1))
+    assert registry.reload_if_changed() is True
+    assert not isinstance(registry.get().model, NativeModel)
+
+def test_native_serving_imports_no_training_libraries(fitted_artifacts, tmp_path):
+    """Test that the app starts from native artifacts without pandas, sklearn or xgboost"""
+    with open(fitted_artifacts["model_path"], "rb") as file_obj:
+        model = pickle.load(file_obj)
+    with open(fitted_artifacts["preprocessor_path"], "rb") as file_obj:
+        preprocessor = pickle.load(file_obj)
+    (tmp_path / "artifacts").mkdir()
+    write_pickle(str(tmp_path / "artifacts" / "preprocessor.pkl"), preprocessor)
+    write_compiled_preprocessor(preprocessor, str(tmp_path / "artifacts" / "preprocessor.pkl"))
+    exporter = ModelExporter()
+    exporter.model_exporter_config.native_model_file_path = str(tmp_path / "artifacts" / "model_native.npz")
+    exporter.export(model)
+
+    env = {**os.environ, "NATIVE_MODEL": "1", "ARTIFACT_WATCHER": "0", "PYTHONPATH": os.getcwd()}
+    probe = "import json, app; print(json.dumps(app.startup))"
+    completed = subprocess.run([sys.executable, "-c", probe], cwd=tmp_path, env=env,
+                               capture_output=True, text=True, check=True)
+    startup = json.loads(completed.stdout.strip().splitlines()[-1])
+    assert startup["heavy_modules"] == []
+    assert startup["warm_up_seconds"] is not None
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import LinearRegression
+from sklearn.model_selection import GridSearchCV
+from sklearn.tree import DecisionTreeRegressor
+from src.components.model_search import ModelSearchConfig, search_models
+from src.utils import evaluate_models
+
+PARAM_GRIDS = {
+    'Linear Regression': {},
+    'Decision Tree': {'max_depth': [2, 4, 8]},
+    'Random Forest': {'n_estimators': [10, 20], 'max_depth': [3, None]},
+}
+
+
+def make_models():
+    return {
+        'Linear Regression': LinearRegression(),
+        'Decision Tree': DecisionTreeRegressor(random_state=42),
+        'Random Forest': RandomForestRegressor(random_state=42, n_jobs=2),
+    }
+
+@pytest.fixture(scope="module")
+def split_data():
+    rng = np.random.default_rng(1)
+    X = rng.normal(size=(400, 6))
+    y = 3 * X[:, 0] + np.sin(2 * X[:, 1]) + rng.normal(scale=0.1, size=400)
+    return X[:300], y[:300], X[300:], y[300:]
+
+def test_grid_search_matches_grid_search_cv(split_data, tmp_path):
+    """Test that the pooled search picks the same parameters as GridSearchCV"""
+    X_train, y_train, X_test, y_test = split_data
+    results = search_models(make_models(), PARAM_GRIDS, X_train, y_train, X_test, y_test,
+                            ModelSearchConfig(n_jobs=2, fold_cache_dir=str(tmp_path)))
+
+    for name, model in make_models().items():
+        if not PARAM_GRIDS[name]:
+            continue
+        reference = GridSearchCV(model, PARAM_GRIDS[name], cv=3).fit(X_train, y_train)
+        assert results[name].best_params == reference.best_params_
+        assert results[name].cv_score == pytest.approx(reference.best_score_)
+        assert results[name].test_score == pytest.approx(reference.best_estimator_.score(X_test, y_test))
+
+    forest = results['Random Forest']
+    assert forest.estimator.n_jobs == 2
+    assert forest.candidates == 4
+    assert forest.wall_seconds > 0
+
+def test_halving_search_refits_best_estimator(split_data, tmp_path):
+    """Test that successive halving returns a fitted estimator with its chosen parameters"""
+    X_train, y_train, X_test, y_test = split_data
+    results = search_models(make_models(), PARAM_GRIDS, X_train, y_train, X_test, y_test,
+                            ModelSearchConfig(strategy="halving", n_jobs=2, fold_cache_dir=str(tmp_path)))
+
+    tree = results['Decision Tree']
+    assert tree.estimator.get_params()['max_depth'] == tree.best_params['max_depth']
+    assert tree.test_score > 0.8
+    assert np.isnan(results['Linear Regression'].cv_score)
+
+def test_evaluate_models_replaces_models_with_fitted_estimators(split_data, tmp_path):
+    """Test that evaluate_models keeps its report contract and refits in place"""
+    X_train, y_train, X_test, y_test = split_data
+    models = make_models()
+    report = evaluate_models(X_train, y_train, X_test, y_test, models, PARAM_GRIDS,
+                             ModelSearchConfig(n_jobs=1, fold_cache_dir=str(tmp_path)))
+
+    assert set(report) == set(PARAM_GRIDS)
+    for name, model in models.items():
+        assert report[name] == pytest.approx(model.score(X_test, y_test))
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import LinearRegression
+from sklearn.metrics import r2_score
+from sklearn.tree import DecisionTreeRegressor
+from src.components.model_selection import ModelSelectionConfig, select_model
+from src.exception import CustomException
+
+
+@pytest.fixture(scope="module")
+def candidates():
+    """A fast linear model and a slow forest of near-equal accuracy"""
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(1500, 8))
+    y = 3 * X[:, 0] - 2 * X[:, 1] + 0.5 * np.sin(3 * X[:, 2]) + rng.normal(scale=0.1, size=1500)
+    X_train, y_train, X_test, y_test = X[:1000], y[:1000], X[1000:], y[1000:]
+    estimators = {"Linear Regression": LinearRegression().fit(X_train, y_train),
+                  "Random Forest": RandomForestRegressor(n_estimators=60, random_state=0).fit(X_train, y_train)}
+    # The forest is reported marginally more accurate, as in a close search
+    model_report = {"Linear Regression": 0.950, "Random Forest": 0.953}
+    return model_report, estimators, X_train, X_test, y_test
+
+def test_faster_model_wins_within_tolerance(candidates):
+    """Test that near-equal R2 goes to the lower latency, and the default tolerance 0 picks by R2"""
+    model_report, estimators, _, X_test, y_test = candidates
+    config = ModelSelectionConfig(r2_tolerance=0.005, row_repeats=10, batch_repeats=2)
+    name, model, r2, report = select_model(model_report, estimators, X_test, y_test, config=config)
+    assert (name, r2) == ("Linear Regression", 0.950) and model is estimators[name]
+    forest = report["candidates"]["Random Forest"]
+    assert forest["row_latency_ms"] > report["candidates"]["Linear Regression"]["row_latency_ms"]
+    assert forest["artifact_bytes"] > 0 and forest["batch_size"] == 500
+
+    config = ModelSelectionConfig(row_repeats=10, batch_repeats=2)
+    assert select_model(model_report, estimators, X_test, y_test, config=config)[0] == "Random Forest"
+
+def test_budgets_exclude_candidates(candidates):
+    """Test that a size budget removes the forest and an impossible one fails selection"""
+    model_report, estimators, _, X_test, y_test = candidates
+    config = ModelSelectionConfig(r2_tolerance=0, max_artifact_mb=0.1, row_repeats=10, batch_repeats=2)
+    name, _, _, report = select_model(model_report, estimators, X_test, y_test, config=config)
+    assert name == "Linear Regression"
+    assert report["candidates"]["Random Forest"]["over_budget"][0].startswith("artifact")
+
+    config.max_row_latency_ms = 0
+    with pytest.raises(CustomException, match="No model meets the inference budget"):
+        select_model(model_report, estimators, X_test, y_test, config=config)
+
+def test_winning_forest_is_distilled_into_a_tree(candidates):
+    """Test that distillation replaces the forest with one tree when R2 barely drops"""
+    _, estimators, X_train, X_test, y_test = candidates
+    forest = {"Random Forest": estimators["Random Forest"]}
+    forest_r2 = r2_score(y_test, forest["Random Forest"].predict(X_test))
+    config = ModelSelectionConfig(distill=True, distill_max_r2_loss=0.05, row_repeats=10, batch_repeats=2)
+
+    name, model, r2, report = select_model({"Random Forest": forest_r2}, forest, X_test, y_test, X_train, config)
+    assert name == "Random Forest (distilled)" and isinstance(model, DecisionTreeRegressor)
+    assert report["distilled"]["accepted"] and r2 >= forest_r2 - 0.05
@@ -0,0 +1,117 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import LinearRegression
+from sklearn.tree import DecisionTreeRegressor
+from xgboost import XGBRegressor
+from src.components.model_exporter import ModelExporter, export_model_arrays, reduce_precision
+from src.pipeline.native_model import NativeModel
+
+
+@pytest.fixture(scope="module")
+def regression_data():
+    """Dense features shaped like the preprocessor output"""
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(600, 12))
+    X[:, 6:] = (X[:, 6:] > 0.5) * 1.7
+    y = 500 + 40 * X[:, 0] - 25 * X[:, 1] * X[:, 6] + rng.normal(scale=5, size=600)
+    return X, y
+
+@pytest.mark.parametrize("model", [
+    LinearRegression(),
+    DecisionTreeRegressor(random_state=42),
+    RandomForestRegressor(n_estimators=20, random_state=42),
+    XGBRegressor(n_estimators=30, random_state=42),
+])
+def test_native_model_matches_estimator(model, regression_data, tmp_path):
+    """Test that the exported arrays predict like the fitted estimator"""
+    X, y = regression_data
+    model.fit(X, y)
+    exporter = ModelExporter()
+    exporter.model_exporter_config.native_model_file_path = str(tmp_path / "model_native.npz")
+
+    native = NativeModel.load(exporter.export(model))
+    np.testing.assert_allclose(native.predict(X), model.predict(X), rtol=1e-5)
+    np.testing.assert_allclose(native.predict(X[:1]), model.predict(X[:1]), rtol=1e-5)
+
+def test_native_xgboost_handles_missing_values(regression_data, tmp_path):
+    """Test that NaN features follow XGBoost's default direction"""
+    X, y = regression_data
+    model = XGBRegressor(n_estimators=10, random_state=42).fit(X, y)
+    exporter = ModelExporter()
+    exporter.model_exporter_config.native_model_file_path = str(tmp_path / "model_native.npz")
+
+    X_missing = X[:50].copy()
+    X_missing[::3, 0] = np.nan
+    native = NativeModel.load(exporter.export(model))
+    np.testing.assert_allclose(native.predict(X_missing), model.predict(X_missing), rtol=1e-5)
+
+def test_registry_serves_native_model(fitted_artifacts, sample_frame, tmp_path):
+    """Test that the registry prefers the exported model when configured"""
+    import pickle
+    from src.pipeline.model_registry import ModelRegistry, ModelRegistryConfig
+    from src.pipeline.predict_pipeline import PredictPipeline
+
+    with open(fitted_artifacts['model_path'], 'rb') as file_obj:
+        model = pickle.load(file_obj)
+    exporter = ModelExporter()
+    exporter.model_exporter_config.native_model_file_path = str(tmp_path / "model_native.npz")
+    native_path = exporter.export(model)
+
+    features = sample_frame.drop(columns=['credit_score']).head(20)
+    pickled = PredictPipeline(ModelRegistry(ModelRegistryConfig(**fitted_artifacts)))
+    native = PredictPipeline(ModelRegistry(ModelRegistryConfig(native_model_path=native_path, **fitted_artifacts)))
+    assert native.registry.info()['loaded'] is False
+    np.testing.assert_allclose(native.predict(features), pickled.predict(features))
+    assert native.registry.info()['native_model'] is True
+
+def test_native_model_maps_arrays_from_file(regression_data, tmp_path):
+    """Test that the mapped arrays are read-only views equal to the loaded ones"""
+    X, y = regression_data
+    exporter = ModelExporter()
+    exporter.model_exporter_config.native_model_file_path = str(tmp_path / "model_native.npz")
+    file_path = exporter.export(RandomForestRegressor(n_estimators=5, random_state=42).fit(X, y))
+
+    mapped, loaded = NativeModel.load(file_path), NativeModel.load(file_path, mmap_arrays=False)
+    assert not mapped.threshold.flags.writeable and loaded.threshold.flags.writeable
+    for name in ("feature", "threshold", "left", "right", "value", "roots"):
+        assert np.array_equal(getattr(mapped, name), getattr(loaded, name))
+    assert np.array_equal(mapped.predict(X), loaded.predict(X))
+
+@pytest.mark.parametrize("precision", ["float32", "binned"])
+@pytest.mark.parametrize("model", [
+    DecisionTreeRegressor(random_state=42),
+    RandomForestRegressor(n_estimators=20, random_state=42),
+    XGBRegressor(n_estimators=30, random_state=42),
+])
+def test_reduced_precision_trees_keep_every_split(precision, model, regression_data):
+    """Test that float32 and binned trees route rows like the estimator, missing values included"""
+    X, y = regression_data
+    model.fit(X, y)
+    X_missing = X.copy()
+    X_missing[::7, 0] = np.nan
+    X_missing[::5, 6] = np.nan
+    arrays = reduce_precision(export_model_arrays(model), precision)
+    native = NativeModel(arrays)
+
+    assert native.precision == precision and arrays["value"].dtype == np.float32
+    if precision == "binned":
+        assert arrays["threshold"].dtype in (np.uint8, np.uint16)
+    # Only float32 leaf values differ, far below one credit score point
+    np.testing.assert_allclose(native.predict(X), model.predict(X), atol=1e-3)
+    if isinstance(model, XGBRegressor):
+        np.testing.assert_allclose(native.predict(X_missing), model.predict(X_missing), atol=1e-3)
+
+def test_binned_precision_is_tree_only(regression_data, tmp_path):
+    """Test that linear models export in float32 and refuse binning"""
+    X, y = regression_data
+    model = LinearRegression().fit(X, y)
+    exporter = ModelExporter()
+    exporter.model_exporter_config.native_model_file_path = str(tmp_path / "model_native.npz")
+    exporter.model_exporter_config.precision = "float32"
+
+    native = NativeModel.load(exporter.export(model))
+    assert native.coef.dtype == np.float32
+    np.testing.assert_allclose(native.predict(X), model.predict(X), atol=1e-3)
+    with pytest.raises(ValueError, match="tree models only"):
+        reduce_precision(export_model_arrays(model), "binned")
@@ -0,0 +1,60 @@
+import json
+from xgboost import XGBRegressor
+from src.components.columnar_store import write_columnar
+from src.components.precision_report import PrecisionReportConfig, build_precision_report
+from src.utils import load_object, save_object
+
+
+def test_report_compares_every_precision_on_the_test_split(fitted_artifacts, sample_frame, tmp_path):
+    """Test that the report covers each precision against model.predict and is saved"""
+    preprocessor = load_object(fitted_artifacts["preprocessor_path"])
+    features = preprocessor.transform(sample_frame.drop(columns=["credit_score"]))
+    model_path = str(tmp_path / "model.pkl")
+    save_object(model_path, XGBRegressor(n_estimators=20, random_state=42).fit(features, sample_frame["credit_score"]))
+    test_path = str(tmp_path / "test.csv")
+    sample_frame.tail(300).to_csv(test_path, index=False)
+    config = PrecisionReportConfig(model_path=model_path, preprocessor_path=fitted_artifacts["preprocessor_path"],
+                                   test_path=test_path, report_file_path=str(tmp_path / "precision_report.json"),
+                                   timing_repeats=1, single_row_samples=5)
+
+    report = build_precision_report(config)
+    assert report["rows"] == 300 and set(report["precisions"]) == {"float64", "float32", "binned"}
+    for entry in report["precisions"].values():
+        assert entry["safe"] and entry["changed_ratings"] == 0 and entry["max_abs_delta"] < 1e-2
+    with open(config.report_file_path) as file_obj:
+        assert json.load(file_obj) == json.loads(json.dumps(report))
+
+def test_linear_model_reports_binned_as_unsupported(fitted_artifacts, sample_frame, tmp_path):
+    """Test that the linear model gets float32 numbers and a reason for binned"""
+    test_path = str(tmp_path / "test.csv")
+    sample_frame.tail(100).to_csv(test_path, index=False)
+    config = PrecisionReportConfig(test_path=test_path, report_file_path=str(tmp_path / "report.json"),
+                                   timing_repeats=1, single_row_samples=5, **fitted_artifacts)
+
+    report = build_precision_report(config)
+    assert report["model"] == "LinearRegression"
+    assert report["precisions"]["float32"]["max_abs_delta"] < 1e-2
+    assert report["precisions"]["binned"] == {
+        "supported": False, "reason": "Binned precision applies to tree models only; use float32 for linear models"}
+
+def test_report_reads_the_columnar_test_split(fitted_artifacts, sample_frame, tmp_path):
+    """Test that the default test split, written by ingestion as columns, can be scored"""
+    assert PrecisionReportConfig().test_path.endswith("test_columns")
+    test_path = str(tmp_path / "test_columns")
+    write_columnar(sample_frame.tail(150), test_path)
+    config = PrecisionReportConfig(test_path=test_path, report_file_path=str(tmp_path / "report.json"),
+                                   precisions=("float64",), timing_repeats=1, single_row_samples=5,
+                                   **fitted_artifacts)
+
+    report = build_precision_report(config)
+    assert report["rows"] == 150
+    assert report["precisions"]["float64"]["safe"]
+
+def test_report_falls_back_to_the_csv_test_split(fitted_artifacts, sample_frame, tmp_path):
+    """Test that a tree ingested as CSV is scored from test.csv when test_columns is missing"""
+    sample_frame.tail(120).to_csv(tmp_path / "test.csv", index=False)
+    config = PrecisionReportConfig(test_path=str(tmp_path / "test_columns"), report_file_path=str(tmp_path / "report.json"),
+                                   precisions=("float64",), timing_repeats=1, single_row_samples=5,
+                                   **fitted_artifacts)
+
+    assert build_precision_report(config)["rows"] == 120
@@ -0,0 +1,91 @@
+import json
+import dataclasses
+import pytest
+from src.pipeline.micro_batcher import MicroBatcherConfig
+from src.pipeline.model_registry import ModelRegistry, ModelRegistryConfig
+from src.pipeline.prediction_cache import PredictionCache, PredictionCacheConfig
+from src.pipeline.predict_pipeline import PredictPipeline
+
+
+@pytest.fixture
+def pipeline(fitted_artifacts):
+    """A prediction pipeline with the cache enabled"""
+    return PredictPipeline(ModelRegistry(ModelRegistryConfig(**fitted_artifacts)),
+                           prediction_cache_config=PredictionCacheConfig(max_entries=3))
+
+@pytest.fixture
+def records(sample_frame):
+    """Raw request payloads taken from the training split"""
+    return json.loads(sample_frame.drop(columns=["credit_score"]).head(5).to_json(orient="records"))
+
+def test_cache_ignores_non_model_fields(pipeline, records):
+    """Test that the same financials under another user_id and date hit the cache"""
+    first = pipeline.predict_record(records[0])
+    again = pipeline.predict_record(dict(records[0], user_id="OTHER", record_date="2030-01-01",
+                                         age=float(records[0]['age'])))
+    stats = pipeline.prediction_cache.stats()
+    assert (stats['hits'], stats['misses']) == (1, 1)
+    assert again['credit_score'] == first['credit_score']
+    assert again['user_id'] == "OTHER"
+
+def test_cache_evicts_least_recently_used(pipeline, records):
+    """Test that the cache stays within its size bound"""
+    list(pipeline.predict_batch(records))
+    stats = pipeline.prediction_cache.stats()
+    assert stats['entries'] == 3
+    assert stats['evictions'] == 2
+
+    list(pipeline.predict_batch(records[-3:]))
+    assert pipeline.prediction_cache.stats()['hits'] == 3
+
+def test_cache_invalidates_on_model_version_change():
+    """Test that entries from an older model version are never served"""
+    cache = PredictionCache(PredictionCacheConfig(ttl_seconds=60))
+    assert cache.get(("k",), "v1") is None
+    cache.put(("k",), "v1", 600.0)
+    assert cache.get(("k",), "v1") == 600.0
+    assert cache.get(("k",), "v2") is None
+    cache.put(("k",), "v1", 610.0)
+    assert cache.get(("k",), "v2") is None
+    assert cache.stats()['invalidations'] == 1
+
+def test_cache_expires_entries():
+    """Test that entries older than the TTL are dropped"""
+    cache = PredictionCache(PredictionCacheConfig(ttl_seconds=0))
+    cache.get(("k",), "v1")
+    cache.put(("k",), "v1", 600.0)
+    assert cache.get(("k",), "v1") is None
+    assert cache.stats()['expirations'] == 1
+
+def test_cache_follows_the_served_version():
+    """Test that lookups and puts from an older bundle neither flush nor fill the cache"""
+    served = ["v1"]
+    cache = PredictionCache(PredictionCacheConfig(ttl_seconds=60), current_version=lambda: served[0])
+    cache.put(("k",), "v1", 600.0)
+    served[0] = "v2"
+    cache.put(("k",), "v2", 620.0)
+    for _ in range(3):
+        # A request that took the v1 bundle before the reload
+        assert cache.get(("k",), "v1") is None
+        cache.put(("k",), "v1", 610.0)
+        assert cache.get(("k",), "v2") == 620.0
+    assert cache.stats()['invalidations'] == 1
+    assert cache.stats()['model_version'] == "v2"
+
+class BrokenModel:
+    def predict(self, data):
+        raise AssertionError("scored by the reloaded model")
+
+def test_micro_batched_record_is_scored_by_its_bundle(fitted_artifacts, records, monkeypatch):
+    """Test that a record is scored by the bundle it was validated with and not cached once stale"""
+    registry = ModelRegistry(ModelRegistryConfig(**fitted_artifacts))
+    expected = PredictPipeline(registry).predict_record(records[0])
+    pipeline = PredictPipeline(registry, micro_batcher_config=MicroBatcherConfig(max_wait_ms=1),
+                               prediction_cache_config=PredictionCacheConfig())
+    # A reload lands right after the request took its bundle
+    bundles = iter([registry.get()])
+    reloaded = dataclasses.replace(registry.get(), model=BrokenModel(), version="reloaded")
+    monkeypatch.setattr(registry, "get", lambda: next(bundles, reloaded))
+
+    assert pipeline.predict_record(records[0]) == expected
+    assert pipeline.prediction_cache.stats()['entries'] == 0
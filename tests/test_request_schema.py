@@ -0,0 +1,98 @@
+import json
+import math
+import pytest
+import pandas as pd
+import app as app_module
+from src.pipeline.model_registry import ModelRegistry, ModelRegistryConfig
+from src.pipeline.request_schema import RequestSchema, RequestValidationError, parse_json
+from src.utils import load_object
+
+
+@pytest.fixture
+def record(sample_frame):
+    """One raw request payload taken from the training split"""
+    row = sample_frame.drop(columns=["credit_score"])
+    return json.loads(row[row["loan_type"].isna()].head(1).to_json(orient="records"))[0]
+
+@pytest.fixture
+def schema(fitted_artifacts):
+    return RequestSchema.for_preprocessor(load_object(fitted_artifacts["preprocessor_path"]))
+
+@pytest.fixture
+def client(fitted_artifacts, monkeypatch):
+    """Create a test client serving the small fitted artifacts"""
+    monkeypatch.setattr(app_module.predict_pipeline, "registry", ModelRegistry(ModelRegistryConfig(**fitted_artifacts)))
+    app_module.app.config['TESTING'] = True
+    with app_module.app.test_client() as client:
+        yield client
+
+def test_valid_record_parses_to_a_preprocessor_row(schema, record):
+    """Test that the schema keeps every field of a valid record, with null categories as NaN"""
+    row = schema.validate(record)
+    assert math.isnan(row.pop("loan_type")) and record["loan_type"] is None
+    assert row == {name: value for name, value in record.items() if name != "loan_type"}
+    assert isinstance(row["age"], int) and isinstance(row["savings_usd"], float)
+
+def test_every_problem_is_reported_at_once(schema, record):
+    """Test that one pass reports missing, mistyped, out-of-range and unknown values"""
+    record = dict(record, age="thirty", loan_interest_rate_pct=250, region="Atlantis", savings_usd=None)
+    del record["gender"]
+    with pytest.raises(RequestValidationError) as error:
+        schema.validate(record)
+
+    problems = error.value.errors
+    assert problems[0] == "field 'age': expected an integer, got 'thirty'"
+    assert "missing field 'gender'" in problems
+    assert "field 'savings_usd' must not be null" in problems
+    assert "field 'loan_interest_rate_pct': 250.0 is outside [0, 100]" in problems
+    assert problems[-1].startswith("field 'region': unknown value 'Atlantis', expected one of ['Africa'")
+    assert len(problems) == 5
+
+def test_endpoint_answers_400_with_details(client, record):
+    """Test that invalid and malformed bodies are rejected before the model with a 400"""
+    response = client.post('/predict', json=dict(record, has_loan="Maybe"))
+    assert response.status_code == 400
+    assert response.get_json()['details'] == [
+        "field 'has_loan': unknown value 'Maybe', expected one of ['No', 'Yes']"]
+
+    response = client.post('/predict', data='{"user_id": ', content_type='application/json')
+    assert response.status_code == 400 and response.get_json()['error'].startswith("invalid JSON")
+
+    assert client.post('/predict', json=record).status_code == 200
+
+def test_parse_json_rejects_empty_bodies():
+    """Test that an empty body is a validation error rather than a decoder crash"""
+    assert parse_json(b'[1, 2]') == [1, 2]
+    with pytest.raises(RequestValidationError, match="No data provided"):
+        parse_json(b'')
+
+def test_validate_frame_reports_like_validate(schema, record):
+    """Test that column-wise validation gives the rows and messages of validate()"""
+    bad = dict(record, age="thirty", loan_interest_rate_pct=250, region="Atlantis", savings_usd=None)
+    frame = pd.DataFrame([record, bad, record])
+    rows, errors = schema.validate_frame(frame)
+
+    with pytest.raises(RequestValidationError) as error:
+        schema.validate(bad)
+    assert errors == {1: error.value.errors}
+    row, expected = rows.loc[0].to_dict(), schema.validate(record)
+    assert math.isnan(row.pop("loan_type")) and math.isnan(expected.pop("loan_type"))
+    assert row == expected
+
+@pytest.mark.parametrize("field, values", [
+    ("age", [30, 30.0, "30", "30.0", " 30 ", "1e1", "30.5", "30_0", "３０", True, "inf", "nan", "thirty"]),
+    ("loan_amount_usd", [2.5, "2.5", "1e3", "1_000", True, "-inf", "-1", "cash"]),
+])
+def test_validate_frame_agrees_on_borderline_values(schema, record, field, values):
+    """Test that every value is accepted or rejected with the same message by both paths"""
+    records = [dict(record, **{field: value}) for value in values]
+    rows, frame_errors = schema.validate_frame(pd.DataFrame(records))
+
+    for position, candidate in enumerate(records):
+        try:
+            row, errors = schema.validate(candidate), []
+        except RequestValidationError as error:
+            row, errors = None, error.errors
+        assert frame_errors.get(position, []) == errors, candidate[field]
+        if row is not None:
+            assert rows.loc[position, field] == row[field]
@@ -0,0 +1,62 @@
+import json
+import threading
+import pytest
+import app as app_module
+from src.pipeline.model_registry import ModelRegistry, ModelRegistryConfig
+from src.pipeline.predict_pipeline import PredictPipeline
+from src.pipeline.serving_metrics import Histogram, ServingMetrics
+
+
+@pytest.fixture
+def client(fitted_artifacts, monkeypatch):
+    """Create a test client with fresh metrics and no prediction cache"""
+    pipeline = app_module.predict_pipeline
+    monkeypatch.setattr(pipeline, "registry", ModelRegistry(ModelRegistryConfig(**fitted_artifacts)))
+    monkeypatch.setattr(pipeline, "metrics", ServingMetrics())
+    monkeypatch.setattr(pipeline, "prediction_cache", None)
+    app_module.app.config['TESTING'] = True
+    with app_module.app.test_client() as client:
+        yield client
+
+def test_histogram_sums_thread_shards_and_folds_finished_threads():
+    """Test that observations from many threads all reach the totals"""
+    histogram = Histogram(buckets=(0.001, 0.01))
+    def observe():
+        for seconds in (0.0005, 0.005, 0.5) * 1000:
+            histogram.observe("inference", seconds)
+    threads = [threading.Thread(target=observe) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert histogram.values()["inference"][:3] == [8000, 8000, 8000]
+    assert histogram.values()["inference"][3] == pytest.approx(8000 * 0.5055)
+    # Finished threads were merged into the retired shard
+    assert histogram._cells._shards == []
+
+def test_metrics_endpoint_reports_stages_counters_and_version(client, sample_frame):
+    """Test that one prediction shows up in every stage histogram and counter"""
+    record = json.loads(sample_frame.drop(columns=["credit_score"]).head(1).to_json(orient="records"))[0]
+    assert client.post('/predict', json=record).status_code == 200
+    assert client.post('/predict', json={"user_id": "U1"}).status_code == 400
+
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    body = response.get_data(as_text=True)
+    for stage in ("json_parse", "custom_data", "preprocess", "inference", "serialize"):
+        assert f'credit_predict_stage_seconds_count{{stage="{stage}"}}' in body
+    assert 'credit_predict_stage_seconds_count{stage="inference"} 1' in body
+    assert 'credit_requests_total{endpoint="/predict"} 2' in body
+    # A rejected request is the client's error, not the service's
+    assert 'credit_errors_total{endpoint="/predict"}' not in body
+    version = app_module.predict_pipeline.registry.info()["version"]
+    assert f'credit_model_info{{version="{version}"}} 1' in body
+
+def test_clamped_scores_are_counted(fitted_artifacts):
+    """Test that only predictions outside 300-850 count as clamped"""
+    pipeline = PredictPipeline(ModelRegistry(ModelRegistryConfig(**fitted_artifacts)), metrics=ServingMetrics())
+    assert pipeline.format_prediction("U1", 900.0)['credit_score'] == 850
+    pipeline.format_prediction("U2", 600.0)
+    pipeline.format_prediction("U3", 120.0)
+    assert "credit_clamped_scores_total 2" in pipeline.metrics.render()
@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+import pytest
+import xgboost
+from src.components.data_ingestion import DataIngestion, user_id_buckets
+from src.components.data_transformation import DataTransformation
+from src.components.streaming_trainer import StreamingModelTrainer
+from src.pipeline.native_model import NativeModel
+from src.utils import load_object
+from tests.conftest import NUMERICAL_COLUMNS, CATEGORICAL_COLUMNS
+
+
+@pytest.fixture
+def source_csv(sample_frame, tmp_path):
+    frame = sample_frame.copy()
+    frame.loc[::7, "savings_usd"] = np.nan
+    frame.loc[::11, "region"] = np.nan
+    path = tmp_path / "source.csv"
+    frame.to_csv(path, index=False)
+    return frame, str(path)
+
+def test_streaming_ingestion_splits_on_user_id_hash(source_csv, tmp_path):
+    """Test that the chunked split is deterministic and keeps each user on one side"""
+    frame, path = source_csv
+    ingestion = DataIngestion()
+    config = ingestion.ingestion_config
+    config.source_file_path, config.chunk_rows = path, 300
+    config.raw_file_path, config.train_file_path, config.test_file_path = (
+        str(tmp_path / "data.csv"), str(tmp_path / "train.csv"), str(tmp_path / "test.csv"))
+
+    train_path, test_path = ingestion.initiate_streaming_ingestion()
+    train, test = pd.read_csv(train_path), pd.read_csv(test_path)
+
+    assert len(train) + len(test) == len(frame) == len(pd.read_csv(config.raw_file_path))
+    assert not set(train["user_id"]) & set(test["user_id"])
+    assert 0.15 < len(test) / len(frame) < 0.25
+    expected_test = user_id_buckets(frame["user_id"]) < int(0.2 * 2**32)
+    assert sorted(test["user_id"]) == sorted(frame["user_id"][expected_test])
+
+def test_streaming_preprocessor_matches_in_memory_fit(source_csv):
+    """Test that the one-pass chunked fit reproduces the in-memory preprocessor"""
+    frame, path = source_csv
+    transformation = DataTransformation()
+    transformation.data_transformation_config.streaming_chunk_rows = 250
+    streamed = transformation.fit_streaming_preprocessor(path, NUMERICAL_COLUMNS, CATEGORICAL_COLUMNS)
+    in_memory = transformation.get_data_transformer_object_with_columns(
+        NUMERICAL_COLUMNS, CATEGORICAL_COLUMNS).fit(frame)
+
+    np.testing.assert_allclose(streamed.transform(frame), in_memory.transform(frame), rtol=1e-9, atol=1e-9)
+
+def test_streaming_preprocessor_drops_an_empty_categorical_column(source_csv, tmp_path):
+    """Test that a column with no values is dropped like the in-memory imputer does, and a gap in the first chunk is not"""
+    frame = source_csv[0].copy()
+    frame["job_title"] = np.nan
+    frame.loc[:299, "loan_type"] = np.nan
+    path = tmp_path / "gaps.csv"
+    frame.to_csv(path, index=False)
+    transformation = DataTransformation()
+    transformation.data_transformation_config.streaming_chunk_rows = 250
+    streamed = transformation.fit_streaming_preprocessor(str(path), NUMERICAL_COLUMNS, CATEGORICAL_COLUMNS)
+    with pytest.warns(UserWarning, match="job_title"):
+        in_memory = transformation.get_data_transformer_object_with_columns(
+            NUMERICAL_COLUMNS, CATEGORICAL_COLUMNS).fit(frame)
+
+    np.testing.assert_allclose(streamed.transform(frame), in_memory.transform(frame), rtol=1e-9, atol=1e-9)
+    assert not any("job_title" in name for name in streamed.get_feature_names_out())
+
+@pytest.mark.parametrize("quantile_pages", [True, False])
+def test_streaming_trainer_fits_xgboost_from_chunks(source_csv, tmp_path, monkeypatch, quantile_pages):
+    """Test that external-memory training saves a servable, exportable model"""
+    frame, path = source_csv
+    if not quantile_pages:
+        # XGBoost releases before 3.0 only have the DMatrix external-memory path
+        monkeypatch.delattr(xgboost, "ExtMemQuantileDMatrix", raising=False)
+    frame.iloc[:1600].to_csv(tmp_path / "train.csv", index=False)
+    frame.iloc[1600:].to_csv(tmp_path / "test.csv", index=False)
+    preprocessor = DataTransformation().fit_streaming_preprocessor(
+        str(tmp_path / "train.csv"), NUMERICAL_COLUMNS, CATEGORICAL_COLUMNS)
+    preprocessor.pair_id_ = "streamed-pair"
+    trainer = StreamingModelTrainer()
+    config = trainer.streaming_trainer_config
+    config.chunk_rows, config.n_estimators = 400, 20
+    config.trained_model_file_path = str(tmp_path / "model.pkl")
+    config.native_model_file_path = str(tmp_path / "model_native.npz")
+    config.cache_dir = str(tmp_path / "xgb_cache")
+
+    r2_square = trainer.initiate_streaming_training(str(tmp_path / "train.csv"), str(tmp_path / "test.csv"), preprocessor)
+
+    model = load_object(config.trained_model_file_path)
+    features = DataTransformation().transform_features(
+        preprocessor, frame.iloc[1600:].drop(columns=["credit_score", "user_id", "record_date"]))
+    predicted = model.predict(features)
+    y = frame["credit_score"].iloc[1600:].to_numpy()
+    assert r2_square == pytest.approx(1 - ((y - predicted) ** 2).sum() / ((y - y.mean()) ** 2).sum(), rel=1e-4)
+    native_model = NativeModel.load(config.native_model_file_path)
+    np.testing.assert_allclose(native_model.predict(features), predicted, rtol=1e-5)
+    assert model.pair_id_ == native_model.pair_id_ == "streamed-pair"
+    assert not (tmp_path / "xgb_cache").exists()
@@ -0,0 +1,163 @@
+import os
+import json
+import pytest
+from sklearn.linear_model import LinearRegression
+from sklearn.tree import DecisionTreeRegressor
+from src.components.model_trainer import ModelTrainer
+from src.exception import CustomException
+from src.pipeline.model_registry import ModelRegistry, ModelRegistryConfig
+from src.pipeline.train_pipeline import TrainPipeline
+from src.utils import load_object
+
+
+class SmallModelTrainer(ModelTrainer):
+    """Two fast model families; a module-level class so process pools can pickle it"""
+    def get_models(self):
+        return {'Linear Regression': LinearRegression(),
+                'Decision Tree': DecisionTreeRegressor(random_state=42)}
+
+@pytest.fixture
+def source_csv(sample_frame, tmp_path):
+    """Source data with a learnable target so the trainer's R2 gate passes"""
+    frame = sample_frame.copy()
+    frame["credit_score"] = (300 + frame["monthly_income_usd"] / 50 - frame["debt_to_income_ratio"] * 100
+                             + (frame["has_loan"] == "Yes") * 40).round()
+    path = tmp_path / "source.csv"
+    frame.to_csv(path, index=False)
+    return str(path)
+
+def make_pipeline(directory, source_path, executor="serial"):
+    pipeline = TrainPipeline()
+    pipeline.model_trainer = SmallModelTrainer()
+    ingestion = pipeline.data_ingestion.ingestion_config
+    ingestion.source_file_path = source_path
+    for name in ("train_file_path", "test_file_path", "raw_file_path",
+                 "raw_store_path", "train_store_path", "test_store_path"):
+        setattr(ingestion, name, str(directory / os.path.basename(getattr(ingestion, name))))
+    pipeline.data_transformation.data_transformation_config.preprocessor_obj_file_path = str(directory / "preprocessor.pkl")
+    config = pipeline.train_pipeline_config
+    config.transformed_dir = str(directory / "transformed")
+    config.search_dir = str(directory / "search")
+    config.report_file_path = str(directory / "pipeline_report.json")
+    config.executor, config.max_workers = executor, 2
+    trainer = pipeline.model_trainer.model_trainer_config
+    trainer.trained_model_file_path = str(directory / "model.pkl")
+    trainer.native_model_file_path = str(directory / "model_native.npz")
+    trainer.selection_report_file_path = str(directory / "model_selection.json")
+    trainer.search_config.n_jobs = 1
+    trainer.search_config.fold_cache_dir = str(directory / "fold_cache")
+    trainer.param_grids = {'Linear Regression': {}, 'Decision Tree': {'max_depth': [3, 6]}}
+    pipeline.stage_cache.config.manifest_dir = str(directory / "stages")
+    pipeline.stage_cache.config.enabled = True
+    return pipeline
+
+def instrumented(monkeypatch, pipeline):
+    calls = []
+    def count(obj, name):
+        original = getattr(obj, name)
+        def wrapper(*args, **kwargs):
+            calls.append(name if name != "search_model" else f"search:{args[0]}")
+            return original(*args, **kwargs)
+        monkeypatch.setattr(obj, name, wrapper)
+    count(pipeline.data_ingestion, "initiate_data_ingestion")
+    count(pipeline.data_transformation, "initiate_data_transformation")
+    count(pipeline.model_trainer, "search_model")
+    count(pipeline.model_trainer, "save_best_model")
+    return calls
+
+def read_report(directory):
+    with open(directory / "pipeline_report.json") as file_obj:
+        return json.load(file_obj)["nodes"]
+
+def test_unchanged_rerun_skips_every_node(source_csv, tmp_path, monkeypatch):
+    """Test that a second run with the same inputs reuses all recorded outputs"""
+    r2_square = make_pipeline(tmp_path, source_csv).run()
+    assert r2_square > 0.9
+    report = read_report(tmp_path)
+    assert set(report) == {"ingestion", "transformation", "search:Linear Regression",
+                           "search:Decision Tree", "selection"}
+    assert all(node["status"] == "ran" and node["peak_rss_mb"] > 0 for node in report.values())
+    assert sorted(os.listdir(tmp_path / "stages")) == ["ingestion.json", "search_decision_tree.json",
+                                                       "search_linear_regression.json", "selection.json",
+                                                       "transformation.json"]
+
+    second = make_pipeline(tmp_path, source_csv)
+    calls = instrumented(monkeypatch, second)
+    assert second.run() == pytest.approx(r2_square)
+    assert calls == []
+    assert {node["status"] for node in read_report(tmp_path).values()} == {"cached"}
+
+def test_grid_change_reruns_only_that_family_and_selection(source_csv, tmp_path, monkeypatch):
+    """Test that editing one param grid keeps every other node cached"""
+    make_pipeline(tmp_path, source_csv).run()
+
+    pipeline = make_pipeline(tmp_path, source_csv)
+    pipeline.model_trainer.model_trainer_config.param_grids['Decision Tree'] = {'max_depth': [4, 8]}
+    calls = instrumented(monkeypatch, pipeline)
+    pipeline.run()
+    assert calls == ["search:Decision Tree", "save_best_model"]
+
+def test_failed_node_is_resumed_on_rerun(source_csv, tmp_path, monkeypatch):
+    """Test that a failure skips dependents and a rerun resumes from the finished nodes"""
+    pipeline = make_pipeline(tmp_path, source_csv)
+    original = pipeline.model_trainer.search_model
+    def flaky(name, *args, **kwargs):
+        if name == 'Decision Tree':
+            raise ValueError("out of memory")
+        return original(name, *args, **kwargs)
+    monkeypatch.setattr(pipeline.model_trainer, "search_model", flaky)
+    with pytest.raises(CustomException):
+        pipeline.run()
+    report = read_report(tmp_path)
+    assert report["search:Decision Tree"]["status"] == "failed"
+    assert report["selection"]["status"] == "skipped"
+    assert report["search:Linear Regression"]["status"] == "ran"
+
+    resumed = make_pipeline(tmp_path, source_csv)
+    calls = instrumented(monkeypatch, resumed)
+    resumed.run()
+    assert calls == ["search:Decision Tree", "save_best_model"]
+
+def test_changed_source_reruns_everything(source_csv, tmp_path, monkeypatch):
+    """Test that new source data invalidates every downstream node"""
+    make_pipeline(tmp_path, source_csv).run()
+
+    with open(source_csv, "a") as file_obj:
+        file_obj.write(open(source_csv).read().splitlines()[1] + "\n")
+    pipeline = make_pipeline(tmp_path, source_csv)
+    calls = instrumented(monkeypatch, pipeline)
+    pipeline.run()
+    assert calls[:2] == ["initiate_data_ingestion", "initiate_data_transformation"]
+    assert sorted(calls[2:4]) == ["search:Decision Tree", "search:Linear Regression"]
+    assert calls[4:] == ["save_best_model"]
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_search_nodes_run_on_a_pool(source_csv, tmp_path, executor):
+    """Test that the pooled executors produce the same model as serial execution"""
+    serial_dir, pooled_dir = tmp_path / "serial", tmp_path / executor
+    serial_dir.mkdir(), pooled_dir.mkdir()
+    expected = make_pipeline(serial_dir, source_csv).run()
+    assert make_pipeline(pooled_dir, source_csv, executor=executor).run() == pytest.approx(expected)
+    report = read_report(pooled_dir)
+    assert report["selection"]["status"] == "ran"
+    # Each node reports the peak RSS of the process that ran it
+    assert all(node["peak_rss_mb"] > 0 for node in report.values())
+
+def test_registry_keeps_the_old_pair_until_selection(source_csv, tmp_path):
+    """Test that a retrained preprocessor is not served with the previous model"""
+    make_pipeline(tmp_path, source_csv).run()
+    model, preprocessor = load_object(str(tmp_path / "model.pkl")), load_object(str(tmp_path / "preprocessor.pkl"))
+    assert model.pair_id_ is not None and model.pair_id_ == preprocessor.pair_id_
+    registry = ModelRegistry(ModelRegistryConfig(model_path=str(tmp_path / "model.pkl"),
+                                                 preprocessor_path=str(tmp_path / "preprocessor.pkl")))
+    version = registry.get().version
+
+    # A retrain has written its preprocessor; the searches and selection are still running
+    pipeline = make_pipeline(tmp_path, source_csv)
+    ingestion = pipeline.data_ingestion.ingestion_config
+    pipeline.data_transformation.initiate_data_transformation(ingestion.train_store_path, ingestion.test_store_path)
+    assert registry.reload_if_changed() is False and registry.get().version == version
+
+    pipeline.stage_cache.config.enabled = False
+    pipeline.run()
+    assert registry.reload_if_changed() is True and registry.get().version != version
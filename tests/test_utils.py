@@ -0,0 +1,54 @@
+import os
+import pickle
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import LinearRegression
+from src.exception import CustomException
+from src.utils import ARTIFACT_MAGIC, load_object, save_object
+
+
+class Unpicklable:
+    def __reduce__(self):
+        raise TypeError("cannot pickle")
+
+
+def test_large_arrays_are_mapped_from_the_artifact(tmp_path):
+    """Test that large buffers are stored out of band and loaded as shared read-only views"""
+    rng = np.random.default_rng(0)
+    X, y = rng.normal(size=(50, 20000)), rng.normal(size=50)
+    model = LinearRegression().fit(X, y)
+    file_path = str(tmp_path / "model.pkl")
+    save_object(file_path, model)
+
+    with open(file_path, "rb") as file_obj:
+        assert file_obj.read(len(ARTIFACT_MAGIC)) == ARTIFACT_MAGIC
+    mapped = load_object(file_path)
+    assert not mapped.coef_.flags.writeable
+    assert np.array_equal(mapped.predict(X), model.predict(X))
+    assert load_object(file_path, mmap_buffers=False).coef_.flags.writeable
+
+    forest = RandomForestRegressor(n_estimators=5, random_state=0).fit(X[:, :10], y)
+    save_object(file_path, forest)
+    assert np.array_equal(load_object(file_path).predict(X[:, :10]), forest.predict(X[:, :10]))
+
+def test_small_objects_stay_plain_pickles(tmp_path):
+    """Test that artifacts without large buffers, and old pickles, load with plain pickle"""
+    file_path = str(tmp_path / "small.pkl")
+    save_object(file_path, {"coef": np.arange(3.0)})
+    with open(file_path, "rb") as file_obj:
+        assert np.array_equal(pickle.load(file_obj)["coef"], np.arange(3.0))
+
+    with open(file_path, "wb") as file_obj:
+        pickle.dump([1, 2], file_obj, protocol=2)
+    assert load_object(file_path) == [1, 2]
+
+def test_failed_save_keeps_the_previous_artifact(tmp_path):
+    """Test that a save that fails midway leaves the old file and no temporary file"""
+    file_path = str(tmp_path / "model.pkl")
+    save_object(file_path, {"version": 1})
+    with pytest.raises(CustomException):
+        save_object(file_path, {"version": 2, "model": Unpicklable()})
+
+    assert load_object(file_path) == {"version": 1}
+    assert os.listdir(tmp_path) == ["model.pkl"]